@@ -1,21 +1,37 @@
 # app/__init__.py
+import click
 from flask import Flask
 from flask_migrate import Migrate
 from flask_jwt_extended import JWTManager
 from flask_cors import CORS
 from .models import db
+from .compression import init_compression
+from .database import engine_options, init_replicas
+from .instrumentation import init_instrumentation
+from .response_cache import init_response_cache
+from .serializers import JSONProvider
 from flask import jsonify
 from config import Config
 
 def create_app():
     app = Flask(__name__)
     app.config.from_object(Config)
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = engine_options(
+        app.config['SQLALCHEMY_DATABASE_URI'], app.config['SQLALCHEMY_ENGINE_OPTIONS']
+    )
+    # jsonify and request.get_json go through orjson when it is installed
+    app.json = JSONProvider(app)
 
     # Initialize extensions
+    init_replicas(app)
     db.init_app(app)
     migrate = Migrate(app, db)
     jwt = JWTManager(app)
-    CORS(app)
+    # Expose the pagination and debug headers to browser clients
+    CORS(app, expose_headers=['X-Next-Cursor', 'X-Total-Count-Estimate', 'X-Query-Count', 'Server-Timing', 'X-Cache', 'ETag'])
+    init_instrumentation(app)
+    init_response_cache(app)
+    init_compression(app)
 
     # app/__init__.py (Add the following inside create_app function)
     @app.errorhandler(400)
@@ -43,6 +59,7 @@ def create_app():
     from .comments.routes import comments_bp
     from .likes.routes import likes_bp
     from .follows.routes import follows_bp
+    from .ops.routes import ops_bp
 
     app.register_blueprint(auth_bp, url_prefix='/v1/api/auth')
     app.register_blueprint(users_bp, url_prefix='/v1/api/users')
@@ -52,8 +69,31 @@ def create_app():
     app.register_blueprint(comments_bp, url_prefix='/v1/api/comments')
     app.register_blueprint(likes_bp, url_prefix='/v1/api/likes')
     app.register_blueprint(follows_bp, url_prefix='/v1/api/follows')
+    if app.config['OPS_ENDPOINTS_ENABLED']:
+        app.register_blueprint(ops_bp, url_prefix='/v1/api/ops')
+
+    # Register CLI commands
+    from .ratings.commands import ratings_cli
+    from .likes.commands import likes_cli
+    from .catalog.commands import catalog_cli
+
+    app.cli.add_command(ratings_cli)
+    app.cli.add_command(likes_cli)
+    app.cli.add_command(catalog_cli)
+
+    # Build in-memory indexes, unless the app is only loaded to run a CLI command
+    if app.config['SUGGEST_WARM_ON_STARTUP'] and not _loaded_for_cli_command():
+        from .courses.suggest import warm_suggestion_index
+
+        warm_suggestion_index(app)
 
     return app
 
 
+def _loaded_for_cli_command():
+    """Whether a ``flask`` command other than ``run`` is loading the app, so it will serve no requests."""
+    context = click.get_current_context(silent=True)
+    return context is not None and context.info_name != 'run'
+
+
 
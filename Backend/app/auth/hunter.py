@@ -0,0 +1,199 @@
+# app/auth/hunter.py
+import logging
+import threading
+import time
+from collections import OrderedDict
+import requests
+from requests.adapters import HTTPAdapter
+from config import Config
+
+logger = logging.getLogger(__name__)
+
+# Hunter statuses meaning every address at the domain is unusable
+BAD_DOMAIN_STATUSES = {'disposable'}
+
+
+class TTLCache:
+    """Small thread-safe LRU mapping whose entries expire ``ttl`` seconds after being set."""
+
+    def __init__(self, ttl, max_entries):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] <= time.monotonic():
+                self._entries.pop(key, None)
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class CircuitBreaker:
+    """
+    Stops calling an upstream after ``threshold`` consecutive failures.
+
+    While open, ``allow()`` is False for ``cooldown`` seconds; after that a single
+    trial call is let through, and its outcome closes or reopens the breaker.
+    """
+
+    def __init__(self, threshold, cooldown):
+        self._lock = threading.Lock()
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        return 'half-open' if time.monotonic() - self.opened_at >= self.cooldown else 'open'
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_running = False
+            if self.opened_at is not None or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+class HunterUnavailable(Exception):
+    pass
+
+
+class HunterClient:
+    """
+    Email verification through the Hunter.io email-verifier API.
+
+    Calls go through one pooled ``requests.Session`` with hard connect and read
+    timeouts, so a slow upstream holds a worker for a bounded time. Results are
+    cached per email, and domain-wide verdicts (e.g. disposable domains) per
+    domain. When Hunter fails or its circuit breaker is open, verification
+    falls back to the permitted-domain check alone.
+    """
+
+    def __init__(self, api_url, api_key, connect_timeout, read_timeout, pool_size,
+                 cache_ttl, cache_max_entries, breaker_threshold, breaker_cooldown):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.emails = TTLCache(cache_ttl, cache_max_entries)
+        self.domains = TTLCache(cache_ttl, cache_max_entries)
+        self.breaker = CircuitBreaker(breaker_threshold, breaker_cooldown)
+        self._stats = {'calls': 0, 'cache_hits': 0, 'failures': 0, 'fallbacks': 0}
+
+    def verify(self, email, domain_permitted):
+        """
+        Return True if ``email`` may be used to register.
+
+        Args:
+            email (str): The address to verify.
+            domain_permitted (callable): The domain-only check used when Hunter is unavailable.
+        """
+        email = email.strip().lower()
+        domain = email.rpartition('@')[2]
+
+        if self.domains.get(domain) is False:
+            self._stats['cache_hits'] += 1
+            return False
+        cached = self.emails.get(email)
+        if cached is not None:
+            self._stats['cache_hits'] += 1
+            return cached
+
+        if not self.breaker.allow():
+            self._stats['fallbacks'] += 1
+            return domain_permitted(email)
+
+        data = None
+        try:
+            data = self._fetch(email)
+        except HunterUnavailable as error:
+            self._stats['failures'] += 1
+            self._stats['fallbacks'] += 1
+            logger.warning('Hunter verification failed for %s, using the domain check: %s', domain, error)
+            return domain_permitted(email)
+        finally:
+            # Whatever happened, so a half-open breaker never waits forever on a trial call that raised
+            if data is None:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()
+
+        status = data.get('status')
+        if status in BAD_DOMAIN_STATUSES:
+            self.domains.set(domain, False)
+        valid = status == 'valid'
+        self.emails.set(email, valid)
+        return valid
+
+    def stats(self):
+        return {**self._stats, 'breaker': self.breaker.state}
+
+    def _fetch(self, email):
+        self._stats['calls'] += 1
+        try:
+            response = self.session.get(
+                self.api_url,
+                params={'email': email, 'api_key': self.api_key},
+                timeout=self.timeout
+            )
+        except requests.RequestException as error:
+            raise HunterUnavailable(str(error)) from error
+
+        # Rate limits, auth problems and server errors say nothing about the address itself
+        if response.status_code != 200:
+            raise HunterUnavailable(f'HTTP {response.status_code}')
+        try:
+            body = response.json()
+        except ValueError as error:
+            raise HunterUnavailable('malformed response') from error
+        data = body.get('data') if isinstance(body, dict) else None
+        if not isinstance(data, dict):
+            raise HunterUnavailable('malformed response')
+        return data
+
+
+hunter_client = HunterClient(
+    api_url=Config.HUNTER_API_URL,
+    api_key=Config.HUNTER_API_KEY,
+    connect_timeout=Config.HUNTER_CONNECT_TIMEOUT,
+    read_timeout=Config.HUNTER_READ_TIMEOUT,
+    pool_size=Config.HUNTER_POOL_SIZE,
+    cache_ttl=Config.HUNTER_CACHE_TTL,
+    cache_max_entries=Config.HUNTER_CACHE_MAX_ENTRIES,
+    breaker_threshold=Config.HUNTER_BREAKER_THRESHOLD,
+    breaker_cooldown=Config.HUNTER_BREAKER_COOLDOWN
+)
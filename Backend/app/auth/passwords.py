@@ -0,0 +1,149 @@
+# app/auth/passwords.py
+import hmac
+import multiprocessing
+import secrets
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from ..utils import hash_password, verify_password
+from config import Config
+
+
+class PasswordHasherBusy(Exception):
+    """Raised when the hashing queue is full or a hash did not finish in time."""
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt hashing and verification on a bounded worker pool.
+
+    At most ``workers`` hashes run at once, so a burst of logins cannot take
+    more CPU than that away from the other endpoints. Up to ``max_queue``
+    further requests wait for a worker; beyond that, callers get
+    ``PasswordHasherBusy`` at once instead of piling up.
+
+    Args:
+        executor (str): ``'process'`` isolates hashing from the request threads
+            completely; ``'thread'`` is lighter but only helps if the bcrypt backend
+            releases the GIL (the ``bcrypt`` package does, passlib's ``os_crypt`` does not).
+        workers (int): Concurrent hashes.
+        max_queue (int): Requests allowed to wait for a free worker.
+        timeout (float): Seconds to wait for a result before giving up.
+    """
+
+    def __init__(self, executor, workers, max_queue, timeout):
+        self._lock = threading.Lock()
+        self._executor = None
+        self._stats = {'completed': 0, 'rejected': 0, 'timeouts': 0}
+        self.configure(executor, workers, max_queue, timeout)
+
+    def configure(self, executor, workers, max_queue, timeout):
+        """(Re)size the pool; running operations finish on the old one."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            self.executor_type = executor
+            self.workers = workers
+            self.max_queue = max_queue
+            self.timeout = timeout
+            self._slots = threading.BoundedSemaphore(workers + max_queue)
+
+    def shutdown(self):
+        """Stop the pool once running operations finish; the next call starts a new one."""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+    def hash(self, password):
+        return self._run(hash_password, password)
+
+    def verify(self, password, password_hash):
+        return self._run(verify_password, password, password_hash)
+
+    def stats(self):
+        return {'executor': self.executor_type, 'workers': self.workers, **self._stats}
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                if self.executor_type == 'process':
+                    # Spawned rather than forked, as the web server may already be running threads
+                    self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+                else:
+                    self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='password-hasher')
+            return self._executor
+
+    def _run(self, fn, *args):
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            self._stats['rejected'] += 1
+            raise PasswordHasherBusy('Too many password operations in progress.')
+        try:
+            future = self._pool().submit(fn, *args)
+        except Exception:
+            slots.release()
+            raise
+        future.add_done_callback(lambda _: slots.release())
+        try:
+            result = future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            # The slot stays taken until the hash finishes, so timeouts also count against the queue
+            self._stats['timeouts'] += 1
+            raise PasswordHasherBusy('Password operation timed out.')
+        self._stats['completed'] += 1
+        return result
+
+
+password_hasher = PasswordHasher(
+    executor=Config.PASSWORD_HASH_EXECUTOR,
+    workers=Config.PASSWORD_HASH_WORKERS,
+    max_queue=Config.PASSWORD_HASH_MAX_QUEUE,
+    timeout=Config.PASSWORD_HASH_TIMEOUT
+)
+
+
+def share_password_hasher(processes):
+    """
+    Size this process's pool to its share of ``PASSWORD_HASH_WORKERS`` when ``processes`` server processes run.
+
+    Each gunicorn worker has a pool of its own, so the budget is split between
+    them rather than every worker starting one hash per CPU.
+    """
+    password_hasher.configure(
+        executor=Config.PASSWORD_HASH_EXECUTOR,
+        workers=max(1, Config.PASSWORD_HASH_WORKERS // processes),
+        max_queue=Config.PASSWORD_HASH_MAX_QUEUE,
+        timeout=Config.PASSWORD_HASH_TIMEOUT
+    )
+
+
+_dummy_hash = None
+
+
+def check_password(password, stored_hash):
+    """
+    Verify ``password`` against a stored hash on the worker pool.
+
+    Accounts created before server-side hashing store the client-supplied value
+    as is; those are compared directly. ``utils.password_needs_rehash`` tells
+    the caller when to store ``password_hasher.hash(password)`` in its place: for
+    such legacy rows, and for hashes made with a different ``BCRYPT_ROUNDS``.
+
+    A ``stored_hash`` of None, for an unknown account, is still checked against
+    a throwaway hash of the same cost, so a login takes as long whether or not
+    the email is registered.
+
+    Returns:
+        bool: Whether the password matches.
+    """
+    global _dummy_hash
+    if stored_hash is None:
+        if _dummy_hash is None:
+            _dummy_hash = password_hasher.hash(secrets.token_urlsafe())
+        password_hasher.verify(password, _dummy_hash)
+        return False
+    if not stored_hash.startswith('$2'):
+        return hmac.compare_digest(password.encode(), stored_hash.encode())
+    return password_hasher.verify(password, stored_hash)
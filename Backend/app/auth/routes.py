@@ -1,8 +1,10 @@
 # app/auth/routes.py
-import requests
 from flask import Blueprint, request, jsonify
 from ..models import db, User
-from ..utils import hash_password, verify_password
+from ..serializers import USER_SCHEMA
+from ..utils import password_needs_rehash
+from .hunter import hunter_client
+from .passwords import PasswordHasherBusy, check_password, password_hasher
 from flask_jwt_extended import create_access_token
 from sqlalchemy.exc import IntegrityError
 from config import Config
@@ -34,21 +36,17 @@ def is_email_permitted(email: str) -> bool:
         return False
 
 def verify_email_with_hunter(email):
-    """Function to verify email using Hunter.io API."""
+    """Function to verify email using Hunter.io API; falls back to the domain check when Hunter is unavailable."""
     # Check if the email is in the test accounts
     if email in Config.TEST_ACCOUNTS:
         return True
 
-    params = {
-        'email': email,
-        'api_key': Config.HUNTER_API_KEY
-    }
-    response = requests.get(Config.HUNTER_API_URL, params=params)
-    if response.status_code == 200:
-        data = response.json()
-        if data.get('data') and data['data']['status'] == 'valid':
-            return True
-    return False
+    return hunter_client.verify(email, is_email_permitted)
+
+def _busy_response():
+    response = jsonify({'message': 'Server is busy, please try again shortly.'})
+    response.headers['Retry-After'] = '1'
+    return response, 503
 
 @auth_bp.route('/register', methods=['POST'])
 def register():
@@ -72,8 +70,14 @@ def register():
     if not verify_email_with_hunter(email):
         return jsonify({'message': 'Invalid or non-existent email.'}), 400
 
+    # Hash on the bounded worker pool so a burst of sign-ups cannot starve other requests
+    try:
+        stored_hash = password_hasher.hash(password_hash)
+    except PasswordHasherBusy:
+        return _busy_response()
+
     # Proceed with user registration if email and username are valid
-    new_user = User(email=email, password_hash=password_hash, name=name)
+    new_user = User(email=email, password_hash=stored_hash, name=name)
     try:
         db.session.add(new_user)
         db.session.commit()
@@ -92,14 +96,21 @@ def login():
         return jsonify({'message': 'Missing email or password_hash.'}), 400
 
     user = User.query.filter_by(email=email).first()
-    if user and password_hash == user.password_hash:
+    try:
+        password_matches = check_password(password_hash, user.password_hash if user else None)
+    except PasswordHasherBusy:
+        return _busy_response()
+
+    if password_matches:
+        # Upgrade legacy and old-cost hashes while the password is at hand; if the pool is busy, a later login will
+        if password_needs_rehash(user.password_hash):
+            try:
+                user.password_hash = password_hasher.hash(password_hash)
+                db.session.commit()
+            except PasswordHasherBusy:
+                pass
+
         token = create_access_token(identity=str(user.id))
-        user_data = {
-            'id': user.id,
-            'email': user.email,
-            'name': user.name,
-            'created_at': user.created_at.isoformat()
-        }
-        return jsonify({'token': token, 'user': user_data}), 200
+        return jsonify({'token': token, 'user': USER_SCHEMA.dump(user)}), 200
     else:
         return jsonify({'message': 'Invalid email or password_hash.'}), 401
@@ -0,0 +1,104 @@
+# app/catalog/commands.py
+import json
+import os
+import sys
+import click
+from flask.cli import AppGroup
+from .importer import CatalogImportError, detect_format, import_catalog, read_records
+from config import Config
+
+catalog_cli = AppGroup('catalog', help='Bulk maintenance of courses, instructors and their offerings.')
+
+
+def _fingerprint(path):
+    """Identifies the input a checkpoint belongs to, so it is never applied to a changed file."""
+    status = os.stat(path)
+    return {'path': os.path.abspath(path), 'size': status.st_size, 'mtime': status.st_mtime}
+
+
+def _read_checkpoint(checkpoint, fingerprint):
+    if not checkpoint or not os.path.exists(checkpoint):
+        return 0
+    with open(checkpoint) as checkpoint_file:
+        state = json.load(checkpoint_file)
+    if state.get('input') != fingerprint:
+        raise click.ClickException(f'{checkpoint} belongs to another input; remove it or pass --restart.')
+    return state['records_done']
+
+
+def _write_checkpoint(checkpoint, fingerprint, records_done):
+    # Written to a temporary file and renamed, so an interruption never leaves half a checkpoint
+    with open(checkpoint + '.tmp', 'w') as checkpoint_file:
+        json.dump({'input': fingerprint, 'records_done': records_done}, checkpoint_file)
+    os.replace(checkpoint + '.tmp', checkpoint)
+
+
+@catalog_cli.command('import')
+@click.argument('source', type=click.Path(allow_dash=True))
+@click.option('--format', 'input_format', type=click.Choice(['csv', 'json', 'jsonl']),
+              help='Input format; guessed from the file extension by default (CSV for stdin).')
+@click.option('--batch-size', type=click.IntRange(1), default=Config.CATALOG_IMPORT_BATCH_SIZE, show_default=True,
+              help='Records upserted per transaction.')
+@click.option('--checkpoint', type=click.Path(dir_okay=False),
+              help='Progress file for resuming; defaults to SOURCE.checkpoint for files.')
+@click.option('--restart', is_flag=True, help='Ignore an existing checkpoint and start from the first record.')
+def import_command(source, input_format, batch_size, checkpoint, restart):
+    """
+    Upsert courses, instructors and course offerings from SOURCE ('-' for stdin).
+
+    Each record has the fields course_code, course_name, unit, description,
+    instructor_name, profile_url and semester; the instructor fields and the
+    semester may be left empty for a course that has no offering. Courses are
+    matched on course_code, instructors on profile_url and offerings on course,
+    instructor and semester. Running the same input again changes nothing.
+
+    Every committed batch is recorded in the checkpoint file, so an interrupted
+    import continues where it stopped when run again; the file is removed once
+    the import completes.
+
+    A running server picks up the changes to its course search and suggestion
+    indexes and instructor list within REFERENCE_CACHE_TTL seconds. Its cached
+    responses are invalidated at once with RESPONSE_CACHE_BACKEND=redis set here
+    too; with the memory backend they are served until RESPONSE_CACHE_TTL.
+    """
+    from_stdin = source == '-'
+    input_format = input_format or ('csv' if from_stdin else detect_format(source))
+    fingerprint = None
+    if not from_stdin:
+        checkpoint = checkpoint or f'{source}.checkpoint'
+        fingerprint = _fingerprint(source)
+    if restart and checkpoint and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    skip = _read_checkpoint(checkpoint, fingerprint)
+    if skip:
+        click.echo(f'Resuming after record {skip} (from {checkpoint}).')
+
+    def on_batch(records_done, stats):
+        if checkpoint:
+            _write_checkpoint(checkpoint, fingerprint, records_done)
+        click.echo(f'{records_done} records, {stats.rows_per_second:.0f} rows/s', err=True)
+
+    stream = sys.stdin if from_stdin else open(source, newline='', encoding='utf-8-sig')
+    try:
+        stats = import_catalog(read_records(stream, input_format), batch_size, skip=skip, on_batch=on_batch)
+    except CatalogImportError as error:
+        raise click.ClickException(
+            f'{str(error).rstrip(".")}. The batches before it are committed; once the input is fixed, run again with --restart '
+            '(records already imported are left as they are).'
+        )
+    finally:
+        if not from_stdin:
+            stream.close()
+
+    if checkpoint and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    for entity, counts in stats.counts.items():
+        click.echo(f'{entity}: {counts["inserted"]} inserted, {counts["updated"]} updated, {counts["unchanged"]} unchanged')
+    for number, message in stats.invalid[:20]:
+        click.echo(f'Record {number} skipped: {message}')
+    if len(stats.invalid) > 20:
+        click.echo(f'... and {len(stats.invalid) - 20} more invalid record(s).')
+    click.echo(f'Imported {stats.records} records in {stats.elapsed:.1f} s ({stats.rows_per_second:.0f} rows/s), '
+               f'{len(stats.invalid)} skipped.')
+    if stats.invalid:
+        raise SystemExit(1)
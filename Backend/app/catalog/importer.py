@@ -0,0 +1,321 @@
+# app/catalog/importer.py
+import csv
+import json
+import os
+import time
+from ..courses.listeners import COURSES_VERSION, notify_courses_changed
+from ..models import db, Course, CourseInstructor, Instructor
+from ..reference_cache import bump_version, reference_cache
+from ..response_cache import response_cache
+from ..utils import upsert_insert
+
+# Fields of an input record; only course_code, course_name and unit are required
+RECORD_FIELDS = ('course_code', 'course_name', 'unit', 'description', 'instructor_name', 'profile_url', 'semester')
+COURSE_FIELDS = ('name', 'unit', 'description')
+INSTRUCTOR_FIELDS = ('name',)
+JSON_READ_SIZE = 1 << 16
+
+
+class CatalogImportError(Exception):
+    """Raised when the input cannot be read at all, as opposed to a single invalid record."""
+
+
+def detect_format(path):
+    """Input format from a file name: ``csv``, ``jsonl`` (one object per line) or ``json`` (an array of objects)."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.jsonl', '.ndjson'):
+        return 'jsonl'
+    if extension == '.json':
+        return 'json'
+    return 'csv'
+
+
+def read_records(stream, input_format):
+    """
+    Yield the records of a text stream one at a time, without reading it all into memory.
+
+    Args:
+        stream: The open input, in text mode.
+        input_format (str): ``csv``, ``jsonl`` or ``json``.
+
+    Raises:
+        CatalogImportError: If the input is not valid CSV or JSON.
+    """
+    if input_format == 'csv':
+        reader = csv.DictReader(stream)
+        missing = {'course_code', 'course_name', 'unit'} - set(reader.fieldnames or ())
+        if missing:
+            raise CatalogImportError(f'CSV header lacks {", ".join(sorted(missing))}.')
+        yield from reader
+    elif input_format == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            if line.strip():
+                try:
+                    yield json.loads(line)
+                except ValueError as error:
+                    raise CatalogImportError(f'Line {line_number} is not valid JSON: {error}')
+    else:
+        yield from _read_json_array(stream)
+
+
+def _read_json_array(stream):
+    """Decode the objects of a top-level JSON array one by one, reading the stream in chunks."""
+    decoder = json.JSONDecoder()
+    buffer, position, started = '', 0, False
+    while True:
+        chunk = stream.read(JSON_READ_SIZE)
+        buffer = buffer[position:] + chunk
+        position = 0
+        while True:
+            # Skip whitespace, the opening bracket and separating commas
+            while position < len(buffer) and (buffer[position].isspace() or buffer[position] in ',['):
+                if buffer[position] == '[':
+                    if started:
+                        raise CatalogImportError('Nested arrays are not records.')
+                    started = True
+                position += 1
+            if position < len(buffer) and buffer[position] == ']':
+                return
+            if position >= len(buffer):
+                break
+            if not started:
+                raise CatalogImportError('JSON input must be an array of objects.')
+            try:
+                record, end = decoder.raw_decode(buffer, position)
+            except ValueError as error:
+                if not chunk:
+                    raise CatalogImportError(f'Invalid JSON: {error}')
+                # The object continues in the next chunk
+                break
+            position = end
+            yield record
+        if not chunk:
+            raise CatalogImportError('JSON array is not closed.')
+
+
+def parse_record(record):
+    """
+    Validate one input record.
+
+    Returns:
+        tuple: ``(course, instructor, semester)`` where ``course`` and ``instructor``
+        are column dicts (``instructor`` None when the record names no instructor),
+        or raises ValueError describing what is wrong.
+    """
+    if not isinstance(record, dict):
+        raise ValueError('record is not an object')
+    values = {field: record.get(field) for field in RECORD_FIELDS}
+    for field, value in values.items():
+        if isinstance(value, str):
+            values[field] = value.strip() or None
+
+    if not values['course_code'] or not values['course_name']:
+        raise ValueError('course_code and course_name are required')
+    try:
+        unit = int(values['unit'])
+    except (TypeError, ValueError):
+        raise ValueError(f'unit must be an integer, got {values["unit"]!r}')
+    course = {
+        'course_code': str(values['course_code']),
+        'name': str(values['course_name']),
+        'unit': unit,
+        'description': values['description'],
+    }
+
+    instructor = None
+    if values['instructor_name'] or values['profile_url']:
+        if not values['instructor_name'] or not values['profile_url']:
+            raise ValueError('instructor_name and profile_url go together')
+        instructor = {'profile_url': str(values['profile_url']), 'name': str(values['instructor_name'])}
+    elif values['semester']:
+        raise ValueError('semester needs an instructor')
+    semester = str(values['semester']) if values['semester'] is not None else None
+    return course, instructor, semester
+
+
+class ImportStats:
+    """Counters of one import run."""
+
+    def __init__(self):
+        self.records = 0
+        self.invalid = []  # (record number, message)
+        self.counts = {
+            entity: {'inserted': 0, 'updated': 0, 'unchanged': 0}
+            for entity in ('courses', 'instructors', 'offerings')
+        }
+        self.started = time.perf_counter()
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    @property
+    def rows_per_second(self):
+        return self.records / self.elapsed if self.elapsed else 0.0
+
+
+def _upsert(model, key, fields, rows):
+    """
+    Insert new ``rows`` and update changed ones, keyed on the unique column ``key``.
+
+    The existing rows are read with one query; only rows that are new or differ
+    are written, with one multi-row upsert, so a re-run of the same input writes
+    nothing. The upsert still resolves a conflict with a concurrent writer.
+
+    Returns:
+        tuple: Ids by key for every row, the inserted keys, the updated keys and the number unchanged.
+    """
+    key_column = getattr(model, key)
+    existing = {
+        row[0]: row for row in db.session.query(key_column, model.id, *(getattr(model, field) for field in fields))
+        .filter(key_column.in_(list(rows)))
+    }
+    ids = {value: row[1] for value, row in existing.items()}
+    inserted = [value for value in rows if value not in existing]
+    updated = [
+        value for value in rows
+        if value in existing and tuple(rows[value][field] for field in fields) != tuple(existing[value][2:])
+    ]
+    unchanged = len(rows) - len(inserted) - len(updated)
+
+    written = inserted + updated
+    if written:
+        stmt = upsert_insert(model)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[key],
+            set_={field: stmt.excluded[field] for field in fields}
+        ).returning(key_column, model.id)
+        # A parameter list rather than .values(): the statement compiles once and the driver batches the rows
+        ids.update(db.session.execute(stmt, [rows[value] for value in written]).all())
+    return ids, inserted, updated, unchanged
+
+
+def _insert_offerings(pairs):
+    """Insert the ``(course_id, instructor_id, semester)`` offerings not stored yet; returns those inserted."""
+    course_ids = {course_id for course_id, _, _ in pairs}
+    existing = set(
+        db.session.query(CourseInstructor.course_id, CourseInstructor.instructor_id, CourseInstructor.semester)
+        .filter(CourseInstructor.course_id.in_(course_ids))
+    )
+    # Offerings without a semester never collide in the unique constraint, so the lookup is what keeps them unique
+    new = [pair for pair in pairs if pair not in existing]
+    if new:
+        stmt = upsert_insert(CourseInstructor).on_conflict_do_nothing(
+            index_elements=['course_id', 'instructor_id', 'semester']
+        )
+        db.session.execute(stmt, [
+            {'course_id': course_id, 'instructor_id': instructor_id, 'semester': semester}
+            for course_id, instructor_id, semester in new
+        ])
+    return new
+
+
+def import_batch(batch, stats):
+    """
+    Upsert one batch of records in one transaction.
+
+    Every table is read once and written at most once per batch, whatever the
+    batch size: the courses and instructors named in the batch are looked up by
+    ``course_code`` and ``profile_url`` in one query each, then new and changed
+    rows are upserted together, then the offerings missing from
+    ``course_instructors`` are inserted. Later records win over earlier ones
+    with the same key. Caches and search indexes are updated after the commit:
+    this process's at once, the web workers' within ``REFERENCE_CACHE_TTL``
+    seconds through ``reference_versions``. Cached responses are only dropped
+    in the workers with the Redis response cache; with the memory backend they
+    expire after ``RESPONSE_CACHE_TTL``.
+
+    Args:
+        batch (list): ``(record number, record)`` pairs.
+        stats (ImportStats): Updated in place.
+    """
+    courses, instructors, offerings = {}, {}, []
+    for number, record in batch:
+        try:
+            course, instructor, semester = parse_record(record)
+        except ValueError as error:
+            stats.invalid.append((number, str(error)))
+            continue
+        courses[course['course_code']] = course
+        if instructor is not None:
+            instructors[instructor['profile_url']] = instructor
+            offerings.append((course['course_code'], instructor['profile_url'], semester))
+
+    course_ids, new_courses, changed_courses, same = _upsert(Course, 'course_code', COURSE_FIELDS, courses)
+    stats.counts['courses']['inserted'] += len(new_courses)
+    stats.counts['courses']['updated'] += len(changed_courses)
+    stats.counts['courses']['unchanged'] += same
+
+    instructor_ids, new_instructors, changed_instructors, same = _upsert(
+        Instructor, 'profile_url', INSTRUCTOR_FIELDS, instructors
+    )
+    stats.counts['instructors']['inserted'] += len(new_instructors)
+    stats.counts['instructors']['updated'] += len(changed_instructors)
+    stats.counts['instructors']['unchanged'] += same
+
+    pairs = list(dict.fromkeys(
+        (course_ids[code], instructor_ids[url], semester) for code, url, semester in offerings
+    ))
+    new_offerings = _insert_offerings(pairs) if pairs else []
+    stats.counts['offerings']['inserted'] += len(new_offerings)
+    stats.counts['offerings']['unchanged'] += len(pairs) - len(new_offerings)
+
+    # Other processes (the web workers) poll these versions to reload their own copies
+    if new_instructors or changed_instructors:
+        reference_cache.invalidate('instructors')
+    changed_codes = new_courses + changed_courses
+    if changed_codes:
+        bump_version(COURSES_VERSION)
+    db.session.commit()
+
+    # Core upserts skip the ORM flush events that normally keep these current in this process.
+    # The response cache only reaches the server's entries when it is shared (the Redis backend)
+    if changed_codes:
+        notify_courses_changed({
+            course_ids[code]: {
+                'id': course_ids[code],
+                'course_code': code,
+                'name': courses[code]['name'],
+                'description': courses[code]['description']
+            } for code in changed_codes
+        })
+    tags = [f'instructor:{instructor_ids[url]}' for url in changed_instructors]
+    tags += [f'course:{course_id}' for course_id in {course_id for course_id, _, _ in new_offerings}]
+    if new_instructors or changed_instructors:
+        tags.append('instructors')
+    if tags:
+        response_cache.invalidate('courses', *tags)
+
+
+def import_catalog(records, batch_size, skip=0, on_batch=None):
+    """
+    Import a stream of catalog records in batches of ``batch_size``, committing each.
+
+    Args:
+        records (iterable): Record dicts, see ``RECORD_FIELDS``.
+        batch_size (int): Records per transaction.
+        skip (int): Records to pass over first, when resuming an interrupted import.
+        on_batch (callable | None): Called with the number of records done and the
+            stats after each committed batch, e.g. to save a checkpoint.
+
+    Returns:
+        ImportStats: What was written.
+    """
+    stats = ImportStats()
+    batch = []
+    for number, record in enumerate(records, start=1):
+        if number <= skip:
+            continue
+        batch.append((number, record))
+        if len(batch) == batch_size:
+            import_batch(batch, stats)
+            stats.records += len(batch)
+            if on_batch:
+                on_batch(number, stats)
+            batch = []
+    if batch:
+        import_batch(batch, stats)
+        stats.records += len(batch)
+        if on_batch:
+            on_batch(batch[-1][0], stats)
+    return stats
@@ -3,6 +3,12 @@ from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..models import db, Comment, Course, CourseInstructor
 from sqlalchemy.exc import IntegrityError
+from ..response_cache import cached_response, response_cache, tag_response, target_tag
+from ..serializers import COMMENT_SCHEMA
+from ..queries import COMMENT_THREAD_KEYSET, parse_page_args
+from ..utils import parse_limit
+from .threads import load_threads
+from config import Config
 
 comments_bp = Blueprint('comments', __name__)
 
@@ -48,86 +54,50 @@ def post_comment():
     try:
         db.session.add(new_comment)
         db.session.commit()
-        comment_data = {
-            'id': new_comment.id,
-            'user_id': new_comment.user_id,
-            'course_id': new_comment.course_id,
-            'course_instructor_id': new_comment.course_instructor_id,
-            'parent_comment_id': new_comment.parent_comment_id,
-            'content': new_comment.content,
-            'created_at': new_comment.created_at.isoformat()
-        }
-        return jsonify(comment_data), 201
+        response_cache.invalidate(target_tag('comments', course_id, course_instructor_id))
+        return jsonify(COMMENT_SCHEMA.dump(new_comment)), 201
     except IntegrityError:
         db.session.rollback()
         return jsonify({'message': 'Failed to post comment.'}), 400
 
+def _threads_response(target_column, target_id):
+    limit, after, error = parse_page_args(
+        request.args, COMMENT_THREAD_KEYSET, Config.COMMENTS_DEFAULT_LIMIT, Config.COMMENTS_MAX_LIMIT
+    )
+    if error:
+        return jsonify({'message': error}), 400
+
+    depth = parse_limit(request.args.get('depth'), Config.COMMENTS_DEFAULT_DEPTH, Config.COMMENTS_MAX_DEPTH)
+    if depth is None:
+        return jsonify({'message': f'depth must be between 1 and {Config.COMMENTS_MAX_DEPTH}.'}), 400
+
+    reply_cap = parse_limit(request.args.get('replies'), Config.COMMENTS_DEFAULT_REPLIES, Config.COMMENTS_MAX_REPLIES)
+    if reply_cap is None:
+        return jsonify({'message': f'replies must be between 1 and {Config.COMMENTS_MAX_REPLIES}.'}), 400
+
+    comments_list, next_cursor = load_threads(target_column, target_id, limit, after, depth, reply_cap)
+
+    response = jsonify(comments_list)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
+
 @comments_bp.route('/courses/<int:course_id>', methods=['GET'])
+@cached_response(tags=lambda course_id: [target_tag('comments', course_id=course_id)])
 def get_course_comments(course_id):
     course = Course.query.get(course_id)
     if not course:
         return jsonify({'message': 'Resource not found'}), 404
 
-    comments = Comment.query.filter_by(course_id=course_id, parent_comment_id=None).all()
-    comments_list = []
-
-    for comment in comments:
-        sub_comments = [{
-            'id': sub.id,
-            'user_id': sub.user_id,
-            'course_id': sub.course_id,
-            'course_instructor_id': sub.course_instructor_id,
-            'parent_comment_id': sub.parent_comment_id,
-            'content': sub.content,
-            'created_at': sub.created_at.isoformat()
-        } for sub in comment.children]
-
-        comment_data = {
-            'id': comment.id,
-            'user_id': comment.user_id,
-            'course_id': comment.course_id,
-            'course_instructor_id': comment.course_instructor_id,
-            'parent_comment_id': comment.parent_comment_id,
-            'content': comment.content,
-            'created_at': comment.created_at.isoformat(),
-            'sub_comments': sub_comments
-        }
-        comments_list.append(comment_data)
-
-    return jsonify(comments_list), 200
+    return _threads_response('course_id', course_id)
 
 @comments_bp.route('/courses/<int:course_id>/instructors/<int:instructor_id>', methods=['GET'])
+@cached_response()
 def get_course_instructor_comments(course_id, instructor_id):
     course_instructor = CourseInstructor.query.filter_by(course_id=course_id, instructor_id=instructor_id).first()
     if not course_instructor:
         return jsonify({'message': 'Resource not found'}), 404
 
-    comments = Comment.query.filter_by(course_instructor_id=course_instructor.id, parent_comment_id=None).all()
-    comments_list = []
-
-    for comment in comments:
-        sub_comments = [{
-            'id': sub.id,
-            'user_id': sub.user_id,
-            'course_id': sub.course_id,
-            'course_instructor_id': sub.course_instructor_id,
-            'parent_comment_id': sub.parent_comment_id,
-            'content': sub.content,
-            'created_at': sub.created_at.isoformat()
-        } for sub in comment.children]
-
-        comment_data = {
-            'id': comment.id,
-            'user_id': comment.user_id,
-            'course_id': comment.course_id,
-            'course_instructor_id': comment.course_instructor_id,
-            'parent_comment_id': comment.parent_comment_id,
-            'content': comment.content,
-            'created_at': comment.created_at.isoformat(),
-            'sub_comments': sub_comments
-        }
-        comments_list.append(comment_data)
-
-    return jsonify(comments_list), 200
-
+    tag_response(target_tag('comments', course_instructor_id=course_instructor.id))
 
+    return _threads_response('course_instructor_id', course_instructor.id)
@@ -0,0 +1,77 @@
+# app/comments/threads.py
+from sqlalchemy import func, select, union_all
+from ..models import Comment
+from ..queries import COMMENT_THREAD_KEYSET, fetch_dicts, fetch_page, schema_columns
+from ..serializers import COMMENT_SCHEMA
+
+COMMENT_COLUMNS = schema_columns(Comment, COMMENT_SCHEMA)
+
+
+def _reply_ids(root_ids, max_depth, reply_cap):
+    """
+    SELECT of the ids of the replies under ``root_ids`` to show, down to ``max_depth`` levels.
+
+    One CTE per level: each ranks the replies to the previous level's kept
+    comments per parent, oldest first, and keeps the first ``reply_cap``, so
+    replies beyond the cap are never read, nor are their own replies.
+    """
+    parents, levels = None, []
+    for depth in range(1, max_depth + 1):
+        position = func.row_number().over(
+            partition_by=Comment.parent_comment_id, order_by=(Comment.created_at, Comment.id)
+        ).label('position')
+        ranked = select(Comment.id, position).where(
+            Comment.parent_comment_id.in_(root_ids if parents is None else select(parents.c.id))
+        ).subquery()
+        kept = select(ranked.c.id)
+        if reply_cap is not None:
+            kept = kept.where(ranked.c.position <= reply_cap)
+        parents = kept.cte(f'replies_{depth}')
+        levels.append(select(parents.c.id))
+    return union_all(*levels) if len(levels) > 1 else levels[0]
+
+
+def load_threads(target_column, target_id, limit, after=None, max_depth=1, reply_cap=None):
+    """
+    Load one page of comment threads for a course or course-instructor pair.
+
+    Runs two queries whatever the number of threads: one keyset-paginated query
+    for the top-level comments (newest first, on ``created_at, id``) and one
+    that fetches their replies down to ``max_depth`` levels, capped per parent
+    in SQL. The forest is then assembled in memory.
+
+    Args:
+        target_column (str): ``'course_id'`` or ``'course_instructor_id'``.
+        target_id (int): The id of the course or course-instructor pair.
+        limit (int): The number of threads per page.
+        after (list | None): Decoded ``COMMENT_THREAD_KEYSET`` cursor of the previous page.
+        max_depth (int): How many levels of replies to include (0 for none).
+        reply_cap (int | None): The most replies returned under any one comment, oldest first.
+
+    Returns:
+        tuple: ``(threads, next_cursor)``; each thread is a comment dict with nested
+        ``sub_comments``, and ``next_cursor`` is None on the last page.
+    """
+    roots, next_cursor = fetch_page(
+        COMMENT_COLUMNS, COMMENT_THREAD_KEYSET,
+        getattr(Comment, target_column) == target_id,
+        Comment.parent_comment_id.is_(None),
+        limit=limit, after=after
+    )
+
+    children = {}
+    if roots and max_depth > 0:
+        replies = fetch_dicts(
+            COMMENT_COLUMNS,
+            Comment.id.in_(_reply_ids([root['id'] for root in roots], max_depth, reply_cap)),
+            order_by=(Comment.created_at, Comment.id)
+        )
+        for reply in replies:
+            children.setdefault(reply['parent_comment_id'], []).append(reply)
+
+    def build(comment, depth):
+        if depth < max_depth:
+            comment['sub_comments'] = [build(reply, depth + 1) for reply in children.get(comment['id'], [])]
+        return comment
+
+    return [build(root, 0) for root in roots], next_cursor
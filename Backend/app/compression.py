@@ -0,0 +1,152 @@
+# app/compression.py
+import gzip
+import zlib
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - gzip only without the optional brotli package
+    brotli = None
+
+# Media types worth compressing; images and other binary formats are already compact
+COMPRESSIBLE_MIMETYPES = {'application/json', 'application/x-ndjson', 'text/plain', 'text/html', 'text/csv'}
+
+
+class Compression:
+    """
+    Negotiates a Content-Encoding from ``Accept-Encoding`` and compresses responses with it.
+
+    Brotli is preferred when the ``brotli`` package is installed and the client
+    accepts it, then gzip. Compressed responses carry a weak version of the
+    body's ETag, so a client revalidating with it still gets a 304 whichever
+    encoding it received. The response cache asks ``precompress`` for the
+    variants of each entry it stores and serves them with ``apply``, so hits
+    cost no compression at all.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.min_size = 0
+        self.levels = {}
+        self.cached_levels = {}
+        self.codings = ()
+
+    def configure(self, enabled, min_size, levels, cached_levels):
+        """
+        Args:
+            enabled (bool): Compress at all.
+            min_size (int): Smallest body, in bytes, worth compressing.
+            levels (dict): Level per coding for responses compressed as they are sent.
+            cached_levels (dict): Level per coding for the variants stored in the response cache.
+        """
+        self.enabled = enabled
+        self.min_size = min_size
+        self.levels = levels
+        self.cached_levels = cached_levels
+        self.codings = ('br', 'gzip') if brotli else ('gzip',)
+
+    def negotiate(self):
+        """Return the best coding the current request accepts, or None to send the body as it is."""
+        if not self.enabled:
+            return None
+        return request.accept_encodings.best_match(self.codings)
+
+    def compressible(self, response):
+        return (
+            self.enabled and response.status_code == 200 and response.mimetype in COMPRESSIBLE_MIMETYPES
+            and 'Content-Encoding' not in response.headers and not response.direct_passthrough
+        )
+
+    def compress(self, data, coding, level):
+        if coding == 'br':
+            return brotli.compress(data, quality=level)
+        # mtime=0 keeps the output, and so anything derived from it, deterministic
+        return gzip.compress(data, compresslevel=level, mtime=0)
+
+    def precompress(self, data, mimetype):
+        """
+        Compress a body to be cached with every available coding.
+
+        Returns:
+            dict: Compressed body per coding; empty when the body is too small,
+            not compressible, or would not shrink.
+        """
+        if not self.enabled or mimetype not in COMPRESSIBLE_MIMETYPES or len(data) < self.min_size:
+            return {}
+        variants = {coding: self.compress(data, coding, self.cached_levels[coding]) for coding in self.codings}
+        return {coding: body for coding, body in variants.items() if len(body) < len(data)}
+
+    def apply(self, response, variants):
+        """Send the precompressed variant of ``response`` that the client accepts, if there is one."""
+        if not variants or not self.compressible(response):
+            return response
+        response.vary.add('Accept-Encoding')
+        coding = self.negotiate()
+        if coding in variants:
+            self._encode(response, coding)
+            response.set_data(variants[coding])
+        return response
+
+    def compress_response(self, response):
+        """``after_request`` hook compressing whatever was not already served precompressed."""
+        if not self.compressible(response):
+            return response
+        if response.is_streamed:
+            response.vary.add('Accept-Encoding')
+            coding = self.negotiate()
+            if coding:
+                self._encode(response, coding)
+                response.headers.pop('Content-Length', None)
+                response.response = self._stream(response.response, coding)
+            return response
+
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+        response.vary.add('Accept-Encoding')
+        coding = self.negotiate()
+        if coding:
+            compressed = self.compress(data, coding, self.levels[coding])
+            if len(compressed) < len(data):
+                self._encode(response, coding)
+                response.set_data(compressed)
+        return response
+
+    def _stream(self, chunks, coding):
+        """Compress a streamed body chunk by chunk, flushing after each so nothing waits on the next batch."""
+        if coding == 'br':
+            compressor = brotli.Compressor(quality=self.levels['br'])
+            process, flush, finish = compressor.process, compressor.flush, compressor.finish
+        else:
+            compressor = zlib.compressobj(self.levels['gzip'], zlib.DEFLATED, 31)
+            process, finish = compressor.compress, compressor.flush
+            flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+        try:
+            for chunk in chunks:
+                if chunk:
+                    yield process(chunk) + flush()
+            yield finish()
+        finally:
+            if hasattr(chunks, 'close'):
+                chunks.close()
+
+    @staticmethod
+    def _encode(response, coding):
+        response.headers['Content-Encoding'] = coding
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+
+
+compression = Compression()
+
+
+def init_compression(app):
+    """Configure ``compression`` from the app's ``COMPRESSION_*`` settings and compress every response on the way out."""
+    compression.configure(
+        app.config['COMPRESSION_ENABLED'],
+        app.config['COMPRESSION_MIN_SIZE'],
+        {'gzip': app.config['COMPRESSION_GZIP_LEVEL'], 'br': app.config['COMPRESSION_BROTLI_QUALITY']},
+        {'gzip': app.config['COMPRESSION_CACHED_GZIP_LEVEL'], 'br': app.config['COMPRESSION_CACHED_BROTLI_QUALITY']},
+    )
+    app.after_request(compression.compress_response)
@@ -0,0 +1,72 @@
+# app/courses/listeners.py
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from ..models import Course
+from ..reference_cache import bump_version
+
+# Row in reference_versions bumped by every transaction that changes courses, see ``IndexRefresher``
+COURSES_VERSION = 'courses'
+
+_subscribers = []
+
+
+def subscribe(callback):
+    """
+    Register ``callback(changed, deleted_ids)`` to run after every commit that touched courses.
+
+    ``changed`` maps course ids to snapshots of their searchable fields, see ``course_snapshot``.
+    In-memory indexes use this to stay current without rebuilding.
+    """
+    _subscribers.append(callback)
+
+
+def course_snapshot(course):
+    return {
+        'id': course.id,
+        'course_code': course.course_code,
+        'name': course.name,
+        'description': course.description
+    }
+
+
+def notify_courses_changed(changed, deleted_ids=()):
+    """
+    Push course changes made outside the ORM unit of work (e.g. bulk imports) to this process's subscribers.
+
+    Other processes only learn of them through ``COURSES_VERSION``, which the
+    writer must bump in the same transaction.
+    """
+    for callback in _subscribers:
+        callback(changed, set(deleted_ids))
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_course_changes(session, flush_context):
+    changes = session.info.setdefault('course_changes', ({}, set()))
+    changed, deleted_ids = changes
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, Course):
+            changed[obj.id] = course_snapshot(obj)
+            deleted_ids.discard(obj.id)
+    for obj in session.deleted:
+        if isinstance(obj, Course):
+            changed.pop(obj.id, None)
+            deleted_ids.add(obj.id)
+    # Once per transaction, so the other processes' indexes notice the change too
+    if (changed or deleted_ids) and not session.info.get('courses_version_bumped'):
+        bump_version(COURSES_VERSION, session.connection())
+        session.info['courses_version_bumped'] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_course_changes(session):
+    session.info.pop('courses_version_bumped', None)
+    changes = session.info.pop('course_changes', None)
+    if changes and (changes[0] or changes[1]):
+        notify_courses_changed(*changes)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_course_changes(session):
+    session.info.pop('courses_version_bumped', None)
+    session.info.pop('course_changes', None)
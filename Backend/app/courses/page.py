@@ -0,0 +1,113 @@
+# app/courses/page.py
+from sqlalchemy import exists, or_
+from ..comments.threads import load_threads
+from ..models import db, Follow, Rating
+from ..queries import get_course_detail
+from ..ratings.aggregates import get_course_page_ratings
+from ..reference_cache import get_rating_dimensions
+from ..response_cache import tag_response, target_tag
+from config import Config
+
+# Sections of the course page besides the course itself; the last two need a logged-in user
+SECTIONS = ('ratings', 'instructor_ratings', 'comments', 'my_ratings', 'following')
+USER_SECTIONS = frozenset({'my_ratings', 'following'})
+
+
+def course_page_tags(course_id, user_id):
+    """Response cache tags of a course page: the course, its ratings and comments, and the user's follows."""
+    tags = [f'course:{course_id}', target_tag('ratings', course_id=course_id), target_tag('comments', course_id=course_id)]
+    if user_id:
+        tags.append(f'user:{user_id}:follows')
+    return tags
+
+
+def parse_sections(raw, authenticated):
+    """
+    Parse an ``include=`` parameter such as ``"ratings,comments"``.
+
+    Without one, every section is included, except the per-user ones for anonymous requests.
+
+    Returns:
+        frozenset | None: The sections, or None if ``raw`` names an unknown one.
+    """
+    if not raw:
+        return frozenset(section for section in SECTIONS if authenticated or section not in USER_SECTIONS)
+    sections = frozenset(section.strip() for section in raw.split(',') if section.strip())
+    if not sections <= set(SECTIONS):
+        return None
+    return sections
+
+
+def build_course_page(course_id, sections, user_id=None):
+    """
+    Assemble everything a course page shows, in a fixed number of queries.
+
+    The course and its instructors take two queries, then each section one more:
+    the course and instructor averages share a single aggregates query, comments
+    take the two of ``load_threads``, and the user's ratings of the course and of
+    all its instructors are read together. Each section has the same shape as the
+    endpoint it replaces.
+
+    Args:
+        course_id (int): The course.
+        sections (frozenset): Sections to include, from ``parse_sections``.
+        user_id (int | None): The logged-in user, required for the per-user sections.
+
+    Returns:
+        dict | None: The page, or None if the course does not exist.
+    """
+    course = get_course_detail(course_id)
+    if course is None:
+        return None
+    pair_ids = list(dict.fromkeys(instructor['course_instructor_id'] for instructor in course['instructors']))
+    tag_response(*(target_tag('ratings', course_instructor_id=pair_id) for pair_id in pair_ids))
+    page = {'course': course}
+
+    if 'ratings' in sections or 'instructor_ratings' in sections:
+        course_ratings, pair_ratings = get_course_page_ratings(course_id, pair_ids)
+        if 'ratings' in sections:
+            page['ratings'] = {'course_id': course_id, 'ratings': course_ratings}
+        if 'instructor_ratings' in sections:
+            page['instructor_ratings'] = [
+                {'course_instructor_id': pair_id, 'ratings': pair_ratings[pair_id]} for pair_id in pair_ids
+            ]
+
+    if 'comments' in sections:
+        threads, next_cursor = load_threads(
+            'course_id', course_id, Config.COMMENTS_DEFAULT_LIMIT, None,
+            Config.COMMENTS_DEFAULT_DEPTH, Config.COMMENTS_DEFAULT_REPLIES
+        )
+        page['comments'] = {'threads': threads, 'next_cursor': next_cursor}
+
+    if 'my_ratings' in sections:
+        page['my_ratings'] = _my_ratings(user_id, course_id, pair_ids)
+
+    if 'following' in sections:
+        page['following'] = db.session.query(
+            exists().where(Follow.user_id == user_id, Follow.course_id == course_id)
+        ).scalar()
+
+    return page
+
+
+def _my_ratings(user_id, course_id, pair_ids):
+    """The user's scores for the course and each of its instructors, shaped like GET /ratings/my-ratings."""
+    scores = {}
+    rows = db.session.query(Rating.course_instructor_id, Rating.rating_dimension_id, Rating.score).filter(
+        Rating.user_id == user_id,
+        or_(Rating.course_id == course_id, Rating.course_instructor_id.in_(pair_ids))
+    )
+    for course_instructor_id, dimension_id, score in rows:
+        scores[(course_instructor_id, dimension_id)] = score
+
+    dimensions = get_rating_dimensions()
+    targets = [(course_id, None)] + [(None, pair_id) for pair_id in pair_ids]
+    return [{
+        'course_id': target_course_id,
+        'course_instructor_id': course_instructor_id,
+        'ratings': [{
+            'dimension_id': dimension.id,
+            'dimension_name': dimension.name,
+            'score': scores.get((course_instructor_id, dimension.id))
+        } for dimension in dimensions]
+    } for target_course_id, course_instructor_id in targets]
@@ -0,0 +1,72 @@
+# app/courses/refresh.py
+import threading
+import time
+from ..reference_cache import read_version
+from .listeners import COURSES_VERSION
+from config import Config
+
+
+class IndexRefresher:
+    """
+    Keeps an in-memory course index current with writes made by other processes, one rebuild at a time.
+
+    Changes committed in this process reach the index through ``subscribe``.
+    For the others, such as other workers or ``flask catalog import``, the
+    ``COURSES_VERSION`` row is read at most every ``REFERENCE_CACHE_TTL`` seconds
+    and the index rebuilt when it has moved; it is also rebuilt once older than
+    ``SEARCH_INDEX_TTL`` regardless.
+
+    The first caller to find a check or rebuild due runs it; callers arriving
+    meanwhile keep reading the current copy instead of each running the same
+    full scan of ``courses``. Only before the first build do they wait for it.
+
+    Args:
+        index: An index with ``build(courses)`` and a ``built_at`` monotonic timestamp.
+        load (callable): Returns the rows to build from; runs in the caller's app context.
+    """
+
+    def __init__(self, index, load):
+        self.index = index
+        self.load = load
+        self._lock = threading.Lock()
+        self._version = None
+        self._checked_at = None
+
+    def rebuild(self):
+        with self._lock:
+            self._build()
+
+    def ensure(self):
+        """Return the index, after rebuilding it if it was never built or is out of date."""
+        if self.index.built_at is None:
+            with self._lock:
+                if self.index.built_at is None:
+                    self._build()
+        elif self._due() and self._lock.acquire(blocking=False):
+            try:
+                if self._due():
+                    self._refresh()
+            finally:
+                self._lock.release()
+        return self.index
+
+    def _due(self):
+        now = time.monotonic()
+        return (now - self.index.built_at > Config.SEARCH_INDEX_TTL
+                or self._checked_at is None or now - self._checked_at >= Config.REFERENCE_CACHE_TTL)
+
+    def _refresh(self):
+        if time.monotonic() - self.index.built_at > Config.SEARCH_INDEX_TTL:
+            self._build()
+            return
+        version = read_version(COURSES_VERSION)
+        self._checked_at = time.monotonic()
+        if version != self._version:
+            self._build()
+
+    def _build(self):
+        # Read first, so a write committed while the rows load triggers another rebuild
+        version = read_version(COURSES_VERSION)
+        self.index.build(self.load())
+        self._version = version
+        self._checked_at = time.monotonic()
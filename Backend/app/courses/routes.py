@@ -1,69 +1,153 @@
 # app/courses/routes.py
 from flask import Blueprint, jsonify, request
-from ..models import db, Course, CourseInstructor, Instructor
-from flask_jwt_extended import jwt_required
+from ..models import Course, CourseRanking
+from flask_jwt_extended import get_jwt_identity, jwt_required
+from ..queries import (
+    COURSE_KEYSETS, COURSE_RANKING_KEYSET, course_columns, estimate_count, fetch_dicts, fetch_page, get_course_detail, iter_dicts,
+    parse_fields, parse_page_args
+)
+from ..reference_cache import get_rating_dimensions
+from ..response_cache import cached_response
+from ..serializers import COURSE_SUMMARY_SCHEMA, json_stream, page_response
+from ..utils import decode_cursor, parse_limit
+from .page import SECTIONS, USER_SECTIONS, build_course_page, course_page_tags, parse_sections
+from .search import search_courses as search
+from .suggest import suggest_courses
+from config import Config
 
 courses_bp = Blueprint('courses', __name__)
 
+DIMENSION_SORT = 'dimension:'
+
+def course_list_tags():
+    # Lists sorted by a rating dimension also change whenever the rankings are refreshed
+    if request.args.get('sort', '').startswith(DIMENSION_SORT):
+        return ['courses', 'rankings']
+    return ['courses']
+
 @courses_bp.route('', methods=['GET'])
+@cached_response(tags=course_list_tags)
 def get_courses():
-    courses = Course.query.all()
-    courses_list = [{
-        'id': course.id,
-        'course_code': course.course_code,
-        'name': course.name,
-        'description': course.description,
-        'created_at': course.created_at.isoformat()
-    } for course in courses]
-    return jsonify(courses_list), 200
+    response_format = request.args.get('format', 'json')
+    if response_format not in ('json', 'ndjson'):
+        return jsonify({'message': 'format must be json or ndjson.'}), 400
+
+    fields = parse_fields(request.args.get('fields'), COURSE_SUMMARY_SCHEMA)
+    if fields is None:
+        return jsonify({'message': f'fields must be a comma-separated subset of {", ".join(COURSE_SUMMARY_SCHEMA.fields)}.'}), 400
+
+    columns = course_columns(fields)
+    criteria, joins = (), ()
+    sort = request.args.get('sort', 'created_at')
+    if sort.startswith(DIMENSION_SORT):
+        dimension = next((dimension for dimension in get_rating_dimensions() if dimension.name == sort[len(DIMENSION_SORT):]), None)
+        if dimension is None:
+            names = ', '.join(DIMENSION_SORT + dimension.name for dimension in get_rating_dimensions())
+            return jsonify({'message': f'Unknown rating dimension; sort by one of {names}.'}), 400
+        # Read in index order from the precomputed rankings, so no page aggregates ratings;
+        # courses nobody has rated on the dimension are not listed
+        keyset = COURSE_RANKING_KEYSET
+        criteria = (CourseRanking.rating_dimension_id == dimension.id,)
+        joins = ((CourseRanking, CourseRanking.course_id == Course.id),)
+        columns = (*columns, CourseRanking.bayesian_average, CourseRanking.vote_count.label('rating_count'))
+    else:
+        keyset = COURSE_KEYSETS.get(sort)
+        if keyset is None:
+            return jsonify({'message': f'sort must be one of {", ".join(COURSE_KEYSETS)} or {DIMENSION_SORT}<name>.'}), 400
+
+    order = request.args.get('order')
+    if order not in (None, 'asc', 'desc'):
+        return jsonify({'message': 'order must be asc or desc.'}), 400
+    if order is not None and (order == 'desc') != keyset.descending:
+        keyset = keyset.reverse()
+
+    ndjson = response_format == 'ndjson'
+
+    if 'limit' not in request.args and 'cursor' not in request.args:
+        # The whole catalog is streamed as it is read, so memory stays flat however many courses there are
+        courses = iter_dicts(columns, *criteria, joins=joins, order_by=keyset.order_by, batch_size=Config.STREAM_BATCH_SIZE)
+        return json_stream(courses, ndjson=ndjson), 200
+
+    limit, after, error = parse_page_args(request.args, keyset, Config.LIST_DEFAULT_LIMIT, Config.LIST_MAX_LIMIT)
+    if error:
+        return jsonify({'message': error}), 400
+
+    courses, next_cursor = fetch_page(columns, keyset, *criteria, joins=joins, limit=limit, after=after)
+    # The total is only estimated for the first page; later pages just follow the cursor
+    total_estimate = None
+    if after is None:
+        total_estimate = estimate_count(CourseRanking.id, *criteria) if criteria else estimate_count(Course.id)
+    return page_response(courses, next_cursor, total_estimate, ndjson), 200
 
 @courses_bp.route('/<int:course_id>', methods=['GET'])
+@cached_response(tags=lambda course_id: [f'course:{course_id}'])
 def get_course(course_id):
-    course = Course.query.get(course_id)
-    if not course:
+    course_data = get_course_detail(course_id)
+    if not course_data:
         return jsonify({'message': 'Resource not found'}), 404
-
-    instructors = [{
-        'course_instructor_id': ci.id,
-        'id': ci.instructor.id,
-        'name': ci.instructor.name,
-        'profile_url': ci.instructor.profile_url,
-        'created_at': ci.instructor.created_at.isoformat()
-    } for ci in course.instructors]
-
-    course_data = {
-        'id': course.id,
-        'course_code': course.course_code,
-        'name': course.name,
-        'unit': course.unit,
-        'description': course.description,
-        'created_at': course.created_at.isoformat(),
-        'instructors': instructors
-    }
     return jsonify(course_data), 200
 
+@courses_bp.route('/<int:course_id>/page', methods=['GET'])
+@jwt_required(optional=True)
+@cached_response(tags=lambda course_id: course_page_tags(course_id, get_jwt_identity()), vary_on_identity=True)
+def get_course_page(course_id):
+    user_id = get_jwt_identity()
+    sections = parse_sections(request.args.get('include'), authenticated=user_id is not None)
+    if sections is None:
+        return jsonify({'message': f'include must be a comma-separated subset of {", ".join(SECTIONS)}.'}), 400
+    if user_id is None and sections & USER_SECTIONS:
+        return jsonify({'message': 'Log in to include my_ratings or following.'}), 401
+
+    # Everything the course page shows in one response, instead of one request per section and instructor
+    page = build_course_page(course_id, sections, user_id)
+    if page is None:
+        return jsonify({'message': 'Resource not found'}), 404
+    return jsonify(page), 200
+
 
 @courses_bp.route('/search', methods=['GET'])
 def search_courses():
-    search_query = request.args.get('q', '').lower()  # Get the search query from the request (default to empty string if not provided)
+    search_query = request.args.get('q', '').strip()  # Get the search query from the request (default to empty string if not provided)
 
     if not search_query:
         return jsonify({'message': 'No search query provided'}), 400
 
-    # Search for courses by matching the keyword against course name, code, or description
-    courses = Course.query.filter(
-        (Course.name.ilike(f'%{search_query}%')) |  # Case-insensitive match for name
-        (Course.course_code.ilike(f'%{search_query}%')) |  # Case-insensitive match for course code
-        (Course.description.ilike(f'%{search_query}%'))  # Case-insensitive match for description
-    ).all()
+    fields = parse_fields(request.args.get('fields'), COURSE_SUMMARY_SCHEMA)
+    if fields is None:
+        return jsonify({'message': f'fields must be a comma-separated subset of {", ".join(COURSE_SUMMARY_SCHEMA.fields)}.'}), 400
+
+    limit = parse_limit(request.args.get('limit'), Config.SEARCH_DEFAULT_LIMIT, Config.SEARCH_MAX_LIMIT)
+    if limit is None:
+        return jsonify({'message': f'limit must be between 1 and {Config.SEARCH_MAX_LIMIT}.'}), 400
+
+    after = None
+    if request.args.get('cursor'):
+        after = decode_cursor(request.args['cursor'], 2)
+        if after is None:
+            return jsonify({'message': 'Invalid cursor.'}), 400
+
+    # Rank matches by relevance; the cursor for the next page is returned in a header
+    course_ids, next_cursor = search(search_query, limit, after)
+    courses = {}
+    if course_ids:
+        for course in fetch_dicts((*course_columns(fields), Course.id.label('_search_id')), Course.id.in_(course_ids)):
+            courses[course.pop('_search_id')] = course
+    courses_list = [courses[course_id] for course_id in course_ids if course_id in courses]
+
+    response = jsonify(courses_list)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
 
-    courses_list = [{
-        'id': course.id,
-        'course_code': course.course_code,
-        'name': course.name,
-        'description': course.description,
-        'created_at': course.created_at.isoformat()
-    } for course in courses]
+@courses_bp.route('/suggest', methods=['GET'])
+def suggest():
+    prefix = request.args.get('prefix', '').strip()
+    if not prefix:
+        return jsonify({'message': 'No prefix provided'}), 400
 
-    return jsonify(courses_list), 200
+    limit = parse_limit(request.args.get('limit'), Config.SUGGEST_DEFAULT_LIMIT, Config.SUGGEST_MAX_LIMIT)
+    if limit is None:
+        return jsonify({'message': f'limit must be between 1 and {Config.SUGGEST_MAX_LIMIT}.'}), 400
 
+    # Served from the in-memory prefix index, without a database query
+    return jsonify(suggest_courses(prefix, limit)), 200
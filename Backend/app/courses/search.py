@@ -0,0 +1,226 @@
+# app/courses/search.py
+import bisect
+import heapq
+import re
+import threading
+import time
+from sqlalchemy import Numeric, and_, case, cast, func, literal_column, or_, select, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from ..models import db, Course
+from ..utils import encode_cursor
+from .listeners import subscribe
+from .refresh import IndexRefresher
+
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Relative weight of a term depending on the field it appears in
+FIELD_WEIGHTS = (('course_code', 3.0), ('name', 2.0), ('description', 1.0))
+# Score multiplier for a query token that only matches the beginning of a term
+PREFIX_MATCH_FACTOR = 0.5
+# Bonus for a query that appears verbatim inside a course code, e.g. "UCUG15"
+CODE_FRAGMENT_BONUS = 1.0
+
+_trigram_support = {}
+
+
+def tokenize(text_value):
+    return TOKEN_PATTERN.findall((text_value or '').lower())
+
+
+def _code_fragment(tokens):
+    """Return the query as a course-code fragment (a single token with a digit, e.g. "ucug15"), else None."""
+    if len(tokens) == 1 and any(char.isdigit() for char in tokens[0]):
+        return tokens[0]
+    return None
+
+
+class InvertedIndex:
+    """
+    In-process inverted index over course codes, names and descriptions.
+
+    Used instead of PostgreSQL full-text search on other backends (SQLite in
+    development and tests). Terms are kept sorted so prefix queries are a
+    bisect, and the index is updated incrementally from committed course changes.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._postings = {}  # term -> {course_id: weight}
+        self._terms = []  # sorted keys of _postings
+        self._documents = {}  # course_id -> (terms, lowercased course code)
+        self.built_at = None
+
+    def build(self, courses):
+        postings = {}
+        documents = {}
+        for course in courses:
+            weights = self._term_weights(course)
+            for term, weight in weights.items():
+                postings.setdefault(term, {})[course['id']] = weight
+            documents[course['id']] = (set(weights), (course['course_code'] or '').lower())
+
+        with self._lock:
+            self._postings = postings
+            self._terms = sorted(postings)
+            self._documents = documents
+            self.built_at = time.monotonic()
+
+    def update(self, changed, deleted_ids):
+        with self._lock:
+            if self.built_at is None:
+                return
+            for course_id in set(changed) | deleted_ids:
+                self._remove(course_id)
+            for course in changed.values():
+                weights = self._term_weights(course)
+                for term, weight in weights.items():
+                    if term not in self._postings:
+                        self._postings[term] = {}
+                        bisect.insort(self._terms, term)
+                    self._postings[term][course['id']] = weight
+                self._documents[course['id']] = (set(weights), (course['course_code'] or '').lower())
+
+    def search(self, tokens, limit, after=None):
+        """Return up to ``limit`` ``(score, course_id)`` pairs matching every token, best first, after ``after``."""
+        with self._lock:
+            scores = None
+            for token in tokens:
+                token_scores = {}
+                start = bisect.bisect_left(self._terms, token)
+                for term in self._terms[start:]:
+                    if not term.startswith(token):
+                        break
+                    factor = 1.0 if term == token else PREFIX_MATCH_FACTOR
+                    for course_id, weight in self._postings[term].items():
+                        token_scores[course_id] = max(token_scores.get(course_id, 0.0), weight * factor)
+                if scores is None:
+                    scores = token_scores
+                else:
+                    scores = {
+                        course_id: score + token_scores[course_id]
+                        for course_id, score in scores.items() if course_id in token_scores
+                    }
+
+            scores = scores or {}
+            fragment = _code_fragment(tokens)
+            if fragment:
+                for course_id, (_, course_code) in self._documents.items():
+                    if fragment in course_code:
+                        scores[course_id] = scores.get(course_id, 0.0) + CODE_FRAGMENT_BONUS
+
+        hits = ((round(score, 6), course_id) for course_id, score in scores.items())
+        if after:
+            after_rank, after_id = after
+            hits = (
+                (score, course_id) for score, course_id in hits
+                if score < after_rank or (score == after_rank and course_id > after_id)
+            )
+        # Partial selection instead of sorting every match
+        return heapq.nsmallest(limit, hits, key=lambda hit: (-hit[0], hit[1]))
+
+    def _remove(self, course_id):
+        document = self._documents.pop(course_id, None)
+        if not document:
+            return
+        for term in document[0]:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(course_id, None)
+            if not postings:
+                del self._postings[term]
+                del self._terms[bisect.bisect_left(self._terms, term)]
+
+    @staticmethod
+    def _term_weights(course):
+        weights = {}
+        for field, weight in FIELD_WEIGHTS:
+            for term in set(tokenize(course[field])):
+                weights[term] = weights.get(term, 0.0) + weight
+        return weights
+
+
+_memory_index = InvertedIndex()
+subscribe(_memory_index.update)
+
+
+def _memory_index_rows():
+    return [row._asdict() for row in db.session.query(Course.id, Course.course_code, Course.name, Course.description)]
+
+
+# Built on first use, and rebuilt once it is older than SEARCH_INDEX_TTL
+_memory_refresher = IndexRefresher(_memory_index, _memory_index_rows)
+
+
+def _has_trigram_support(bind):
+    key = str(bind.url)
+    if key not in _trigram_support:
+        _trigram_support[key] = bool(db.session.execute(
+            text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        ).scalar())
+    return _trigram_support[key]
+
+
+def _search_postgresql(tokens, limit, after):
+    bind = db.session.get_bind(mapper=Course.__mapper__)
+    # Stored, GIN-indexed column created alongside the table on PostgreSQL (see app/models.py)
+    vector = literal_column('courses.search_vector', type_=TSVECTOR)
+    tsquery = func.to_tsquery(literal_column("'simple'::regconfig"), ' & '.join(f'{token}:*' for token in tokens))
+
+    conditions = [vector.op('@@')(tsquery)]
+    code_bonus = literal_column('0')
+    fragment = _code_fragment(tokens)
+    if fragment:
+        # Trigram GIN index serves infix matches; otherwise fall back to an indexable prefix match
+        escaped = fragment.replace('_', '\\_')
+        pattern = f'%{escaped}%' if _has_trigram_support(bind) else f'{escaped}%'
+        code_match = func.lower(Course.course_code).like(pattern, escape='\\')
+        conditions.append(code_match)
+        code_bonus = case((code_match, CODE_FRAGMENT_BONUS), else_=0.0)
+
+    # Round through NUMERIC so the rank survives the round trip through a cursor exactly
+    rank = func.round(cast(func.ts_rank(vector, tsquery) + code_bonus, Numeric), 6)
+    ranked = select(Course.id.label('id'), rank.label('rank')).where(or_(*conditions)).subquery()
+
+    stmt = select(ranked.c.rank, ranked.c.id)
+    if after:
+        after_rank, after_id = after
+        stmt = stmt.where(or_(
+            ranked.c.rank < after_rank,
+            and_(ranked.c.rank == after_rank, ranked.c.id > after_id)
+        ))
+    stmt = stmt.order_by(ranked.c.rank.desc(), ranked.c.id).limit(limit + 1)
+    return [(float(rank_value), course_id) for rank_value, course_id in db.session.execute(stmt)]
+
+
+def _search_memory(tokens, limit, after):
+    return _memory_refresher.ensure().search(tokens, limit + 1, after)
+
+
+def search_courses(query, limit, after=None):
+    """
+    Relevance-ranked course search over code, name and description.
+
+    Uses the PostgreSQL ``tsvector`` GIN index when running on PostgreSQL and
+    the in-process inverted index everywhere else.
+
+    Args:
+        query (str): The user's search text; every word is matched as a prefix.
+        limit (int): The page size.
+        after (list | None): The decoded ``[rank, id]`` cursor of the previous page.
+
+    Returns:
+        tuple: ``(course_ids, next_cursor)`` where ``next_cursor`` is None on the last page.
+    """
+    tokens = tokenize(query)
+    if not tokens:
+        return [], None
+
+    bind = db.session.get_bind(mapper=Course.__mapper__)
+    if bind.dialect.name == 'postgresql':
+        hits = _search_postgresql(tokens, limit, after)
+    else:
+        hits = _search_memory(tokens, limit, after)
+
+    next_cursor = encode_cursor(list(hits[limit - 1])) if len(hits) > limit else None
+    return [course_id for _, course_id in hits[:limit]], next_cursor
@@ -0,0 +1,148 @@
+# app/courses/suggest.py
+import bisect
+import logging
+import sys
+import threading
+import time
+from sqlalchemy.exc import SQLAlchemyError
+from ..models import db, Course
+from .listeners import subscribe
+from .refresh import IndexRefresher
+from .search import tokenize
+
+logger = logging.getLogger(__name__)
+
+
+class PrefixIndex:
+    """
+    In-memory typeahead index over course codes and names.
+
+    Keeps three sorted arrays of ``(key, course_id)``: compact course codes,
+    full lowercased names and individual name tokens. A lookup is a bisect into
+    each array followed by a scan that stops after ``limit`` distinct courses,
+    so it never touches the database and costs O(log n + limit).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._codes = []
+        self._names = []
+        self._tokens = []
+        self._courses = {}  # course_id -> (course_code, name)
+        self.built_at = None
+
+    def build(self, courses):
+        codes, names, tokens, payloads = [], [], [], {}
+        for course in courses:
+            course_codes, course_names, course_tokens = self._keys(course)
+            codes.extend((key, course['id']) for key in course_codes)
+            names.extend((key, course['id']) for key in course_names)
+            tokens.extend((key, course['id']) for key in course_tokens)
+            payloads[course['id']] = self._payload(course)
+        codes.sort()
+        names.sort()
+        tokens.sort()
+
+        with self._lock:
+            self._codes, self._names, self._tokens, self._courses = codes, names, tokens, payloads
+            self.built_at = time.monotonic()
+
+    def update(self, changed, deleted_ids):
+        with self._lock:
+            if self.built_at is None:
+                return
+            for course_id in set(changed) | deleted_ids:
+                self._remove(course_id)
+            for course in changed.values():
+                course_codes, course_names, course_tokens = self._keys(course)
+                for array, keys in ((self._codes, course_codes), (self._names, course_names), (self._tokens, course_tokens)):
+                    for key in keys:
+                        bisect.insort(array, (key, course['id']))
+                self._courses[course['id']] = self._payload(course)
+
+    def suggest(self, prefix, limit):
+        """Return up to ``limit`` course payloads: code matches first, then name and name-word matches."""
+        normalized = ' '.join(tokenize(prefix))
+        if not normalized:
+            return []
+
+        results = []
+        seen = set()
+        with self._lock:
+            for array, key in (
+                (self._codes, normalized.replace(' ', '')),
+                (self._names, normalized),
+                (self._tokens, normalized)
+            ):
+                index = bisect.bisect_left(array, (key,))
+                while index < len(array) and len(results) < limit:
+                    entry_key, course_id = array[index]
+                    if not entry_key.startswith(key):
+                        break
+                    if course_id not in seen:
+                        seen.add(course_id)
+                        course_code, name = self._courses[course_id]
+                        results.append({'id': course_id, 'course_code': course_code, 'name': name})
+                    index += 1
+                if len(results) >= limit:
+                    break
+        return results
+
+    def __len__(self):
+        return len(self._courses)
+
+    def _remove(self, course_id):
+        entry = self._courses.pop(course_id, None)
+        if entry is None:
+            return
+        course_codes, course_names, course_tokens = self._keys({'course_code': entry[0], 'name': entry[1]})
+        for array, keys in ((self._codes, course_codes), (self._names, course_names), (self._tokens, course_tokens)):
+            for key in keys:
+                index = bisect.bisect_left(array, (key, course_id))
+                if index < len(array) and array[index] == (key, course_id):
+                    del array[index]
+
+    @staticmethod
+    def _keys(course):
+        name_tokens = tokenize(course['name'])
+        return (
+            [''.join(tokenize(course['course_code']))],
+            [' '.join(name_tokens)] if name_tokens else [],
+            # Interned, so a word shared by many course names is stored once
+            sorted({sys.intern(token) for token in name_tokens})
+        )
+
+    @staticmethod
+    def _payload(course):
+        return course['course_code'], course['name']
+
+
+suggestion_index = PrefixIndex()
+subscribe(suggestion_index.update)
+
+
+def _suggestion_rows():
+    return [row._asdict() for row in db.session.query(Course.id, Course.course_code, Course.name)]
+
+
+_refresher = IndexRefresher(suggestion_index, _suggestion_rows)
+
+
+def build_suggestion_index():
+    """(Re)build the typeahead index from the ``courses`` table; must run inside an app context."""
+    _refresher.rebuild()
+
+
+def warm_suggestion_index(app):
+    """Build the typeahead index at startup; if the database is not ready yet, it is built on first use instead."""
+    with app.app_context():
+        try:
+            build_suggestion_index()
+        except SQLAlchemyError as error:
+            logger.warning('Course suggestion index not built at startup: %s', error)
+        finally:
+            db.session.remove()
+
+
+def suggest_courses(prefix, limit):
+    return _refresher.ensure().suggest(prefix, limit)
@@ -0,0 +1,237 @@
+# app/database.py
+import itertools
+import logging
+from collections import Counter
+from flask import current_app, g, has_request_context, request
+from flask_jwt_extended import get_jwt_identity, verify_jwt_in_request
+from flask_jwt_extended.exceptions import JWTExtendedException
+from flask_sqlalchemy.session import Session
+from jwt import PyJWTError
+from sqlalchemy import event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.sql.dml import UpdateBase
+
+logger = logging.getLogger(__name__)
+
+# Pool arguments only a queue pool accepts; in-memory SQLite databases use one static connection instead
+QUEUE_POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout')
+# Blueprints whose GET handlers may read from a replica
+REPLICA_BLUEPRINTS = {'courses', 'instructors', 'ratings', 'comments'}
+REPLICA_BIND_PREFIX = 'replica_'
+
+_replica_counter = itertools.count()
+
+
+class ConnectionBudgetExceeded(Exception):
+    """Raised when the workers' pools could together open more connections than the database allows."""
+
+
+class RoutingSession(Session):
+    """
+    Session that sends the reads of replica-routed requests to a read replica.
+
+    Which requests are routed is decided by ``request_replica``. Flushes and
+    INSERT, UPDATE and DELETE statements always go to the primary, so a GET
+    handler that writes still works; it just pays for a second connection.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and not isinstance(clause, UpdateBase):
+            replica = request_replica()
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _record_user_write(session):
+    # The user's next reads must see this commit, so they go to the primary for a while
+    if has_request_context() and current_app.extensions.get('database_replicas'):
+        identity = _request_identity()
+        if identity is not None:
+            from .response_cache import response_cache
+
+            response_cache.record_writes(f'user:{identity}')
+
+
+def use_primary(view):
+    """Keep a GET handler on the primary, for pages that show the caller their own recent writes."""
+    view.use_primary = True
+    return view
+
+
+def request_replica():
+    """
+    The replica engine the current request reads from, or None for the primary.
+
+    Decided on the request's first query and kept for the rest of it, so all of
+    its reads see one consistent snapshot, unless ``tag_response`` later adds a
+    tag that was written recently (see ``leave_replica_if_written``). A request
+    reads from a replica when:
+      - it is a GET or HEAD to one of ``REPLICA_BLUEPRINTS`` and replicas are configured;
+      - its handler is not marked ``use_primary``;
+      - its user has not committed a write within ``DATABASE_REPLICA_PIN_SECONDS``;
+      - none of the response cache tags it renders were invalidated within that
+        time, so a lagging replica cannot refill a fresh entry with old data.
+    Replicas take turns, round robin, request by request.
+    """
+    if not has_request_context():
+        return None
+    if 'database_replica' not in g:
+        g.database_replica = None
+        g.database_replica = _choose_replica()
+    return g.database_replica
+
+
+def leave_replica_if_written(tags):
+    """
+    Send the rest of the request to the primary if it reads from a replica and any of ``tags`` was written recently.
+
+    For tags a view only knows once it has run some queries, such as the
+    course-instructor pair behind a URL; the replica was chosen without them.
+    """
+    if has_request_context() and g.get('database_replica') is not None:
+        from .response_cache import response_cache
+
+        if response_cache.written_recently(list(tags)):
+            g.database_replica = None
+
+
+def _choose_replica():
+    keys = current_app.extensions.get('database_replicas')
+    if not keys or request.method not in ('GET', 'HEAD') or request.blueprint not in REPLICA_BLUEPRINTS:
+        return None
+    view = current_app.view_functions.get(request.endpoint)
+    if getattr(view, 'use_primary', False):
+        return None
+
+    from .models import db
+    from .response_cache import response_cache
+
+    written = list(g.get('response_cache_tags') or ())
+    identity = _request_identity()
+    if identity is not None:
+        written.append(f'user:{identity}')
+    if response_cache.written_recently(written):
+        return None
+    return db.engines[keys[next(_replica_counter) % len(keys)]]
+
+
+def _request_identity():
+    """JWT identity of the current request, read from its token even on routes without ``jwt_required``."""
+    try:
+        verify_jwt_in_request(optional=True)
+        return get_jwt_identity()
+    except (JWTExtendedException, PyJWTError):
+        return None
+
+
+def init_replicas(app):
+    """
+    Register ``DATABASE_REPLICA_URLS`` as the ``replica_<n>`` binds, before ``db.init_app``.
+
+    Every replica gets its own engine with the same pool options as the primary.
+    """
+    urls = app.config['DATABASE_REPLICA_URLS']
+    binds = dict(app.config.get('SQLALCHEMY_BINDS') or {})
+    for index, url in enumerate(urls):
+        binds[f'{REPLICA_BIND_PREFIX}{index}'] = dict(
+            engine_options(url, app.config['SQLALCHEMY_ENGINE_OPTIONS']), url=url
+        )
+    app.config['SQLALCHEMY_BINDS'] = binds
+    app.extensions['database_replicas'] = [f'{REPLICA_BIND_PREFIX}{index}' for index in range(len(urls))]
+    if urls:
+        from .response_cache import response_cache
+
+        response_cache.write_window = app.config['DATABASE_REPLICA_PIN_SECONDS']
+
+
+def engine_options(database_url, options):
+    """Return the ``SQLALCHEMY_ENGINE_OPTIONS`` that apply to ``database_url``."""
+    url = make_url(database_url)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return {name: value for name, value in options.items() if name not in QUEUE_POOL_OPTIONS}
+    return options
+
+
+def connection_budget(engine, reserved):
+    """
+    Connections the app may open on a PostgreSQL server.
+
+    Args:
+        engine (Engine): Engine connected to the server.
+        reserved (int): Connections to leave for other clients.
+
+    Returns:
+        int | None: ``max_connections`` minus the superuser-reserved, reserved
+        and ``reserved`` connections, or None for other databases.
+    """
+    if engine.dialect.name != 'postgresql':
+        return None
+    with engine.connect() as connection:
+        max_connections, superuser_reserved, role_reserved = connection.execute(text(
+            "SELECT current_setting('max_connections')::int, "
+            "current_setting('superuser_reserved_connections')::int, "
+            "coalesce(current_setting('reserved_connections', true), '0')::int"
+        )).one()
+    return max_connections - superuser_reserved - role_reserved - reserved
+
+
+def check_connection_budget(app, workers, threads):
+    """
+    Make sure ``workers`` processes, each with full pools, fit in every database server's connection budget.
+
+    Every worker owns a pool per engine (the primary and each replica) of
+    ``DATABASE_POOL_SIZE`` connections that can grow by ``DATABASE_MAX_OVERFLOW``, so
+    together they may open ``workers * (size + overflow)`` per engine on its server.
+    A pool smaller than the worker's thread count only makes threads queue for a
+    connection, which is logged rather than refused.
+
+    Raises:
+        ConnectionBudgetExceeded: If the pools could exhaust a server's connections.
+    """
+    from .models import db
+
+    per_worker = app.config['DATABASE_POOL_SIZE'] + app.config['DATABASE_MAX_OVERFLOW']
+    if per_worker < threads:
+        logger.warning(
+            'Each worker runs %d threads but its pool holds at most %d connections; '
+            'threads will wait for a connection under load', threads, per_worker
+        )
+    with app.app_context():
+        engines = list(db.engines.values())
+    # Engines pointing at the same server share its budget
+    servers = Counter((engine.url.host, engine.url.port) for engine in engines)
+    checked = set()
+    for engine in engines:
+        server = (engine.url.host, engine.url.port)
+        if server in checked:
+            continue
+        checked.add(server)
+        budget = connection_budget(engine, app.config['DATABASE_RESERVED_CONNECTIONS'])
+        if budget is None:
+            continue
+        needed = workers * per_worker * servers[server]
+        if needed > budget:
+            raise ConnectionBudgetExceeded(
+                f'{workers} workers x {servers[server]} pool(s) x ({app.config["DATABASE_POOL_SIZE"]} pooled + '
+                f'{app.config["DATABASE_MAX_OVERFLOW"]} overflow) connections = {needed} on '
+                f'{engine.url.render_as_string(hide_password=True)}, but it allows {budget} after reserved connections. '
+                'Lower WEB_WORKERS, DATABASE_POOL_SIZE or DATABASE_MAX_OVERFLOW, or raise max_connections.'
+            )
+        logger.info('Database connections on %s: %d of %d available used at most',
+                    engine.url.render_as_string(hide_password=True), needed, budget)
+
+
+def dispose_engines(app, close=True):
+    """
+    Drop the pooled connections of every engine.
+
+    After a fork, pass ``close=False``: the connections belong to the parent, so the
+    child forgets them without closing the sockets the parent still uses.
+    """
+    from .models import db
+
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=close)
@@ -3,6 +3,7 @@ from flask import Blueprint, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..models import db, Follow, Course
 from sqlalchemy.exc import IntegrityError
+from ..response_cache import response_cache
 
 follows_bp = Blueprint('follows', __name__)
 
@@ -22,6 +23,7 @@ def follow_course(course_id):
     try:
         db.session.add(new_follow)
         db.session.commit()
+        response_cache.invalidate(f'user:{user_id}:follows')
         return jsonify({'message': 'Course followed successfully.'}), 200
     except IntegrityError:
         db.session.rollback()
@@ -38,6 +40,7 @@ def unfollow_course(course_id):
     try:
         db.session.delete(follow)
         db.session.commit()
+        response_cache.invalidate(f'user:{user_id}:follows')
         return jsonify({'message': 'Course unfollowed successfully.'}), 200
     except:
         db.session.rollback()
@@ -1,30 +1,38 @@
 # app/instructors/routes.py
 from flask import Blueprint, jsonify, request
-from ..models import db, Instructor, CourseInstructor, Course
-from flask_jwt_extended import jwt_required
+from ..models import Instructor
+from ..queries import (
+    INSTRUCTOR_KEYSET, estimate_count, fetch_page, get_instructor_detail, parse_fields, parse_page_args, schema_columns
+)
+from ..response_cache import cached_response
+from ..serializers import INSTRUCTOR_SCHEMA, page_response
+from config import Config
 
 instructors_bp = Blueprint('instructors', __name__)
 
+@instructors_bp.route('', methods=['GET'])
+@cached_response(tags=lambda: ['instructors'])
+def get_instructors():
+    fields = parse_fields(request.args.get('fields'), INSTRUCTOR_SCHEMA)
+    if fields is None:
+        return jsonify({'message': f'fields must be a comma-separated subset of {", ".join(INSTRUCTOR_SCHEMA.fields)}.'}), 400
+
+    limit, after, error = parse_page_args(request.args, INSTRUCTOR_KEYSET, Config.LIST_DEFAULT_LIMIT, Config.LIST_MAX_LIMIT)
+    if error:
+        return jsonify({'message': error}), 400
+
+    # Alphabetical by name; the total is only estimated for the first page
+    instructors, next_cursor = fetch_page(
+        schema_columns(Instructor, INSTRUCTOR_SCHEMA.only(*fields)), INSTRUCTOR_KEYSET, limit=limit, after=after
+    )
+    total_estimate = estimate_count(Instructor.id) if after is None else None
+    return page_response(instructors, next_cursor, total_estimate), 200
+
 @instructors_bp.route('/<int:instructor_id>', methods=['GET'])
+@cached_response(tags=lambda instructor_id: [f'instructor:{instructor_id}', 'courses'])
 def get_instructor(instructor_id):
-    instructor = Instructor.query.get(instructor_id)
-    if not instructor:
+    instructor_data = get_instructor_detail(instructor_id)
+    if not instructor_data:
         return jsonify({'message': 'Resource not found'}), 404
-
-    courses = [{
-        'id': ci.course.id,
-        'course_code': ci.course.course_code,
-        'name': ci.course.name,
-        'description': ci.course.description,
-        'created_at': ci.course.created_at.isoformat()
-    } for ci in instructor.courses]
-
-    instructor_data = {
-        'id': instructor.id,
-        'name': instructor.name,
-        'profile_url': instructor.profile_url,
-        'created_at': instructor.created_at.isoformat(),
-        'courses': courses
-    }
     return jsonify(instructor_data), 200
 
@@ -0,0 +1,124 @@
+# app/instrumentation.py
+import logging
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from flask import g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+# Collapses expanded IN lists and multi-row VALUES so statements differing only in length share a shape
+_REPEATED_PARAMS = re.compile(r'(?:\?|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%\(\w+\)s|:\w+))+')
+_REPEATED_ROWS = re.compile(r'(\([^()]*\))(?:\s*,\s*\([^()]*\))+')
+
+
+def statement_shape(statement):
+    """Normalize a SQL statement so repeats of the same query with different parameters compare equal."""
+    shape = _REPEATED_PARAMS.sub('?, ...', statement)
+    shape = _REPEATED_ROWS.sub(r'\1, ...', shape)
+    return ' '.join(shape.split())
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started_at', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _record_query(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started_at'].pop()
+    if has_request_context() and 'query_shapes' in g:
+        g.query_count += 1
+        g.query_time += time.perf_counter() - started
+        g.query_shapes[statement_shape(statement)] += 1
+
+
+@event.listens_for(Engine, 'handle_error')
+def _discard_query_timer(exception_context):
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('query_started_at'):
+        connection.info['query_started_at'].pop()
+
+
+def init_instrumentation(app):
+    """
+    Record the SQL each request runs: statement count, total database time and repeated statement shapes.
+
+    When ``app.debug`` or ``SERVER_TIMING_ENABLED`` is set, the figures are sent back as
+    ``X-Query-Count`` and ``Server-Timing`` headers. Requests over ``SQL_WARN_QUERY_COUNT``
+    statements or ``SQL_WARN_DB_TIME_MS`` of database time, or repeating one statement
+    shape ``SQL_WARN_REPEATED_STATEMENTS`` times (the usual sign of an N+1 lazy load),
+    are logged as warnings.
+    """
+
+    @app.before_request
+    def reset_query_count():
+        g.request_started_at = time.perf_counter()
+        g.query_count = 0
+        g.query_time = 0.0
+        g.query_shapes = Counter()
+
+    @app.after_request
+    def add_query_count_header(response):
+        if 'query_shapes' not in g:
+            return response
+        total_ms = (time.perf_counter() - g.request_started_at) * 1000
+        db_ms = g.query_time * 1000
+        repeated = [(shape, count) for shape, count in g.query_shapes.most_common()
+                    if count >= app.config['SQL_WARN_REPEATED_STATEMENTS']]
+
+        if app.debug or app.config['SERVER_TIMING_ENABLED']:
+            response.headers['X-Query-Count'] = str(g.query_count)
+            response.headers['Server-Timing'] = (
+                f'db;dur={db_ms:.1f};desc="{g.query_count} queries", app;dur={total_ms:.1f}'
+            )
+
+        if g.query_count > app.config['SQL_WARN_QUERY_COUNT'] or db_ms > app.config['SQL_WARN_DB_TIME_MS']:
+            logger.warning('%s %s ran %d SQL statements taking %.1f ms',
+                           request.method, request.path, g.query_count, db_ms)
+        for shape, count in repeated:
+            logger.warning('%s %s repeated a statement %d times (possible N+1): %s',
+                           request.method, request.path, count, shape[:300])
+        return response
+
+
+@contextmanager
+def count_queries():
+    """
+    Count the SQL statements run inside the block, e.g. around test client calls.
+
+    Yields:
+        Counter: Statement shapes mapped to how often each ran; ``sum(counter.values())`` is the total.
+    """
+    shapes = Counter()
+
+    def _count(conn, cursor, statement, *args):
+        shapes[statement_shape(statement)] += 1
+
+    event.listen(Engine, 'after_cursor_execute', _count)
+    try:
+        yield shapes
+    finally:
+        event.remove(Engine, 'after_cursor_execute', _count)
+
+
+def assert_max_queries(client, url, max_queries, method='GET', **kwargs):
+    """
+    Request ``url`` through a Flask test client and fail if it ran more than ``max_queries`` statements.
+
+    Meant for pytest, e.g. ``assert_max_queries(client, '/v1/api/courses/1', 3)``.
+
+    Returns:
+        The test client response.
+    """
+    with count_queries() as shapes:
+        response = client.open(url, method=method, **kwargs)
+    total = sum(shapes.values())
+    assert total <= max_queries, (
+        f'{method} {url} ran {total} SQL statements, more than the {max_queries} allowed:\n'
+        + '\n'.join(f'  {count} x {shape}' for shape, count in shapes.most_common())
+    )
+    return response
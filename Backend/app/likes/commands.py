@@ -0,0 +1,22 @@
+# app/likes/commands.py
+import click
+from flask.cli import AppGroup
+from .counters import reconcile_like_counts
+
+likes_cli = AppGroup('likes', help='Maintenance commands for likes.')
+
+@likes_cli.command('reconcile')
+@click.option('--check', is_flag=True, help='Only report drift, do not repair it.')
+def reconcile_command(check):
+    """Detect and repair drift between comments.like_count and the likes table."""
+    drifted = reconcile_like_counts(check_only=check)
+
+    for comment_id, stored, actual in drifted:
+        click.echo(f'Comment {comment_id}: like_count={stored}, likes={actual}')
+
+    if check:
+        click.echo(f'{len(drifted)} drifted comment(s) found.')
+        if drifted:
+            raise SystemExit(1)
+    else:
+        click.echo(f'Repaired {len(drifted)} drifted comment(s).')
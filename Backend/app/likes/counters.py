@@ -0,0 +1,58 @@
+# app/likes/counters.py
+from sqlalchemy import func, select, update
+from ..models import db, Comment, Like
+
+
+def adjust_like_count(comment_id, delta):
+    """
+    Atomically add ``delta`` to a comment's ``like_count`` and return the new value.
+
+    Runs in the caller's transaction as a relative ``UPDATE ... RETURNING``, so
+    concurrent likes never lose increments.
+    """
+    return db.session.execute(
+        update(Comment)
+        .where(Comment.id == comment_id)
+        .values(like_count=Comment.like_count + delta)
+        .returning(Comment.like_count)
+        .execution_options(synchronize_session=False)
+    ).scalar()
+
+
+def _actual_like_counts():
+    return (
+        select(Like.comment_id, func.count(Like.id).label('actual'))
+        .group_by(Like.comment_id)
+        .subquery()
+    )
+
+
+def reconcile_like_counts(check_only=False):
+    """
+    Compare every comment's ``like_count`` with the ``likes`` table and, unless
+    ``check_only`` is set, repair the comments that drifted.
+
+    Returns:
+        list: ``(comment_id, stored, actual)`` tuples for every drifted comment.
+    """
+    actual_counts = _actual_like_counts()
+    actual = func.coalesce(actual_counts.c.actual, 0)
+    drifted = db.session.execute(
+        select(Comment.id, Comment.like_count, actual)
+        .outerjoin(actual_counts, actual_counts.c.comment_id == Comment.id)
+        .where(Comment.like_count != actual)
+        .order_by(Comment.id)
+    ).all()
+
+    if drifted and not check_only:
+        for comment_id, _, _ in drifted:
+            # Recount inside the UPDATE so likes that arrived since the check are included
+            db.session.execute(
+                update(Comment)
+                .where(Comment.id == comment_id)
+                .values(like_count=select(func.count(Like.id)).where(Like.comment_id == comment_id).scalar_subquery())
+                .execution_options(synchronize_session=False)
+            )
+        db.session.commit()
+
+    return [tuple(row) for row in drifted]
@@ -2,7 +2,10 @@
 from flask import Blueprint, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..models import db, Like, Comment
+from sqlalchemy import delete
 from sqlalchemy.exc import IntegrityError
+from ..response_cache import response_cache, target_tag
+from .counters import adjust_like_count
 
 likes_bp = Blueprint('likes', __name__)
 
@@ -14,15 +17,19 @@ def like_comment(comment_id):
     if not comment:
         return jsonify({'message': 'Comment not found.'}), 404
 
-    existing_like = Like.query.filter_by(user_id=user_id, comment_id=comment_id).first()
-    if existing_like:
-        return jsonify({'message': 'Already liked.'}), 400
-
+    # The unique constraint on (user_id, comment_id) rejects duplicate likes, even concurrent ones
     new_like = Like(user_id=user_id, comment_id=comment_id)
     try:
         db.session.add(new_like)
+        db.session.flush()
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify({'message': 'Already liked.'}), 400
+
+    try:
+        like_count = adjust_like_count(comment_id, 1)
         db.session.commit()
-        like_count = Like.query.filter_by(comment_id=comment_id).count()
+        response_cache.invalidate(target_tag('comments', comment.course_id, comment.course_instructor_id))
         return jsonify({'like_count': like_count}), 200
     except IntegrityError:
         db.session.rollback()
@@ -32,17 +39,19 @@ def like_comment(comment_id):
 @jwt_required()
 def unlike_comment(comment_id):
     user_id = get_jwt_identity()
-    like = Like.query.filter_by(user_id=user_id, comment_id=comment_id).first()
-    if not like:
+    result = db.session.execute(
+        delete(Like).where(Like.user_id == user_id, Like.comment_id == comment_id)
+    )
+    if result.rowcount == 0:
+        db.session.rollback()
         return jsonify({'message': 'Like not found.'}), 404
 
     try:
-        db.session.delete(like)
+        like_count = adjust_like_count(comment_id, -1)
+        target = db.session.query(Comment.course_id, Comment.course_instructor_id).filter_by(id=comment_id).one()
         db.session.commit()
-        like_count = Like.query.filter_by(comment_id=comment_id).count()
+        response_cache.invalidate(target_tag('comments', *target))
         return jsonify({'like_count': like_count}), 200
     except:
         db.session.rollback()
         return jsonify({'message': 'Failed to unlike comment.'}), 400
-
-
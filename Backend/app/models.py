@@ -1,9 +1,10 @@
 # app/models.py
 from flask_sqlalchemy import SQLAlchemy
 from datetime import datetime
-from sqlalchemy import CheckConstraint, UniqueConstraint, func
+from sqlalchemy import DDL, CheckConstraint, Index, UniqueConstraint, event, func
+from .database import RoutingSession
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
 class User(db.Model):
     __tablename__ = 'users'
@@ -32,6 +33,33 @@ class Course(db.Model):
     comments = db.relationship('Comment', backref='course', lazy=True)
     follows = db.relationship('Follow', backref='course', lazy=True)
 
+    __table_args__ = (
+        # Serves course-code prefix matches when pg_trgm is not installed
+        Index(
+            'ix_courses_course_code_lower_pattern',
+            func.lower(course_code).label('course_code_lower'),
+            postgresql_ops={'course_code_lower': 'text_pattern_ops'}
+        ).ddl_if(dialect='postgresql'),
+        # Keyset pagination of GET /courses in creation order
+        Index('ix_courses_created_at_id', 'created_at', 'id'),
+    )
+
+# Weighted full-text document of a course, used by course search on PostgreSQL
+COURSE_SEARCH_VECTOR_SQL = (
+    "setweight(to_tsvector('simple', coalesce(course_code, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(description, '')), 'C')"
+)
+
+# The stored search_vector column only exists on PostgreSQL and is deliberately
+# left unmapped, so the model stays portable to SQLite.
+event.listen(Course.__table__, 'after_create', DDL(
+    f'ALTER TABLE courses ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({COURSE_SEARCH_VECTOR_SQL}) STORED'
+).execute_if(dialect='postgresql'))
+event.listen(Course.__table__, 'after_create', DDL(
+    'CREATE INDEX ix_courses_search_vector ON courses USING gin (search_vector)'
+).execute_if(dialect='postgresql'))
+
 class Instructor(db.Model):
     __tablename__ = 'instructors'
     id = db.Column(db.Integer, primary_key=True)
@@ -42,6 +70,9 @@ class Instructor(db.Model):
     courses = db.relationship('CourseInstructor', backref='instructor', lazy=True)
     # ratings = db.relationship('Rating', backref='instructor', lazy=True)
 
+    # Keyset pagination of GET /instructors by name
+    __table_args__ = (Index('ix_instructors_name_id', 'name', 'id'),)
+
 class CourseInstructor(db.Model):
     __tablename__ = 'course_instructors'
     id = db.Column(db.Integer, primary_key=True)
@@ -50,7 +81,11 @@ class CourseInstructor(db.Model):
     semester = db.Column(db.String(255))
     created_at = db.Column(db.DateTime, default=func.now())
 
-    __table_args__ = (UniqueConstraint('course_id', 'instructor_id', 'semester', name='_course_instructor_semester_uc'),)
+    __table_args__ = (
+        UniqueConstraint('course_id', 'instructor_id', 'semester', name='_course_instructor_semester_uc'),
+        # An instructor's offerings, for their profile and ratings rollup; the constraint above leads with course_id
+        Index('ix_course_instructors_instructor_id', 'instructor_id'),
+    )
 
     ratings = db.relationship('Rating', backref='course_instructor', lazy=True)
     comments = db.relationship('Comment', backref='course_instructor', lazy=True)
@@ -63,6 +98,7 @@ class RatingDimension(db.Model):
     created_at = db.Column(db.DateTime, default=func.now())
 
     ratings = db.relationship('Rating', backref='rating_dimension', lazy=True)
+    aggregates = db.relationship('RatingAggregate', backref='rating_dimension', lazy=True)
 
 class Rating(db.Model):
     __tablename__ = 'ratings'
@@ -75,6 +111,9 @@ class Rating(db.Model):
     created_at = db.Column(db.DateTime, default=func.now())
 
     __table_args__ = (
+        # One rating per user, dimension and target; NULLs never collide, so each constraint covers one kind of target
+        UniqueConstraint('user_id', 'rating_dimension_id', 'course_id', name='_user_dimension_course_rating_uc'),
+        UniqueConstraint('user_id', 'rating_dimension_id', 'course_instructor_id', name='_user_dimension_course_instructor_rating_uc'),
         CheckConstraint('score >= 1 AND score <= 5', name='check_score_range'),
         # Enforce that either course_id or course_instructor_id is present, but not both
         CheckConstraint(
@@ -83,6 +122,69 @@ class Rating(db.Model):
         ),
     )
 
+class RatingAggregate(db.Model):
+    """Running totals of ``ratings`` per target and dimension, kept in step by ``submit_rating``."""
+    __tablename__ = 'rating_aggregates'
+    id = db.Column(db.Integer, primary_key=True)
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.id', ondelete='CASCADE'), nullable=True)
+    course_instructor_id = db.Column(db.Integer, db.ForeignKey('course_instructors.id', ondelete='CASCADE'), nullable=True)
+    rating_dimension_id = db.Column(db.Integer, db.ForeignKey('rating_dimensions.id', ondelete='CASCADE'), nullable=False)
+    score_sum = db.Column(db.Integer, nullable=False, default=0)
+    score_count = db.Column(db.Integer, nullable=False, default=0)
+    # Histogram of scores 1-5
+    count_1 = db.Column(db.Integer, nullable=False, default=0)
+    count_2 = db.Column(db.Integer, nullable=False, default=0)
+    count_3 = db.Column(db.Integer, nullable=False, default=0)
+    count_4 = db.Column(db.Integer, nullable=False, default=0)
+    count_5 = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        # NULLs never collide in a unique index, so each constraint only covers its own kind of target
+        UniqueConstraint('course_id', 'rating_dimension_id', name='_aggregate_course_dimension_uc'),
+        UniqueConstraint('course_instructor_id', 'rating_dimension_id', name='_aggregate_course_instructor_dimension_uc'),
+        CheckConstraint(
+            '(course_id IS NOT NULL AND course_instructor_id IS NULL) OR (course_id IS NULL AND course_instructor_id IS NOT NULL)',
+            name='check_aggregate_course_or_instructor'
+        ),
+        # Lets `flask ratings refresh-rankings` read only the aggregates changed since its last run
+        Index('ix_rating_aggregates_updated_at', 'updated_at'),
+    )
+
+class CourseRanking(db.Model):
+    """
+    A course's Bayesian-smoothed average per rating dimension, precomputed by
+    ``flask ratings refresh-rankings`` for the dimension-sorted course list.
+    """
+    __tablename__ = 'course_rankings'
+    id = db.Column(db.Integer, primary_key=True)
+    course_id = db.Column(db.Integer, db.ForeignKey('courses.id', ondelete='CASCADE'), nullable=False)
+    rating_dimension_id = db.Column(db.Integer, db.ForeignKey('rating_dimensions.id', ondelete='CASCADE'), nullable=False)
+    # Copies of the course's rating_aggregates totals the average was computed from
+    score_sum = db.Column(db.Integer, nullable=False)
+    vote_count = db.Column(db.Integer, nullable=False)
+    bayesian_average = db.Column(db.Float, nullable=False)
+    updated_at = db.Column(db.DateTime, default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        UniqueConstraint('course_id', 'rating_dimension_id', name='_ranking_course_dimension_uc'),
+        # Matches the ORDER BY of GET /courses?sort=dimension:<name>, in either direction
+        Index('ix_course_rankings_dimension_average_course', 'rating_dimension_id', 'bayesian_average', 'course_id'),
+    )
+
+class CourseRankingState(db.Model):
+    """Per-dimension totals and refresh watermark of ``course_rankings``."""
+    __tablename__ = 'course_ranking_state'
+    rating_dimension_id = db.Column(db.Integer, db.ForeignKey('rating_dimensions.id', ondelete='CASCADE'), primary_key=True)
+    # Totals over every ranked course, whose mean is the prior the averages shrink towards
+    score_sum = db.Column(db.BigInteger, nullable=False, default=0)
+    vote_count = db.Column(db.BigInteger, nullable=False, default=0)
+    # The prior the stored averages were computed with; None until the dimension has ratings
+    prior_mean = db.Column(db.Float, nullable=True)
+    # Latest rating_aggregates.updated_at folded in
+    refreshed_through = db.Column(db.DateTime, nullable=True)
+    refreshed_at = db.Column(db.DateTime, default=func.now(), onupdate=func.now())
+
 class Comment(db.Model):
     __tablename__ = 'comments'
     id = db.Column(db.Integer, primary_key=True)
@@ -91,6 +193,8 @@ class Comment(db.Model):
     course_instructor_id = db.Column(db.Integer, db.ForeignKey('course_instructors.id', ondelete='CASCADE'), nullable=True)
     parent_comment_id = db.Column(db.Integer, db.ForeignKey('comments.id', ondelete='CASCADE'), nullable=True)
     content = db.Column(db.Text, nullable=False)
+    # Denormalized count of likes, kept in step by the likes routes
+    like_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')
     created_at = db.Column(db.DateTime, default=func.now())
 
     children = db.relationship('Comment', backref=db.backref('parent', remote_side=[id]), lazy=True)
@@ -101,6 +205,13 @@ class Comment(db.Model):
             '(course_id IS NOT NULL AND course_instructor_id IS NULL) OR (course_id IS NULL AND course_instructor_id IS NOT NULL)',
             name='check_comment_course_or_instructor'
         ),
+        # Thread pages (top-level comments, parent_comment_id IS NULL) and replies per parent, oldest first
+        Index('ix_comments_course_parent_created_at_id', 'course_id', 'parent_comment_id', 'created_at', 'id'),
+        Index(
+            'ix_comments_course_instructor_parent_created_at_id',
+            'course_instructor_id', 'parent_comment_id', 'created_at', 'id'
+        ),
+        Index('ix_comments_parent_created_at_id', 'parent_comment_id', 'created_at', 'id'),
     )
 
 class Like(db.Model):
@@ -119,5 +230,16 @@ class Follow(db.Model):
     course_id = db.Column(db.Integer, db.ForeignKey('courses.id', ondelete='CASCADE'), nullable=False)
     created_at = db.Column(db.DateTime, default=func.now())
 
-    __table_args__ = (UniqueConstraint('user_id', 'course_id', name='_user_course_follow_uc'),)
+    __table_args__ = (
+        UniqueConstraint('user_id', 'course_id', name='_user_course_follow_uc'),
+        # Keyset pagination of a user's followed courses in the order they were followed
+        Index('ix_follows_user_created_at_id', 'user_id', 'created_at', 'id'),
+    )
+
 
+class ReferenceVersion(db.Model):
+    """Change counter per reference dataset, so every worker's reference cache notices writes made elsewhere."""
+    __tablename__ = 'reference_versions'
+    name = db.Column(db.String(64), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=func.now(), onupdate=func.now())
@@ -0,0 +1,18 @@
+# app/ops/routes.py
+from flask import Blueprint, jsonify
+from ..auth.hunter import hunter_client
+from ..auth.passwords import password_hasher
+from ..reference_cache import reference_cache
+from ..response_cache import response_cache
+
+ops_bp = Blueprint('ops', __name__)
+
+@ops_bp.route('/cache-stats', methods=['GET'])
+def get_cache_stats():
+    # Counters are per worker process
+    return jsonify({
+        'reference_cache': reference_cache.stats(),
+        'response_cache': response_cache.stats(),
+        'hunter': hunter_client.stats(),
+        'password_hasher': password_hasher.stats()
+    }), 200
@@ -0,0 +1,319 @@
+# app/queries.py
+from datetime import datetime
+from sqlalchemy import DateTime, String, func, literal, select, tuple_, type_coerce
+from .models import db, Comment, Course, CourseInstructor, CourseRanking, Follow, Instructor
+from .reference_cache import get_instructors
+from .serializers import COURSE_SCHEMA, COURSE_SUMMARY_SCHEMA, INSTRUCTOR_SCHEMA
+from .utils import decode_cursor, encode_cursor, parse_limit
+
+
+def schema_columns(model, schema):
+    """The mapped columns of ``model`` behind ``schema``'s fields, for use with ``fetch_dicts``."""
+    return tuple(getattr(model, field) for field in schema.fields)
+
+
+# Columns behind each response shape; rows are read as tuples, never as ORM instances
+COURSE_SUMMARY_COLUMNS = schema_columns(Course, COURSE_SUMMARY_SCHEMA)
+COURSE_DETAIL_COLUMNS = schema_columns(Course, COURSE_SCHEMA)
+INSTRUCTOR_COLUMNS = schema_columns(Instructor, INSTRUCTOR_SCHEMA)
+
+
+def fetch_dicts(columns, *criteria, joins=(), order_by=()):
+    """
+    Run one SELECT of ``columns`` and return the rows as dicts.
+
+    Skips the ORM identity map and relationship loading entirely, so the cost is
+    one statement however many rows come back. New list endpoints should build
+    their responses on this rather than walking relationships.
+
+    Args:
+        columns (iterable): Mapped columns or labelled expressions, which name the dict keys.
+        *criteria: WHERE clauses.
+        joins (iterable): Join targets; a model joins along its foreign key,
+            a ``(target, onclause)`` tuple joins explicitly.
+        order_by (iterable): ORDER BY clauses.
+
+    Returns:
+        list: One dict per row; datetimes are left for the JSON encoder.
+    """
+    result = db.session.execute(_select(columns, criteria, joins, order_by))
+    keys = tuple(result.keys())
+    return [dict(zip(keys, row)) for row in result]
+
+
+def iter_dicts(columns, *criteria, joins=(), order_by=(), batch_size=1000):
+    """
+    Like ``fetch_dicts``, but yield the rows lazily, ``batch_size`` at a time from the database.
+
+    On PostgreSQL this reads through a server-side cursor, so memory stays flat
+    however many rows match. The session must stay open until the generator is
+    exhausted; in a view, hand it to ``serializers.json_stream``.
+    """
+    stmt = _select(columns, criteria, joins, order_by).execution_options(yield_per=batch_size)
+    result = db.session.execute(stmt)
+    keys = tuple(result.keys())
+    for row in result:
+        yield dict(zip(keys, row))
+
+
+class Keyset:
+    """
+    A unique ordering to paginate on, such as ``(Course.created_at, Course.id)``.
+
+    Pages continue strictly after the last row of the previous one, so each page
+    is an index range scan however deep the client has paged, and rows inserted
+    meanwhile are neither skipped nor repeated.
+
+    Datetime values travel as text and are compared as the database stores
+    them: SQLite keeps ``CURRENT_TIMESTAMP`` defaults as ``'YYYY-MM-DD HH:MM:SS'``,
+    which never equals a bound ``datetime`` (always written with microseconds),
+    and PostgreSQL casts the text back to a timestamp.
+
+    Args:
+        *columns: The ordering columns; together they must be unique.
+        parsers (tuple): One callable per column that validates a decoded cursor value.
+        descending (bool): Order by every column descending instead; the same
+            index serves both directions.
+    """
+
+    def __init__(self, *columns, parsers, descending=False):
+        self.columns = columns
+        self.parsers = parsers
+        self.descending = descending
+        self.order_by = tuple(column.desc() for column in columns) if descending else columns
+        # What fetch_page selects to build the next cursor: datetimes as stored, without conversion
+        self.cursor_columns = [
+            type_coerce(column, String) if isinstance(column.type, DateTime) else column for column in columns
+        ]
+
+    def encode(self, values):
+        return encode_cursor([value.isoformat() if isinstance(value, datetime) else value for value in values])
+
+    def decode(self, cursor):
+        """Return the typed values of a cursor from ``encode``, or None if it is malformed."""
+        values = decode_cursor(cursor, len(self.columns))
+        if values is None:
+            return None
+        try:
+            return [parse(value) for parse, value in zip(self.parsers, values)]
+        except (TypeError, ValueError):
+            return None
+
+    def reverse(self):
+        """The same ordering in the opposite direction."""
+        return Keyset(*self.columns, parsers=self.parsers, descending=not self.descending)
+
+    def after(self, values):
+        """
+        Criterion for the rows that sort after ``values``.
+
+        A row-value comparison, ``(created_at, id) > (:a, :b)``, which PostgreSQL
+        turns into an index range; the equivalent ``OR`` of ``AND``s is only a filter.
+        """
+        bound = [literal(value) for value in values]
+        left, right = (self.columns[0], bound[0]) if len(self.columns) == 1 else (tuple_(*self.columns), tuple_(*bound))
+        return left < right if self.descending else left > right
+
+
+def parse_fields(raw, schema):
+    """
+    Parse a ``fields=`` parameter such as ``"id,course_code,name"`` against ``schema``.
+
+    Returns:
+        tuple | None: The requested fields in schema order (all of them if ``raw`` is empty),
+        or None if it names a field the schema does not have.
+    """
+    if not raw:
+        return schema.fields
+    requested = {field.strip() for field in raw.split(',') if field.strip()}
+    if not requested or not requested <= set(schema.fields):
+        return None
+    return tuple(field for field in schema.fields if field in requested)
+
+
+def parse_page_args(args, keyset, default_limit, max_limit):
+    """
+    Read ``limit`` and ``cursor`` from the query string.
+
+    Returns:
+        tuple: ``(limit, after, error)``; ``after`` is None on the first page, and ``error``
+        is a message for a 400 response when either parameter is invalid.
+    """
+    limit = parse_limit(args.get('limit'), default_limit, max_limit)
+    if limit is None:
+        return None, None, f'limit must be between 1 and {max_limit}.'
+    after = None
+    if args.get('cursor'):
+        after = keyset.decode(args['cursor'])
+        if after is None:
+            return None, None, 'Invalid cursor.'
+    return limit, after, None
+
+
+def fetch_page(columns, keyset, *criteria, joins=(), limit, after=None):
+    """
+    Fetch one keyset-paginated page of ``columns`` as dicts.
+
+    The keyset columns are selected alongside, whether or not the caller asked
+    for them, so the next cursor can be built from the last row.
+
+    Args:
+        columns (iterable): Mapped columns to return, e.g. from a ``fields=`` projection.
+        keyset (Keyset): The ordering to paginate on.
+        *criteria: WHERE clauses.
+        joins (iterable): As for ``fetch_dicts``.
+        limit (int): Rows per page.
+        after (list | None): Decoded cursor of the previous page.
+
+    Returns:
+        tuple: ``(rows, next_cursor)``; ``next_cursor`` is None on the last page.
+    """
+    keys = [column.label(f'_keyset_{index}') for index, column in enumerate(keyset.cursor_columns)]
+    if after is not None:
+        criteria = (*criteria, keyset.after(after))
+    result = db.session.execute(_select((*columns, *keys), criteria, joins, keyset.order_by).limit(limit + 1))
+    names = tuple(result.keys())
+    rows = [dict(zip(names, row)) for row in result]
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = keyset.encode([rows[-1][key.name] for key in keys])
+    for row in rows:
+        for key in keys:
+            del row[key.name]
+    return rows, next_cursor
+
+
+def estimate_count(column, *criteria, joins=()):
+    """
+    Estimate how many rows match, without a full ``COUNT(*)`` on PostgreSQL.
+
+    On PostgreSQL this reads the planner's row estimate from ``EXPLAIN``, which
+    comes from table statistics and is usually within a few percent after
+    ``ANALYZE``. Other databases count exactly.
+
+    Args:
+        column: Any column of the table being counted, e.g. ``Course.id``.
+        *criteria: WHERE clauses.
+        joins (iterable): As for ``fetch_dicts``.
+    """
+    stmt = _select((column,), criteria, joins, ())
+    connection = db.session.connection()
+    if connection.dialect.name == 'postgresql':
+        compiled = stmt.compile(dialect=connection.dialect)
+        plan = connection.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params).scalar()
+        return int(plan[0]['Plan']['Plan Rows'])
+    return db.session.execute(select(func.count()).select_from(stmt.subquery())).scalar()
+
+
+def _select(columns, criteria, joins, order_by):
+    stmt = select(*columns)
+    for join in joins:
+        stmt = stmt.join(*join) if isinstance(join, tuple) else stmt.join(join)
+    return stmt.where(*criteria).order_by(*order_by)
+
+
+def _datetime_text(value):
+    """Cursor parser for datetime columns: checks the value is an ISO datetime and keeps it as text."""
+    datetime.fromisoformat(value)
+    return value
+
+
+# Orderings the list endpoints paginate on; each has a matching index (see Database/addListPaginationIndexes.sql)
+COURSE_KEYSETS = {
+    'created_at': Keyset(Course.created_at, Course.id, parsers=(_datetime_text, int)),
+    'course_code': Keyset(Course.course_code, parsers=(str,)),
+}
+# Highest average first by default (see Database/addCourseRankings.sql)
+COURSE_RANKING_KEYSET = Keyset(
+    CourseRanking.bayesian_average, CourseRanking.course_id, parsers=(float, int), descending=True
+)
+INSTRUCTOR_KEYSET = Keyset(Instructor.name, Instructor.id, parsers=(str, int))
+FOLLOW_KEYSET = Keyset(Follow.created_at, Follow.id, parsers=(_datetime_text, int))
+# Newest thread first (see Database/addCommentThreadIndexes.sql)
+COMMENT_THREAD_KEYSET = Keyset(Comment.created_at, Comment.id, parsers=(_datetime_text, int), descending=True)
+
+
+def course_summaries(*criteria, joins=(), order_by=(Course.id,)):
+    """Return the list-item fields of the courses matching ``criteria`` in one query."""
+    return fetch_dicts(COURSE_SUMMARY_COLUMNS, *criteria, joins=joins, order_by=order_by)
+
+
+def course_columns(fields):
+    """The ``Course`` columns behind a ``fields=`` projection of the course summary."""
+    return schema_columns(Course, COURSE_SUMMARY_SCHEMA.only(*fields))
+
+
+def instructors_by_id(instructor_ids):
+    """
+    Return instructor dicts for ``instructor_ids``, keyed by id.
+
+    Served from the reference cache; instructors another worker has just added
+    and this one has not reloaded yet are fetched with a single query.
+    """
+    cached = get_instructors()
+    instructors = {
+        instructor_id: INSTRUCTOR_SCHEMA.dump(cached[instructor_id])
+        for instructor_id in instructor_ids if instructor_id in cached
+    }
+    missing = [instructor_id for instructor_id in instructor_ids if instructor_id not in instructors]
+    if missing:
+        for instructor in fetch_dicts(INSTRUCTOR_COLUMNS, Instructor.id.in_(missing)):
+            instructors[instructor['id']] = instructor
+    return instructors
+
+
+def get_course_detail(course_id):
+    """
+    Return a course with its instructors, or None if it does not exist.
+
+    Two queries: the course row and its course-instructor pairs; instructor
+    details come from ``instructors_by_id``.
+    """
+    courses = fetch_dicts(COURSE_DETAIL_COLUMNS, Course.id == course_id)
+    if not courses:
+        return None
+    pairs = db.session.execute(
+        select(CourseInstructor.id, CourseInstructor.instructor_id)
+        .where(CourseInstructor.course_id == course_id)
+        .order_by(CourseInstructor.id)
+    ).all()
+    instructors = instructors_by_id(list(dict.fromkeys(pair.instructor_id for pair in pairs)))
+    course = courses[0]
+    course['instructors'] = [
+        {'course_instructor_id': pair.id, **instructors[pair.instructor_id]}
+        for pair in pairs if pair.instructor_id in instructors
+    ]
+    return course
+
+
+def get_instructor_detail(instructor_id):
+    """Return an instructor with the courses they teach (one entry per course-instructor pair), or None."""
+    instructor = instructors_by_id([instructor_id]).get(instructor_id)
+    if instructor is None:
+        return None
+    instructor['courses'] = course_summaries(
+        CourseInstructor.instructor_id == instructor_id,
+        joins=(CourseInstructor,),
+        order_by=(CourseInstructor.id,)
+    )
+    return instructor
+
+
+def followed_courses(user_id, fields, limit=None, after=None):
+    """
+    Return the courses ``user_id`` follows, in the order they were followed.
+
+    Args:
+        fields (tuple): Course summary fields to select.
+        limit (int | None): Page size; None returns every followed course.
+        after (list | None): Decoded cursor of the previous page.
+
+    Returns:
+        tuple: ``(courses, next_cursor)``.
+    """
+    criteria = (Follow.user_id == user_id,)
+    if limit is None:
+        return fetch_dicts(course_columns(fields), *criteria, joins=(Follow,), order_by=FOLLOW_KEYSET.order_by), None
+    return fetch_page(course_columns(fields), FOLLOW_KEYSET, *criteria, joins=(Follow,), limit=limit, after=after)
@@ -0,0 +1,275 @@
+# app/ratings/aggregates.py
+from sqlalchemy import and_, case, func, or_, select
+from ..models import db, Course, CourseInstructor, Rating, RatingAggregate
+from ..reference_cache import get_rating_dimensions
+from ..utils import upsert_insert
+
+SCORES = (1, 2, 3, 4, 5)
+
+
+def target_filter(model, course_id, course_instructor_id):
+    """Filter ``model`` rows (``Rating`` or ``RatingAggregate``) down to one course or course-instructor target."""
+    if course_id:
+        return and_(model.course_id == course_id, model.course_instructor_id.is_(None))
+    return and_(model.course_instructor_id == course_instructor_id, model.course_id.is_(None))
+
+
+def apply_score_changes(course_id, course_instructor_id, changes):
+    """
+    Fold rating changes for one target into ``rating_aggregates``.
+
+    All changes are written with one multi-row ``INSERT ... ON CONFLICT DO UPDATE``
+    that adds the deltas to the stored totals, so concurrent submits never
+    overwrite each other. Runs inside the caller's transaction, so the aggregates
+    are committed (or rolled back) together with the ratings themselves.
+
+    Args:
+        course_id (int | None): The rated course, or None for a course-instructor rating.
+        course_instructor_id (int | None): The rated course-instructor pair, or None.
+        changes (iterable): ``(dimension_id, old_score, new_score)`` tuples, where
+            ``old_score`` is None for a rating the user had not submitted before.
+    """
+    deltas = []
+    for dimension_id, old_score, new_score in changes:
+        if old_score == new_score:
+            continue
+        delta = {
+            'course_id': course_id,
+            'course_instructor_id': course_instructor_id,
+            'rating_dimension_id': dimension_id,
+            'score_sum': new_score - (old_score or 0),
+            'score_count': int(old_score is None),
+            **{f'count_{score}': 0 for score in SCORES}
+        }
+        delta[f'count_{new_score}'] += 1
+        if old_score is not None:
+            delta[f'count_{old_score}'] -= 1
+        deltas.append(delta)
+
+    if not deltas:
+        return
+
+    target_column = 'course_id' if course_id else 'course_instructor_id'
+    stmt = upsert_insert(RatingAggregate).values(deltas)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[target_column, 'rating_dimension_id'],
+        set_={
+            **{
+                column: getattr(RatingAggregate, column) + getattr(stmt.excluded, column)
+                for column in ('score_sum', 'score_count', *(f'count_{score}' for score in SCORES))
+            },
+            'updated_at': func.now()
+        }
+    )
+    db.session.execute(stmt)
+
+
+def get_target_ratings(course_id=None, course_instructor_id=None):
+    """Return the per-dimension averages of one target; dimensions come from the reference cache."""
+    aggregates = {
+        aggregate.rating_dimension_id: aggregate
+        for aggregate in RatingAggregate.query.filter(target_filter(RatingAggregate, course_id, course_instructor_id))
+    }
+    return [aggregate_to_dict(dimension, aggregates.get(dimension.id)) for dimension in get_rating_dimensions()]
+
+
+def get_batch_ratings(target_column, target_ids):
+    """
+    Return the per-dimension averages of many targets at once.
+
+    Args:
+        target_column (str): Either ``'course_id'`` or ``'course_instructor_id'``.
+        target_ids (list): Ids of the targets, in the order they should be returned.
+
+    Returns:
+        dict: Maps each requested id to its list of per-dimension ratings.
+    """
+    dimensions = get_rating_dimensions()
+    column = getattr(RatingAggregate, target_column)
+    aggregates = {
+        (getattr(aggregate, target_column), aggregate.rating_dimension_id): aggregate
+        for aggregate in RatingAggregate.query.filter(column.in_(target_ids)).all()
+    }
+
+    return {
+        target_id: [
+            aggregate_to_dict(dimension, aggregates.get((target_id, dimension.id)))
+            for dimension in dimensions
+        ]
+        for target_id in target_ids
+    }
+
+
+def get_course_page_ratings(course_id, course_instructor_ids):
+    """
+    Return the averages of a course and of its course-instructor pairs with one query.
+
+    Returns:
+        tuple: ``(course_ratings, pair_ratings)``, where ``pair_ratings`` maps each
+        course-instructor id to its list of per-dimension ratings.
+    """
+    dimensions = get_rating_dimensions()
+    aggregates = {}
+    for aggregate in RatingAggregate.query.filter(or_(
+        target_filter(RatingAggregate, course_id, None),
+        RatingAggregate.course_instructor_id.in_(course_instructor_ids)
+    )):
+        aggregates[(aggregate.course_instructor_id, aggregate.rating_dimension_id)] = aggregate
+
+    def ratings(course_instructor_id):
+        return [aggregate_to_dict(dimension, aggregates.get((course_instructor_id, dimension.id))) for dimension in dimensions]
+
+    return ratings(None), {course_instructor_id: ratings(course_instructor_id) for course_instructor_id in course_instructor_ids}
+
+
+class RatingTotals:
+    """Totals summed over several aggregate rows, shaped like a ``RatingAggregate`` for ``aggregate_to_dict``."""
+
+    def __init__(self):
+        self.score_sum = 0
+        self.score_count = 0
+        for score in SCORES:
+            setattr(self, f'count_{score}', 0)
+
+    def add(self, aggregate):
+        self.score_sum += aggregate.score_sum
+        self.score_count += aggregate.score_count
+        for score in SCORES:
+            column = f'count_{score}'
+            setattr(self, column, getattr(self, column) + getattr(aggregate, column))
+
+
+def get_instructor_ratings(instructor_id):
+    """
+    Roll the ratings of all of an instructor's offerings up into overall, per-semester and per-course averages.
+
+    One query reads the ``rating_aggregates`` of every course-instructor pair of
+    the instructor, together with the pair's course and semester; the totals are
+    summed per breakdown here, so the averages are exact (weighted by rating
+    count) rather than averages of averages. Offerings nobody has rated yet
+    still appear in the breakdowns, with empty ratings.
+
+    Returns:
+        tuple: ``(ratings, by_semester, by_course, course_instructor_ids)``, where
+        ``ratings`` lists the per-dimension ratings across all offerings, ``by_semester``
+        and ``by_course`` list dicts each with its own ``ratings``, and
+        ``course_instructor_ids`` are the offerings rolled up.
+    """
+    rows = db.session.execute(
+        select(
+            CourseInstructor.id.label('course_instructor_id'), CourseInstructor.course_id, CourseInstructor.semester,
+            Course.course_code, Course.name, RatingAggregate.rating_dimension_id,
+            RatingAggregate.score_sum, RatingAggregate.score_count,
+            *(getattr(RatingAggregate, f'count_{score}') for score in SCORES)
+        )
+        .join(Course, Course.id == CourseInstructor.course_id)
+        .outerjoin(RatingAggregate, RatingAggregate.course_instructor_id == CourseInstructor.id)
+        .where(CourseInstructor.instructor_id == instructor_id)
+        .order_by(CourseInstructor.course_id, CourseInstructor.id)
+    ).all()
+
+    overall, semesters, courses = {}, {}, {}
+    for row in rows:
+        if row.course_id not in courses:
+            courses[row.course_id] = ({'course_id': row.course_id, 'course_code': row.course_code, 'name': row.name}, {})
+        semester, course = semesters.setdefault(row.semester, {}), courses[row.course_id][1]
+        if row.rating_dimension_id is None:
+            continue
+        for totals in (overall, semester, course):
+            totals.setdefault(row.rating_dimension_id, RatingTotals()).add(row)
+
+    dimensions = get_rating_dimensions()
+
+    def ratings(totals):
+        return [aggregate_to_dict(dimension, totals.get(dimension.id)) for dimension in dimensions]
+
+    by_semester = [
+        {'semester': semester, 'ratings': ratings(totals)}
+        # Offerings without a semester last
+        for semester, totals in sorted(semesters.items(), key=lambda item: (item[0] is None, item[0] or ''))
+    ]
+    by_course = [{**course, 'ratings': ratings(totals)} for course, totals in courses.values()]
+    course_instructor_ids = list(dict.fromkeys(row.course_instructor_id for row in rows))
+    return ratings(overall), by_semester, by_course, course_instructor_ids
+
+
+def aggregate_to_dict(dimension, aggregate):
+    count = aggregate.score_count if aggregate else 0
+    return {
+        'dimension_id': dimension.id,
+        'dimension_name': dimension.name,
+        'average_score': round(aggregate.score_sum / count, 2) if count else None,
+        'rating_count': count,
+        'score_distribution': {
+            str(score): getattr(aggregate, f'count_{score}') if aggregate else 0 for score in SCORES
+        }
+    }
+
+
+def _computed_aggregates():
+    """Recompute every aggregate row from the raw ``ratings`` table, keyed by target and dimension."""
+    rows = db.session.query(
+        Rating.course_id,
+        Rating.course_instructor_id,
+        Rating.rating_dimension_id,
+        func.sum(Rating.score),
+        func.count(Rating.id),
+        *[func.sum(case((Rating.score == score, 1), else_=0)) for score in SCORES]
+    ).group_by(
+        Rating.course_id, Rating.course_instructor_id, Rating.rating_dimension_id
+    ).all()
+
+    computed = {}
+    for course_id, course_instructor_id, dimension_id, score_sum, score_count, *histogram in rows:
+        computed[(course_id, course_instructor_id, dimension_id)] = (
+            int(score_sum), int(score_count), *(int(count) for count in histogram)
+        )
+    return computed
+
+
+def _stored_aggregates():
+    stored = {}
+    for aggregate in RatingAggregate.query.all():
+        key = (aggregate.course_id, aggregate.course_instructor_id, aggregate.rating_dimension_id)
+        stored[key] = (
+            aggregate.score_sum, aggregate.score_count,
+            *(getattr(aggregate, f'count_{score}') for score in SCORES)
+        )
+    return stored
+
+
+def rebuild_aggregates(check_only=False):
+    """
+    Compare ``rating_aggregates`` with the raw ``ratings`` table and, unless
+    ``check_only`` is set, replace the aggregates with freshly computed rows.
+
+    Returns:
+        list: ``(course_id, course_instructor_id, dimension_id, stored, computed)``
+        tuples for every target whose stored totals did not match.
+    """
+    computed = _computed_aggregates()
+    stored = _stored_aggregates()
+
+    mismatches = []
+    for key in sorted(set(computed) | set(stored), key=lambda k: tuple(v or 0 for v in k)):
+        expected = computed.get(key)
+        actual = stored.get(key)
+        # An all-zero stored row is equivalent to a missing one
+        if actual is not None and actual[1] == 0 and expected is None:
+            continue
+        if expected != actual:
+            mismatches.append((*key, actual, expected))
+
+    if not check_only:
+        RatingAggregate.query.delete(synchronize_session=False)
+        db.session.bulk_insert_mappings(RatingAggregate, [{
+            'course_id': course_id,
+            'course_instructor_id': course_instructor_id,
+            'rating_dimension_id': dimension_id,
+            'score_sum': totals[0],
+            'score_count': totals[1],
+            **{f'count_{score}': totals[1 + score] for score in SCORES}
+        } for (course_id, course_instructor_id, dimension_id), totals in computed.items()])
+        db.session.commit()
+
+    return mismatches
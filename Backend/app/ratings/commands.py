@@ -0,0 +1,57 @@
+# app/ratings/commands.py
+import time
+import click
+from flask.cli import AppGroup
+from sqlalchemy.exc import SQLAlchemyError
+from ..models import db
+from .aggregates import rebuild_aggregates
+from .rankings import refresh_rankings
+
+ratings_cli = AppGroup('ratings', help='Maintenance commands for ratings.')
+
+@ratings_cli.command('rebuild-aggregates')
+@click.option('--check', is_flag=True, help='Only report mismatches, do not rewrite the aggregates.')
+def rebuild_aggregates_command(check):
+    """Backfill rating_aggregates from the ratings table and report drift."""
+    mismatches = rebuild_aggregates(check_only=check)
+
+    for course_id, course_instructor_id, dimension_id, stored, computed in mismatches:
+        target = f'course {course_id}' if course_id else f'course-instructor {course_instructor_id}'
+        click.echo(f'Mismatch for {target}, dimension {dimension_id}: stored={stored} computed={computed}')
+
+    if check:
+        click.echo(f'{len(mismatches)} mismatched aggregate(s) found.')
+        if mismatches:
+            raise SystemExit(1)
+    else:
+        click.echo(f'Rebuilt rating aggregates ({len(mismatches)} mismatch(es) repaired).')
+
+@ratings_cli.command('refresh-rankings')
+@click.option('--full', is_flag=True, help='Rebuild every ranking instead of folding in the recent changes.')
+@click.option('--interval', type=click.IntRange(0), default=0,
+              help='Keep running and refresh every INTERVAL seconds; 0 refreshes once.')
+def refresh_rankings_command(full, interval):
+    """
+    Update course_rankings from the rating aggregates changed since the last run.
+
+    Run it from cron, or leave it running with --interval as the background job
+    that keeps GET /courses?sort=dimension:<name> current. Run it with --full
+    after rebuild-aggregates.
+    """
+    while True:
+        try:
+            results = refresh_rankings(full=full)
+        except SQLAlchemyError as error:
+            if not interval:
+                raise
+            # A long-running refresher outlives a database restart; the next round starts afresh
+            db.session.rollback()
+            click.echo(f'Refreshing rankings failed: {error}', err=True)
+        else:
+            for name, changed, rescored, prior_mean in results:
+                prior = 'no ratings yet' if prior_mean is None else f'prior {prior_mean:.3f}'
+                click.echo(f'{name}: {changed} course(s) updated, {prior}' + (', all courses rescored' if rescored else ''))
+        if not interval:
+            break
+        full = False
+        time.sleep(interval)
@@ -0,0 +1,167 @@
+# app/ratings/rankings.py
+from datetime import timedelta
+from sqlalchemy import delete, func, select, tuple_, update
+from ..models import db, CourseRanking, CourseRankingState, RatingAggregate
+from ..reference_cache import get_rating_dimensions
+from ..response_cache import response_cache
+from ..utils import upsert_insert
+from config import Config
+
+# Courses whose stored totals are looked up per query while refreshing
+REFRESH_CHUNK_SIZE = 1000
+
+
+def bayesian_average(score_sum, vote_count, prior_mean):
+    """
+    A course's average shrunk towards ``prior_mean`` by ``RANKING_PRIOR_VOTES`` imaginary votes.
+
+    A course with two 5s no longer outranks one with two hundred 4.8s. Works on
+    numbers and on column expressions alike.
+    """
+    weight = float(Config.RANKING_PRIOR_VOTES)
+    return (score_sum + weight * prior_mean) / (vote_count + weight)
+
+
+def _start(states, dimensions, full):
+    """Reset the state of every dimension for a full rebuild, creating the missing rows; returns whether to rebuild."""
+    if not full and all(dimension.id in states for dimension in dimensions):
+        return False
+    db.session.execute(delete(CourseRanking))
+    for dimension in dimensions:
+        state = states.get(dimension.id)
+        if state is None:
+            state = states[dimension.id] = CourseRankingState(rating_dimension_id=dimension.id)
+            db.session.add(state)
+        state.score_sum, state.vote_count, state.prior_mean, state.refreshed_through = 0, 0, None, None
+    return True
+
+
+def _changed_totals(states, full):
+    """
+    Read the course aggregates updated since the last refresh and compare them with the stored rankings.
+
+    Returns:
+        tuple: ``(changes, watermark)``; ``changes`` lists ``(course_id, dimension_id, score_sum,
+        vote_count, old_score_sum, old_vote_count)`` for every total that differs from the stored
+        one, and ``watermark`` is the latest ``updated_at`` read.
+    """
+    criteria = [RatingAggregate.course_id.isnot(None), RatingAggregate.rating_dimension_id.in_(list(states))]
+    watermarks = [state.refreshed_through for state in states.values()]
+    if not full and None not in watermarks:
+        criteria.append(RatingAggregate.updated_at >= min(watermarks) - timedelta(seconds=Config.RANKING_REFRESH_OVERLAP))
+    rows = db.session.execute(
+        select(
+            RatingAggregate.course_id, RatingAggregate.rating_dimension_id,
+            RatingAggregate.score_sum, RatingAggregate.score_count, RatingAggregate.updated_at
+        ).where(*criteria)
+    ).all()
+
+    changes, watermark = [], None
+    for start in range(0, len(rows), REFRESH_CHUNK_SIZE):
+        chunk = rows[start:start + REFRESH_CHUNK_SIZE]
+        stored = {}
+        if not full:
+            stored = {
+                (course_id, dimension_id): (score_sum, vote_count)
+                for course_id, dimension_id, score_sum, vote_count in db.session.execute(
+                    select(CourseRanking.course_id, CourseRanking.rating_dimension_id,
+                           CourseRanking.score_sum, CourseRanking.vote_count)
+                    .where(CourseRanking.course_id.in_({row.course_id for row in chunk}))
+                )
+            }
+        for course_id, dimension_id, score_sum, score_count, updated_at in chunk:
+            if updated_at is not None and (watermark is None or updated_at > watermark):
+                watermark = updated_at
+            old = stored.get((course_id, dimension_id), (0, 0))
+            if old != (score_sum, score_count):
+                changes.append((course_id, dimension_id, score_sum, score_count, *old))
+    return changes, watermark
+
+
+def refresh_rankings(full=False):
+    """
+    Bring ``course_rankings`` up to date with ``rating_aggregates``, and commit.
+
+    The aggregates are the running totals ``submit_rating`` folds every new or
+    changed rating into, so only the course aggregates updated since the last
+    run are read (re-reading the last ``RANKING_REFRESH_OVERLAP`` seconds), and
+    ``ratings`` itself is never aggregated. Each total is compared with the copy
+    stored next to its ranking, which makes re-reading one harmless; the
+    differences are added to the per-dimension totals whose mean is the prior.
+
+    Changed courses are scored against the prior the dimension's rankings were
+    computed with. Once the mean has drifted more than ``RANKING_PRIOR_TOLERANCE``
+    from it, the whole dimension is rescored with one UPDATE. The first run, or
+    one with ``full``, rebuilds every ranking; use it after ``rebuild-aggregates``,
+    which can drop aggregates the incremental refresh would never see again.
+
+    Returns:
+        list: ``(dimension_name, courses_changed, rescored, prior_mean)`` per dimension.
+    """
+    dimensions = get_rating_dimensions()
+    # Locked so two refreshes running at once never fold the same changes into the totals twice
+    states = {state.rating_dimension_id: state for state in CourseRankingState.query.with_for_update()}
+    full = _start(states, dimensions, full)
+    changes, watermark = _changed_totals(states, full)
+
+    changed = {dimension.id: 0 for dimension in dimensions}
+    for _, dimension_id, score_sum, vote_count, old_sum, old_count in changes:
+        states[dimension_id].score_sum += score_sum - old_sum
+        states[dimension_id].vote_count += vote_count - old_count
+        changed[dimension_id] += 1
+
+    rescored = set()
+    for dimension in dimensions:
+        state = states[dimension.id]
+        mean = state.score_sum / state.vote_count if state.vote_count else None
+        if mean is not None and (state.prior_mean is None or abs(mean - state.prior_mean) > Config.RANKING_PRIOR_TOLERANCE):
+            state.prior_mean = mean
+            rescored.add(dimension.id)
+        if watermark is not None and (state.refreshed_through is None or watermark > state.refreshed_through):
+            state.refreshed_through = watermark
+        state.refreshed_at = func.now()
+
+    rankings = [
+        {
+            'course_id': course_id,
+            'rating_dimension_id': dimension_id,
+            'score_sum': score_sum,
+            'vote_count': vote_count,
+            'bayesian_average': bayesian_average(score_sum, vote_count, states[dimension_id].prior_mean)
+        }
+        for course_id, dimension_id, score_sum, vote_count, _, _ in changes if vote_count
+    ]
+    if rankings:
+        stmt = upsert_insert(CourseRanking)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['course_id', 'rating_dimension_id'],
+            set_={
+                **{column: stmt.excluded[column] for column in ('score_sum', 'vote_count', 'bayesian_average')},
+                'updated_at': func.now()
+            }
+        )
+        db.session.execute(stmt, rankings)
+    emptied = [(course_id, dimension_id) for course_id, dimension_id, _, vote_count, _, _ in changes if not vote_count]
+    if emptied:
+        db.session.execute(
+            delete(CourseRanking).where(tuple_(CourseRanking.course_id, CourseRanking.rating_dimension_id).in_(emptied))
+        )
+    if not full:
+        for dimension_id in rescored:
+            db.session.execute(
+                update(CourseRanking)
+                .where(CourseRanking.rating_dimension_id == dimension_id)
+                .values(bayesian_average=bayesian_average(
+                    CourseRanking.score_sum, CourseRanking.vote_count, states[dimension_id].prior_mean
+                ))
+                .execution_options(synchronize_session=False)
+            )
+    results = [
+        (dimension.name, changed[dimension.id], dimension.id in rescored, states[dimension.id].prior_mean)
+        for dimension in dimensions
+    ]
+    db.session.commit()
+
+    if changes or rescored:
+        response_cache.invalidate('rankings')
+    return results
@@ -1,11 +1,62 @@
 # app/ratings/routes.py
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models import db, Rating, RatingDimension, Course, CourseInstructor
+from ..models import db, Rating, Course, CourseInstructor, User
+from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
+from ..database import use_primary
+from ..queries import instructors_by_id
+from ..reference_cache import get_rating_dimensions
+from ..response_cache import cached_response, response_cache, tag_response, target_tag
+from ..utils import parse_id_list, upsert_insert
+from .aggregates import apply_score_changes, get_batch_ratings, get_instructor_ratings, get_target_ratings, target_filter
+from config import Config
 
 ratings_bp = Blueprint('ratings', __name__)
 
+def _upsert_ratings(user_id, course_id, course_instructor_id, scores):
+    """
+    Write a user's scores for one target with one multi-row upsert and fold
+    the old-to-new deltas into the rating aggregates.
+
+    Args:
+        user_id (int): The rating user.
+        course_id (int | None): The rated course, or None for a course-instructor rating.
+        course_instructor_id (int | None): The rated course-instructor pair, or None.
+        scores (dict): Maps rating dimension ids to their new scores.
+    """
+    # Lock the user's row first, so the aggregate deltas are computed from settled scores. Locking
+    # the ratings themselves would only cover ones that already exist: two concurrent first-time
+    # submits would both read no previous score and both count as a new rating.
+    db.session.execute(select(User.id).where(User.id == user_id).with_for_update())
+    previous_scores = dict(
+        db.session.query(Rating.rating_dimension_id, Rating.score).filter(
+            Rating.user_id == user_id,
+            target_filter(Rating, course_id, course_instructor_id),
+            Rating.rating_dimension_id.in_(scores)
+        )
+    )
+
+    target_column = 'course_id' if course_id else 'course_instructor_id'
+    stmt = upsert_insert(Rating).values([{
+        'user_id': user_id,
+        'rating_dimension_id': dimension_id,
+        'score': score,
+        'course_id': course_id,
+        'course_instructor_id': course_instructor_id
+    } for dimension_id, score in scores.items()])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=['user_id', 'rating_dimension_id', target_column],
+        set_={'score': stmt.excluded.score}
+    )
+    db.session.execute(stmt)
+
+    apply_score_changes(
+        course_id,
+        course_instructor_id,
+        [(dimension_id, previous_scores.get(dimension_id), score) for dimension_id, score in scores.items()]
+    )
+
 @ratings_bp.route('', methods=['POST'])
 @jwt_required()
 def submit_rating():
@@ -31,68 +82,73 @@ def submit_rating():
         if not course_instructor:
             return jsonify({'message': 'Course-Instructor pair not found.'}), 404
 
-    # Process each rating
+    # Validate every input before touching the database; a repeated dimension keeps its last score
+    scores = {}
     for rating_input in ratings:
+        if not isinstance(rating_input, dict):
+            return jsonify({'message': 'Each rating must have a rating_dimension_id and score.'}), 400
         dimension_id = rating_input.get('rating_dimension_id')
         score = rating_input.get('score')
 
         if not dimension_id or not score:
             return jsonify({'message': 'Each rating must have a rating_dimension_id and score.'}), 400
 
-        if not (1 <= score <= 5):
-            return jsonify({'message': 'Score must be between 1 and 5.'}), 400
+        # A string id would never match a dimension, and a list or object could not key the scores
+        if isinstance(dimension_id, bool) or not isinstance(dimension_id, int):
+            return jsonify({'message': 'rating_dimension_id must be an integer.'}), 400
 
-        # Check if rating dimension exists
-        dimension = RatingDimension.query.get(dimension_id)
-        if not dimension:
-            return jsonify({'message': f'Rating dimension {dimension_id} not found.'}), 404
+        # bool is an int subclass, and a float such as 3.0 would not match a histogram column
+        if isinstance(score, bool) or not isinstance(score, int) or not (1 <= score <= 5):
+            return jsonify({'message': 'Score must be an integer between 1 and 5.'}), 400
+
+        scores[dimension_id] = score
 
-        # Optionally, enforce one rating per user per dimension per course/course-instructor
-        existing_rating = Rating.query.filter_by(
-            user_id=user_id,
-            rating_dimension_id=dimension_id,
-            course_id=course_id,
-            course_instructor_id=course_instructor_id
-        ).first()
-        if existing_rating:
-            existing_rating.score = score
-        else:
-            new_rating = Rating(
-                user_id=user_id,
-                rating_dimension_id=dimension_id,
-                score=score,
-                course_id=course_id,
-                course_instructor_id=course_instructor_id
-            )
-            db.session.add(new_rating)
+    # Check all rating dimensions exist against the cached dimension list
+    known_dimensions = {dimension.id for dimension in get_rating_dimensions()}
+    for dimension_id in scores:
+        if dimension_id not in known_dimensions:
+            return jsonify({'message': f'Rating dimension {dimension_id} not found.'}), 404
 
     try:
+        _upsert_ratings(int(user_id), course_id, course_instructor_id, scores)
         db.session.commit()
+        response_cache.invalidate(target_tag('ratings', course_id, course_instructor_id))
         return jsonify({'message': 'Ratings submitted successfully.'}), 201
     except IntegrityError:
         db.session.rollback()
         return jsonify({'message': 'Failed to submit ratings.'}), 400
 
+def _batch_ratings_response(target_column):
+    ids = parse_id_list(request.args.get('ids', ''), Config.RATINGS_BATCH_MAX_IDS)
+    if ids is None:
+        return jsonify({'message': f'Provide between 1 and {Config.RATINGS_BATCH_MAX_IDS} comma-separated ids.'}), 400
+
+    tag_response(*(target_tag('ratings', **{target_column: target_id}) for target_id in ids))
+    ratings_by_id = get_batch_ratings(target_column, ids)
+    response = [{
+        target_column: target_id,
+        'ratings': ratings_data
+    } for target_id, ratings_data in ratings_by_id.items()]
+    return jsonify(response), 200
+
+@ratings_bp.route('/courses', methods=['GET'])
+@cached_response()
+def get_batch_course_ratings():
+    return _batch_ratings_response('course_id')
+
+@ratings_bp.route('/course-instructors', methods=['GET'])
+@cached_response()
+def get_batch_course_instructor_ratings():
+    return _batch_ratings_response('course_instructor_id')
+
 @ratings_bp.route('/courses/<int:course_id>', methods=['GET'])
+@cached_response(tags=lambda course_id: [target_tag('ratings', course_id=course_id)])
 def get_course_ratings(course_id):
     course = Course.query.get(course_id)
     if not course:
         return jsonify({'message': 'Resource not found'}), 404
 
-    dimensions = RatingDimension.query.all()
-    ratings_data = []
-
-    for dimension in dimensions:
-        avg_score = db.session.query(db.func.avg(Rating.score)).filter(
-            Rating.course_id == course_id,
-            Rating.rating_dimension_id == dimension.id
-        ).scalar()
-        avg_score = round(avg_score, 2) if avg_score else None
-        ratings_data.append({
-            'dimension_id': dimension.id,
-            'dimension_name': dimension.name,
-            'average_score': avg_score
-        })
+    ratings_data = get_target_ratings(course_id=course_id)
 
     response = {
         'course_id': course_id,
@@ -101,25 +157,15 @@ def get_course_ratings(course_id):
     return jsonify(response), 200
 
 @ratings_bp.route('/courses/<int:course_id>/instructors/<int:instructor_id>', methods=['GET'])
+@cached_response()
 def get_course_instructor_ratings(course_id, instructor_id):
     course_instructor = CourseInstructor.query.filter_by(course_id=course_id, instructor_id=instructor_id).first()
     if not course_instructor:
         return jsonify({'message': 'Resource not found'}), 404
 
-    dimensions = RatingDimension.query.all()
-    ratings_data = []
-
-    for dimension in dimensions:
-        avg_score = db.session.query(db.func.avg(Rating.score)).filter(
-            Rating.course_instructor_id == course_instructor.id,
-            Rating.rating_dimension_id == dimension.id
-        ).scalar()
-        avg_score = round(avg_score, 2) if avg_score else None
-        ratings_data.append({
-            'dimension_id': dimension.id,
-            'dimension_name': dimension.name,
-            'average_score': avg_score
-        })
+    tag_response(target_tag('ratings', course_instructor_id=course_instructor.id))
+
+    ratings_data = get_target_ratings(course_instructor_id=course_instructor.id)
 
     response = {
         'course_instructor_id': course_instructor.id,
@@ -127,7 +173,26 @@ def get_course_instructor_ratings(course_id, instructor_id):
     }
     return jsonify(response), 200
 
+@ratings_bp.route('/instructors/<int:instructor_id>', methods=['GET'])
+@cached_response(tags=lambda instructor_id: [f'instructor:{instructor_id}', 'courses'])
+def get_instructor_ratings_rollup(instructor_id):
+    if instructor_id not in instructors_by_id([instructor_id]):
+        return jsonify({'message': 'Resource not found'}), 404
+
+    # One query over the maintained aggregates of every offering, instead of one request per course-instructor pair
+    ratings_data, by_semester, by_course, course_instructor_ids = get_instructor_ratings(instructor_id)
+    tag_response(*(target_tag('ratings', course_instructor_id=course_instructor_id) for course_instructor_id in course_instructor_ids))
+
+    response = {
+        'instructor_id': instructor_id,
+        'ratings': ratings_data,
+        'by_semester': by_semester,
+        'by_course': by_course
+    }
+    return jsonify(response), 200
+
 @ratings_bp.route('/my-ratings', methods=['GET'])
+@use_primary
 @jwt_required()
 def get_my_ratings():
     user_id = get_jwt_identity()
@@ -147,22 +212,19 @@ def get_my_ratings():
         if not course_instructor:
             return jsonify({'message': 'Course-Instructor pair not found.'}), 404
 
-    dimensions = RatingDimension.query.all()
-    ratings_data = []
-
-    for dimension in dimensions:
-        rating = Rating.query.filter_by(
-            user_id=user_id,
-            rating_dimension_id=dimension.id,
-            course_id=course_id,
-            course_instructor_id=course_instructor_id
-        ).first()
-
-        ratings_data.append({
-            'dimension_id': dimension.id,
-            'dimension_name': dimension.name,
-            'score': rating.score if rating else None
-        })
+    # One query for the user's scores; the dimensions themselves come from the reference cache
+    scores = dict(
+        db.session.query(Rating.rating_dimension_id, Rating.score).filter(
+            Rating.user_id == user_id,
+            target_filter(Rating, course_id, course_instructor_id)
+        )
+    )
+
+    ratings_data = [{
+        'dimension_id': dimension.id,
+        'dimension_name': dimension.name,
+        'score': scores.get(dimension.id)
+    } for dimension in get_rating_dimensions()]
 
     response = {
         'course_id': course_id,
@@ -0,0 +1,178 @@
+# app/reference_cache.py
+import threading
+import time
+from collections import namedtuple
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from .models import db, Instructor, RatingDimension, ReferenceVersion
+from .utils import upsert_insert
+from config import Config
+
+RatingDimensionRef = namedtuple('RatingDimensionRef', 'id name description')
+InstructorRef = namedtuple('InstructorRef', 'id name profile_url created_at')
+
+
+class _Entry:
+    __slots__ = ('value', 'version', 'checked_at')
+
+    def __init__(self, value, version, checked_at):
+        self.value = value
+        self.version = version
+        self.checked_at = checked_at
+
+
+class ReferenceCache:
+    """
+    Process-local cache for small, slow-changing tables such as rating dimensions.
+
+    Each dataset is served from memory until its TTL runs out. The cache then reads
+    the dataset's row in ``reference_versions``, a single cheap query, and reloads
+    only if another worker has bumped the version since. Writes through the ORM
+    to a dataset's models bump its version in the writing transaction, so all
+    workers converge within one TTL.
+    """
+
+    def __init__(self):
+        self._datasets = {}  # name -> (loader, models)
+        self._entries = {}
+        self._locks = {}
+        self._stats = {}
+
+    def register(self, name, loader, models=()):
+        """
+        Register a dataset.
+
+        Args:
+            name (str): The dataset name, also its key in ``reference_versions``.
+            loader (callable): Returns the dataset as plain values (not ORM instances).
+            models (tuple): Models whose changes invalidate the dataset.
+        """
+        self._datasets[name] = (loader, tuple(models))
+        self._locks[name] = threading.Lock()
+        self._stats[name] = {'hits': 0, 'misses': 0, 'version_checks': 0}
+
+    def get(self, name):
+        entry = self._entries.get(name)
+        now = time.monotonic()
+        if entry is not None and now - entry.checked_at < Config.REFERENCE_CACHE_TTL:
+            self._stats[name]['hits'] += 1
+            return entry.value
+
+        with self._locks[name]:
+            entry = self._entries.get(name)
+            if entry is not None and now - entry.checked_at < Config.REFERENCE_CACHE_TTL:
+                self._stats[name]['hits'] += 1
+                return entry.value
+
+            version = self._read_version(name)
+            if entry is not None:
+                self._stats[name]['version_checks'] += 1
+                if entry.version == version:
+                    entry.checked_at = now
+                    self._stats[name]['hits'] += 1
+                    return entry.value
+
+            self._stats[name]['misses'] += 1
+            loader, _ = self._datasets[name]
+            entry = _Entry(loader(), version, now)
+            self._entries[name] = entry
+            return entry.value
+
+    def invalidate(self, name):
+        """Drop the local copy of ``name`` and bump its version in the current transaction, so other workers reload too."""
+        self._bump_versions(db.session.connection(), [name])
+        self._entries.pop(name, None)
+
+    def stats(self):
+        return {
+            name: {**counters, 'cached': name in self._entries}
+            for name, counters in self._stats.items()
+        }
+
+    def datasets_for(self, objects):
+        """Return the names of the datasets affected by changes to ``objects``."""
+        return {
+            name for name, (_, models) in self._datasets.items()
+            if any(isinstance(obj, models) for obj in objects)
+        }
+
+    def drop_local(self, names):
+        for name in names:
+            self._entries.pop(name, None)
+
+    @staticmethod
+    def _read_version(name):
+        return db.session.execute(
+            select(ReferenceVersion.version).where(ReferenceVersion.name == name)
+        ).scalar() or 0
+
+    @staticmethod
+    def _bump_versions(connection, names):
+        stmt = upsert_insert(ReferenceVersion).values([{'name': name, 'version': 1} for name in names])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['name'],
+            set_={'version': ReferenceVersion.version + 1, 'updated_at': func.now()}
+        )
+        connection.execute(stmt)
+
+
+reference_cache = ReferenceCache()
+
+
+@event.listens_for(Session, 'after_flush')
+def _bump_changed_datasets(session, flush_context):
+    names = reference_cache.datasets_for(list(session.new) + list(session.dirty) + list(session.deleted))
+    pending = session.info.setdefault('reference_datasets', set())
+    names -= pending
+    if names:
+        ReferenceCache._bump_versions(session.connection(), sorted(names))
+        pending.update(names)
+
+
+@event.listens_for(Session, 'after_commit')
+def _drop_committed_datasets(session):
+    reference_cache.drop_local(session.info.pop('reference_datasets', ()))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _forget_rolled_back_datasets(session):
+    session.info.pop('reference_datasets', None)
+
+
+def _load_rating_dimensions():
+    rows = db.session.query(RatingDimension.id, RatingDimension.name, RatingDimension.description).order_by(RatingDimension.id)
+    return tuple(RatingDimensionRef(*row) for row in rows)
+
+
+def _load_instructors():
+    rows = db.session.query(Instructor.id, Instructor.name, Instructor.profile_url, Instructor.created_at)
+    return {row.id: InstructorRef(*row) for row in rows}
+
+
+reference_cache.register('rating_dimensions', _load_rating_dimensions, models=(RatingDimension,))
+reference_cache.register('instructors', _load_instructors, models=(Instructor,))
+
+
+def read_version(name):
+    """The version of ``name`` in ``reference_versions``, 0 if it was never bumped."""
+    return ReferenceCache._read_version(name)
+
+
+def bump_version(name, connection=None):
+    """
+    Bump ``name`` in ``reference_versions`` in the current transaction.
+
+    For process-local state other than this cache, such as the course indexes,
+    whose owners poll ``read_version`` to notice writes made by other processes.
+    """
+    ReferenceCache._bump_versions(connection or db.session.connection(), [name])
+
+
+def get_rating_dimensions():
+    """All rating dimensions, ordered by id."""
+    return reference_cache.get('rating_dimensions')
+
+
+def get_instructors():
+    """All instructors, keyed by id."""
+    return reference_cache.get('instructors')
@@ -0,0 +1,559 @@
+# app/response_cache.py
+import functools
+import json
+import logging
+import socket
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import unquote, urlparse
+from flask import current_app, g, make_response, request
+from flask_jwt_extended import get_jwt_identity
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+from werkzeug.http import generate_etag, parse_options_header, quote_etag
+from .compression import compression
+from .courses.listeners import subscribe
+from .models import CourseInstructor, Instructor
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'academisync:response:'
+TAG_PREFIX = 'academisync:tag:'
+WRITE_PREFIX = 'academisync:written:'
+# Headers that are recomputed for every response rather than replayed from the cache
+UNCACHED_HEADERS = {'content-length', 'set-cookie'}
+# Seconds to bypass the cache after a backend error, so an unreachable server does not slow every request
+ERROR_BACKOFF = 5
+
+
+class CacheNotShared(Exception):
+    """Raised when several server processes would each keep their own response cache."""
+
+
+class MemoryBackend:
+    """
+    Bounded in-process LRU store with per-entry TTL.
+
+    Tag versions live in their own dict and are never evicted, so an entry can
+    never look fresh again after its tag's counter was lost. Invalidation only
+    reaches the current process; use the Redis backend with several workers.
+    """
+
+    def __init__(self, max_entries):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._versions = {}
+        self._marks = {}  # key -> expires_at
+        self.max_entries = max_entries
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key, value, ttl):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get_versions(self, tags):
+        with self._lock:
+            return [self._versions.get(tag, 0) for tag in tags]
+
+    def bump_versions(self, tags):
+        with self._lock:
+            for tag in tags:
+                self._versions[tag] = self._versions.get(tag, 0) + 1
+
+    def mark(self, keys, ttl):
+        with self._lock:
+            now = time.monotonic()
+            if len(self._marks) > self.max_entries:
+                self._marks = {key: expires for key, expires in self._marks.items() if expires > now}
+            for key in keys:
+                self._marks[key] = now + ttl
+
+    def any_marked(self, keys):
+        now = time.monotonic()
+        with self._lock:
+            return any(self._marks.get(key, 0) > now for key in keys)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self._marks.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class RedisError(Exception):
+    pass
+
+
+class RedisBackend:
+    """
+    Shared store speaking the Redis protocol (RESP) over TCP.
+
+    Works with Redis or any server that implements GET, SET ... EX, MGET, INCR and EXISTS,
+    such as a local stand-in during development. Each thread keeps its own
+    connection. Entries expire through Redis TTLs while tag counters have none,
+    so run the server with a ``volatile-*`` eviction policy.
+    """
+
+    def __init__(self, url, timeout=0.5):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.database = int(parsed.path.lstrip('/') or 0)
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def get(self, key):
+        return self._execute(('GET', key))[0]
+
+    def set(self, key, value, ttl):
+        self._execute(('SET', key, value, 'EX', max(1, int(ttl))))
+
+    def get_versions(self, tags):
+        if not tags:
+            return []
+        return [int(version or 0) for version in self._execute(('MGET', *tags))[0]]
+
+    def bump_versions(self, tags):
+        if tags:
+            self._execute(*(('INCR', tag) for tag in tags))
+
+    def mark(self, keys, ttl):
+        if keys:
+            self._execute(*(('SET', key, 1, 'EX', max(1, int(ttl))) for key in keys))
+
+    def any_marked(self, keys):
+        return bool(keys) and self._execute(('EXISTS', *keys))[0] > 0
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            connection = (sock, sock.makefile('rb'))
+            self._local.connection = connection
+            setup = []
+            if self.password:
+                setup.append(('AUTH', self.password))
+            if self.database:
+                setup.append(('SELECT', self.database))
+            if setup:
+                self._execute(*setup)
+        return connection
+
+    def _execute(self, *commands):
+        """Send ``commands`` as one pipeline and return their replies in order."""
+        sock, reader = self._connection()
+        try:
+            sock.sendall(b''.join(self._encode(command) for command in commands))
+            return [self._read_reply(reader) for _ in commands]
+        except OSError:
+            self._close()
+            raise
+
+    def _close(self):
+        connection = getattr(self._local, 'connection', None)
+        self._local.connection = None
+        if connection:
+            connection[1].close()
+            connection[0].close()
+
+    @staticmethod
+    def _encode(command):
+        parts = [b'*%d\r\n' % len(command)]
+        for arg in command:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode()
+            parts.append(b'$%d\r\n%s\r\n' % (len(arg), arg))
+        return b''.join(parts)
+
+    def _read_reply(self, reader):
+        line = reader.readline()
+        if not line.endswith(b'\r\n'):
+            raise ConnectionError('Connection closed by the cache server')
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload
+        if kind == b'-':
+            raise RedisError(payload.decode())
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            length = int(payload)
+            return None if length < 0 else [self._read_reply(reader) for _ in range(length)]
+        raise RedisError(f'Unexpected reply from the cache server: {line!r}')
+
+
+class ResponseCache:
+    """
+    Caches rendered responses of public GET routes, tagged by the entities they show.
+
+    Every entry records the version of each of its tags when the view started
+    running. Writes bump the versions of the tags they affect, which makes every
+    entry carrying those tags stale at once, including one being computed
+    concurrently from data read before the write.
+    """
+
+    def __init__(self):
+        self.backend = None
+        self.ttl = 0
+        # Seconds writes are remembered for, see ``record_writes``; 0 unless read replicas are in use
+        self.write_window = 0
+        self._local_marks = MemoryBackend(10000)
+        self._suspended_until = 0
+        self._stats = {'hits': 0, 'misses': 0, 'stale': 0, 'stores': 0, 'invalidations': 0, 'errors': 0}
+
+    def configure(self, backend, ttl):
+        self.backend = backend
+        self.ttl = ttl
+        self._suspended_until = 0
+
+    @property
+    def available(self):
+        return self.backend is not None and time.monotonic() >= self._suspended_until
+
+    def lookup(self, key):
+        """Return ``(status, headers, body, variants)`` of a fresh entry, or None; see ``store_body``."""
+        if not self.available:
+            return None
+        try:
+            value = self.backend.get(KEY_PREFIX + key)
+            if value is None:
+                self._stats['misses'] += 1
+                return None
+            meta, body, variants = self._decode(value)
+            tags = list(meta['tags'])
+            if self.backend.get_versions([TAG_PREFIX + tag for tag in tags]) != [meta['tags'][tag] for tag in tags]:
+                self._stats['stale'] += 1
+                return None
+        except (OSError, RedisError, ValueError) as error:
+            self._error('read', error)
+            return None
+        self._stats['hits'] += 1
+        return meta['status'], meta['headers'], body, variants
+
+    def tag_versions(self, tags):
+        if not self.available:
+            return None
+        if not tags:
+            return {}
+        try:
+            return dict(zip(tags, self.backend.get_versions([TAG_PREFIX + tag for tag in tags])))
+        except (OSError, RedisError) as error:
+            self._error('read', error)
+            return None
+
+    def store(self, key, response, tag_versions):
+        return self.store_body(key, response.status_code, response.headers.items(), response.get_data(), tag_versions)
+
+    def store_body(self, key, status, headers, body, tag_versions):
+        """
+        Store a response together with its compressed variants, so hits never compress.
+
+        Returns:
+            dict: The compressed variants of ``body`` per coding, empty if it is not
+            worth compressing or the cache is unavailable.
+        """
+        if not self.available:
+            return {}
+        headers = [[name, value] for name, value in headers if name.lower() not in UNCACHED_HEADERS]
+        content_type = next((value for name, value in headers if name.lower() == 'content-type'), '')
+        variants = compression.precompress(body, parse_options_header(content_type)[0])
+        meta = {'status': status, 'headers': headers, 'tags': tag_versions}
+        try:
+            self.backend.set(KEY_PREFIX + key, self._encode(meta, body, variants), self.ttl)
+            self._stats['stores'] += 1
+        except (OSError, RedisError) as error:
+            self._error('write', error)
+        return variants
+
+    def invalidate(self, *tags):
+        """Make every cached response carrying any of ``tags`` stale."""
+        if self.backend is None or not tags:
+            return
+        try:
+            self.backend.bump_versions([TAG_PREFIX + tag for tag in tags])
+            self._stats['invalidations'] += len(tags)
+        except (OSError, RedisError) as error:
+            self._error('invalidate', error)
+        self.record_writes(*tags)
+
+    def record_writes(self, *keys):
+        """
+        Remember for ``write_window`` seconds that ``keys`` (tags, or ``user:<id>``) were written.
+
+        Reads of recently written data go to the primary database instead of a
+        replica that may not have the write yet. Without a backend the marks are
+        kept in this process only.
+        """
+        if not self.write_window or not keys:
+            return
+        try:
+            (self.backend or self._local_marks).mark([WRITE_PREFIX + key for key in keys], self.write_window)
+        except (OSError, RedisError) as error:
+            self._error('write', error)
+
+    def written_recently(self, keys):
+        """Whether any of ``keys`` was written within ``write_window`` seconds; True when unsure."""
+        if not self.write_window or not keys:
+            return False
+        if self.backend is not None and not self.available:
+            return True
+        try:
+            return (self.backend or self._local_marks).any_marked([WRITE_PREFIX + key for key in keys])
+        except (OSError, RedisError) as error:
+            self._error('read', error)
+            return True
+
+    def stats(self):
+        return {'backend': type(self.backend).__name__ if self.backend else None, **self._stats}
+
+    def _error(self, operation, error):
+        self._stats['errors'] += 1
+        self._suspended_until = time.monotonic() + ERROR_BACKOFF
+        logger.warning('Response cache %s failed: %s', operation, error)
+
+    @staticmethod
+    def _encode(meta, body, variants):
+        # The variants follow the body in the same value; the header records where each one ends
+        meta = dict(meta, encodings=[[coding, len(data)] for coding, data in variants.items()])
+        return b''.join([json.dumps(meta, separators=(',', ':')).encode(), b'\n', body, *variants.values()])
+
+    @staticmethod
+    def _decode(value):
+        header, _, data = value.partition(b'\n')
+        meta = json.loads(header)
+        variants = {}
+        end = len(data)
+        for coding, length in reversed(meta.pop('encodings', ())):
+            variants[coding] = data[end - length:end]
+            end -= length
+        return meta, data[:end], variants
+
+
+response_cache = ResponseCache()
+
+
+def init_response_cache(app):
+    """Select the response cache backend from ``RESPONSE_CACHE_BACKEND``: ``memory``, ``redis`` or ``none``."""
+    backend_name = app.config['RESPONSE_CACHE_BACKEND']
+    if backend_name == 'memory':
+        backend = MemoryBackend(app.config['RESPONSE_CACHE_MAX_ENTRIES'])
+    elif backend_name == 'redis':
+        backend = RedisBackend(app.config['RESPONSE_CACHE_URL'])
+    elif backend_name == 'none':
+        backend = None
+    else:
+        raise ValueError(f'Unknown RESPONSE_CACHE_BACKEND: {backend_name}')
+    response_cache.configure(backend, app.config['RESPONSE_CACHE_TTL'])
+
+
+def check_shared_cache(workers):
+    """
+    Make sure ``workers`` server processes see each other's invalidations.
+
+    The memory backend lives in each process, so a write only invalidates the
+    entries of the worker that handled it; the others keep serving the old
+    responses until their TTL runs out. Without a backend, the marks that pin
+    reads of fresh writes to the primary are per process in the same way.
+
+    Raises:
+        CacheNotShared: If several workers would run with the memory backend.
+    """
+    if workers <= 1:
+        return
+    if isinstance(response_cache.backend, MemoryBackend):
+        raise CacheNotShared(
+            f'{workers} workers would each keep their own memory response cache, and writes would only '
+            'invalidate the entries of the worker that handled them. Set RESPONSE_CACHE_BACKEND=redis '
+            '(or none), or run with WEB_WORKERS=1.'
+        )
+    if response_cache.backend is None and response_cache.write_window:
+        logger.warning(
+            'Without a response cache backend, each of the %d workers only knows its own recent writes; '
+            'reads of data another worker just wrote may go to a replica that does not have it yet', workers
+        )
+
+
+def target_tag(aspect, course_id=None, course_instructor_id=None):
+    """Tag for the ratings or comments (``aspect``) of a course or of a course-instructor pair."""
+    if course_id:
+        return f'course:{course_id}:{aspect}'
+    return f'course_instructor:{course_instructor_id}:{aspect}'
+
+
+def tag_response(*tags):
+    """Attach tags that are only known once the view is running, e.g. after resolving a course-instructor pair."""
+    from .database import leave_replica_if_written
+
+    leave_replica_if_written(tags)
+    pending = g.get('response_cache_tags')
+    if pending is None:
+        return
+    versions = response_cache.tag_versions(list(tags))
+    if versions is None:
+        g.response_cache_tags = None
+    else:
+        pending.update(versions)
+
+
+def cached_response(tags=None, vary_on_identity=False):
+    """
+    Serve a GET route from the response cache, with conditional GET support.
+
+    Only 200 responses are stored, together with a strong ETag over their body
+    and their gzip and brotli variants, which hits replay as negotiated. A request whose ``If-None-Match`` matches a fresh cache entry gets a 304
+    without the view running at all. Streamed responses go out as they are
+    produced and are stored once complete, unless they outgrow
+    ``RESPONSE_CACHE_MAX_STREAMED_BYTES``. Tags are the entities the response shows;
+    ``response_cache.invalidate`` on any of them drops it. The route's
+    ``Cache-Control`` policy comes from ``Config.CACHE_CONTROL``.
+
+    Args:
+        tags (callable | None): Called with the view arguments; returns the response's tags.
+        vary_on_identity (bool): Key entries by the JWT identity too, for per-user responses.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(**view_args):
+            key = request.full_path
+            if vary_on_identity:
+                key = f'{get_jwt_identity()}|{key}'
+
+            cached = response_cache.lookup(key)
+            if cached is not None:
+                status, headers, body, variants = cached
+                response = make_response(body, status)
+                response.headers.clear()
+                response.headers.extend(headers)
+                response.headers['X-Cache'] = 'HIT'
+                return _conditional(compression.apply(response, variants), vary_on_identity)
+
+            # Read tag versions before the view so writes made while it runs invalidate the result
+            g.response_cache_tags = response_cache.tag_versions(list(tags(**view_args)) if tags else [])
+            response = make_response(view(**view_args))
+            tag_versions = g.pop('response_cache_tags', None)
+            if response.status_code == 200 and response.is_streamed:
+                if tag_versions is not None:
+                    response.response = _store_when_complete(key, response, tag_versions)
+            elif response.status_code == 200:
+                response.add_etag()
+                if tag_versions is not None:
+                    compression.apply(response, response_cache.store(key, response, tag_versions))
+            response.headers['X-Cache'] = 'MISS'
+            return _conditional(response, vary_on_identity)
+        return wrapper
+    return decorator
+
+
+def _store_when_complete(key, response, tag_versions):
+    """
+    Pass a streamed body through unchanged and store it in the cache once it has been sent.
+
+    The store runs when the server closes the response, after the last byte has
+    gone out, so compressing the cached variants does not hold up the client.
+    """
+    limit = current_app.config['RESPONSE_CACHE_MAX_STREAMED_BYTES']
+    status, headers = response.status_code, list(response.headers.items())
+    body = response.response
+    received = {'chunks': [], 'size': 0, 'complete': False}
+
+    def generate():
+        try:
+            for chunk in body:
+                if received['chunks'] is not None:
+                    received['size'] += len(chunk)
+                    if received['size'] > limit:
+                        received['chunks'] = None
+                    else:
+                        received['chunks'].append(chunk)
+                yield chunk
+            # Only reached when the client read the whole body
+            received['complete'] = True
+        finally:
+            if hasattr(body, 'close'):
+                body.close()
+
+    def store():
+        if received['complete'] and received['chunks'] is not None:
+            data = b''.join(received['chunks'])
+            response_cache.store_body(key, status, headers + [('ETag', quote_etag(generate_etag(data)))], data, tag_versions)
+
+    response.call_on_close(store)
+    return generate()
+
+
+def _conditional(response, vary_on_identity):
+    """Apply the route's Cache-Control policy and turn the response into a 304 if ``If-None-Match`` matches."""
+    if response.status_code != 200:
+        return response
+    policy = current_app.config['CACHE_CONTROL'].get(request.endpoint, current_app.config['CACHE_CONTROL_DEFAULT'])
+    if vary_on_identity:
+        # Per-user responses must never be stored by shared caches
+        policy = ', '.join(['private'] + [part for part in policy.split(', ') if part != 'public'])
+        response.vary.add('Authorization')
+    response.headers['Cache-Control'] = policy
+    if response.is_streamed:
+        # Has no ETag to match yet, and make_conditional would buffer the body to set Content-Length
+        return response
+    return response.make_conditional(request)
+
+
+def _invalidate_courses(changed, deleted_ids):
+    response_cache.invalidate('courses', *(f'course:{course_id}' for course_id in set(changed) | deleted_ids))
+
+
+subscribe(_invalidate_courses)
+
+
+@event.listens_for(Session, 'after_flush')
+def _collect_instructor_tags(session, flush_context):
+    # Instructors show on their own pages and on those of the courses they teach
+    tags = session.info.setdefault('instructor_tags', set())
+    instructor_ids = set()
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, Instructor):
+            instructor_ids.add(obj.id)
+            tags.update(('instructors', f'instructor:{obj.id}'))
+        elif isinstance(obj, CourseInstructor):
+            tags.update((f'instructor:{obj.instructor_id}', f'course:{obj.course_id}'))
+    if instructor_ids:
+        course_ids = session.connection().execute(
+            select(CourseInstructor.course_id).where(CourseInstructor.instructor_id.in_(instructor_ids)).distinct()
+        ).scalars()
+        tags.update(f'course:{course_id}' for course_id in course_ids)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_instructors(session):
+    tags = session.info.pop('instructor_tags', None)
+    if tags:
+        response_cache.invalidate(*sorted(tags))
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_instructor_tags(session):
+    session.info.pop('instructor_tags', None)
@@ -0,0 +1,149 @@
+# app/serializers.py
+import json
+from datetime import date
+from itertools import islice
+from operator import attrgetter
+from flask import current_app, stream_with_context
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - the stdlib encoder is the fallback
+    orjson = None
+
+
+class Schema:
+    """
+    The fields of one model's JSON representation.
+
+    ``dump`` reads attributes, so it accepts ORM instances, result rows and
+    reference-cache named tuples alike. Datetimes are left as they are; the
+    encoder writes them as ISO 8601 strings.
+    """
+
+    def __init__(self, *fields):
+        self.fields = fields
+        self._get = attrgetter(*fields)
+
+    def dump(self, obj):
+        return dict(zip(self.fields, self._get(obj)))
+
+    def dump_many(self, objs):
+        fields, get = self.fields, self._get
+        return [dict(zip(fields, get(obj))) for obj in objs]
+
+    def only(self, *fields):
+        """Return a schema with a subset of the fields, in this schema's order."""
+        return Schema(*(field for field in self.fields if field in fields))
+
+
+# One schema per model in app/models.py, listing the fields the API exposes
+USER_SCHEMA = Schema('id', 'email', 'name', 'created_at')
+COURSE_SCHEMA = Schema('id', 'course_code', 'name', 'unit', 'description', 'created_at')
+COURSE_SUMMARY_SCHEMA = COURSE_SCHEMA.only('id', 'course_code', 'name', 'description', 'created_at')
+INSTRUCTOR_SCHEMA = Schema('id', 'name', 'profile_url', 'created_at')
+COURSE_INSTRUCTOR_SCHEMA = Schema('id', 'course_id', 'instructor_id', 'semester', 'created_at')
+RATING_DIMENSION_SCHEMA = Schema('id', 'name', 'description')
+RATING_SCHEMA = Schema('id', 'user_id', 'course_id', 'course_instructor_id', 'rating_dimension_id', 'score', 'created_at')
+COMMENT_SCHEMA = Schema(
+    'id', 'user_id', 'course_id', 'course_instructor_id', 'parent_comment_id', 'content', 'like_count', 'created_at'
+)
+LIKE_SCHEMA = Schema('id', 'user_id', 'comment_id', 'created_at')
+FOLLOW_SCHEMA = Schema('id', 'user_id', 'course_id', 'created_at')
+
+
+def _default(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    # Decimal, UUID, dataclasses and the like, as Flask's own encoder handles them
+    return DefaultJSONProvider.default(value)
+
+
+def dumps_stdlib(data, sort_keys=False):
+    """Encode ``data`` with the standard library, writing datetimes the way orjson does."""
+    return json.dumps(data, default=_default, sort_keys=sort_keys, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+if orjson is not None:
+    _OPTIONS = orjson.OPT_NON_STR_KEYS
+
+    def dumps(data, sort_keys=False):
+        """
+        Encode ``data`` as compact JSON bytes.
+
+        Uses orjson when it is installed and the standard library otherwise.
+        Datetimes become ISO 8601 strings; dict keys may be ints.
+        """
+        return orjson.dumps(data, default=_default, option=(_OPTIONS | orjson.OPT_SORT_KEYS) if sort_keys else _OPTIONS)
+
+    loads = orjson.loads
+else:  # pragma: no cover
+    dumps = dumps_stdlib
+    loads = json.loads
+
+
+class JSONProvider(DefaultJSONProvider):
+    """Routes ``jsonify`` and ``request.get_json`` through ``dumps``/``loads`` above."""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj, sort_keys=kwargs.get('sort_keys', self.sort_keys)).decode()
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj, sort_keys=self.sort_keys) + b'\n', mimetype=self.mimetype)
+
+
+def page_response(items, next_cursor=None, total_estimate=None, ndjson=False):
+    """
+    Response for one page of a paginated list.
+
+    The cursor of the next page goes in ``X-Next-Cursor`` (absent on the last page)
+    and the estimated number of rows in the whole list in ``X-Total-Count-Estimate``.
+    """
+    response = json_stream(items, ndjson=True) if ndjson else current_app.json.response(items)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    if total_estimate is not None:
+        response.headers['X-Total-Count-Estimate'] = str(total_estimate)
+    return response
+
+
+def json_stream(items, ndjson=False, batch_size=500):
+    """
+    Stream ``items`` as a JSON array, or as NDJSON (one document per line), without holding them all.
+
+    Items are encoded ``batch_size`` at a time, so the body goes out in chunks of
+    a few hundred rows. The array form is byte for byte what ``jsonify`` would
+    have produced for the same list.
+
+    Args:
+        items (iterable): Dicts to send, typically from ``queries.iter_dicts``.
+        ndjson (bool): Send ``application/x-ndjson`` instead of a JSON array.
+        batch_size (int): Items encoded per chunk.
+
+    Returns:
+        Response: A streamed response; the request context stays open until it is exhausted.
+    """
+    sort_keys = current_app.json.sort_keys
+    items = iter(items)
+
+    def generate():
+        separator = b'['
+        while True:
+            batch = list(islice(items, batch_size))
+            if not batch:
+                break
+            if ndjson:
+                yield b'\n'.join(dumps(item, sort_keys=sort_keys) for item in batch) + b'\n'
+            else:
+                # Strip the brackets of each encoded batch and splice the batches into one array
+                yield separator + dumps(batch, sort_keys=sort_keys)[1:-1]
+                separator = b','
+        if not ndjson:
+            yield (b'[' if separator == b'[' else b'') + b']\n'
+
+    mimetype = 'application/x-ndjson' if ndjson else 'application/json'
+    return current_app.response_class(stream_with_context(generate()), mimetype=mimetype)
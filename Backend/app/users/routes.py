@@ -1,7 +1,11 @@
 # app/users/routes.py
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..models import User, Follow
+from ..models import User
+from ..queries import FOLLOW_KEYSET, followed_courses, parse_fields, parse_page_args
+from ..response_cache import cached_response
+from ..serializers import COURSE_SUMMARY_SCHEMA, USER_SCHEMA, page_response
+from config import Config
 
 
 users_bp = Blueprint('users', __name__)
@@ -14,13 +18,7 @@ def get_profile():
     # print(type(user_id), user_id)
     user = User.query.get(user_id)
     if user:
-        user_data = {
-            'id': user.id,
-            'email': user.email,
-            'name': user.name,
-            'created_at': user.created_at.isoformat()
-        }
-        return jsonify(user_data), 200
+        return jsonify(USER_SCHEMA.dump(user)), 200
     else:
         return jsonify({'message': 'User not found.'}), 404
 
@@ -28,14 +26,21 @@ def get_profile():
 
 @users_bp.route('/me/followed-courses', methods=['GET'])
 @jwt_required()
+@cached_response(tags=lambda: [f'user:{get_jwt_identity()}:follows', 'courses'], vary_on_identity=True)
 def get_followed_courses():
     user_id = get_jwt_identity()
-    follows = Follow.query.filter_by(user_id=user_id).all()
-    courses = [{
-        'id': follow.course.id,
-        'course_code': follow.course.course_code,
-        'name': follow.course.name,
-        'description': follow.course.description,
-        'created_at': follow.course.created_at.isoformat()
-    } for follow in follows]
-    return jsonify(courses), 200
+    fields = parse_fields(request.args.get('fields'), COURSE_SUMMARY_SCHEMA)
+    if fields is None:
+        return jsonify({'message': f'fields must be a comma-separated subset of {", ".join(COURSE_SUMMARY_SCHEMA.fields)}.'}), 400
+
+    # Without limit or cursor every followed course is returned, as before pagination existed
+    if 'limit' not in request.args and 'cursor' not in request.args:
+        courses, _ = followed_courses(user_id, fields)
+        return jsonify(courses), 200
+
+    limit, after, error = parse_page_args(request.args, FOLLOW_KEYSET, Config.LIST_DEFAULT_LIMIT, Config.LIST_MAX_LIMIT)
+    if error:
+        return jsonify({'message': error}), 400
+
+    courses, next_cursor = followed_courses(user_id, fields, limit, after)
+    return page_response(courses, next_cursor), 200
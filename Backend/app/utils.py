@@ -1,9 +1,92 @@
 # app/utils.py
+import base64
+import json
 from passlib.hash import bcrypt
+from sqlalchemy.dialects import postgresql, sqlite
+from .models import db
+from config import Config
 
 def hash_password(password):
-    return bcrypt.hash(password)
+    return bcrypt.using(rounds=Config.BCRYPT_ROUNDS).hash(password)
 
 def verify_password(password, password_hash):
     return bcrypt.verify(password, password_hash)
 
+def password_needs_rehash(password_hash):
+    """True if ``password_hash`` is not a bcrypt hash at the configured ``BCRYPT_ROUNDS``."""
+    if not password_hash.startswith('$2'):
+        return True
+    return bcrypt.using(rounds=Config.BCRYPT_ROUNDS).needs_update(password_hash)
+
+
+def parse_id_list(raw, max_ids):
+    """
+    Parse a comma-separated list of integer ids such as ``"1,2,3"``.
+
+    Duplicates are dropped while keeping the first-seen order.
+
+    Args:
+        raw (str): The raw query-string value.
+        max_ids (int): The largest number of distinct ids accepted.
+
+    Returns:
+        list | None: The parsed ids, or None if the value is empty, malformed or too long.
+    """
+    if not raw:
+        return None
+    try:
+        ids = list(dict.fromkeys(int(part) for part in raw.split(',') if part.strip()))
+    except ValueError:
+        return None
+    if not ids or len(ids) > max_ids:
+        return None
+    return ids
+
+def upsert_insert(model):
+    """
+    Return a dialect-specific INSERT for ``model`` that supports ``on_conflict_do_update``.
+
+    PostgreSQL and SQLite share the ``INSERT ... ON CONFLICT`` syntax, so callers
+    can build one statement and run it on either backend.
+    """
+    dialect = db.session.get_bind(mapper=model.__mapper__).dialect.name
+    if dialect == 'postgresql':
+        return postgresql.insert(model)
+    if dialect == 'sqlite':
+        return sqlite.insert(model)
+    raise NotImplementedError(f'Upserts are not supported on {dialect}.')
+
+def encode_cursor(values):
+    """Encode keyset pagination values (e.g. ``[rank, id]``) as an opaque URL-safe cursor."""
+    raw = json.dumps(values, separators=(',', ':'), default=str).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(cursor, length):
+    """
+    Decode a cursor produced by ``encode_cursor``.
+
+    Args:
+        cursor (str): The opaque cursor from the client.
+        length (int): The number of values the cursor must hold.
+
+    Returns:
+        list | None: The decoded values, or None if the cursor is malformed.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (ValueError, TypeError):
+        return None
+    if not isinstance(values, list) or len(values) != length:
+        return None
+    return values
+
+def parse_limit(raw, default, maximum):
+    """Parse a ``limit`` query parameter, returning None if it is not an integer in ``1..maximum``."""
+    if raw is None:
+        return default
+    try:
+        limit = int(raw)
+    except ValueError:
+        return None
+    return limit if 1 <= limit <= maximum else None
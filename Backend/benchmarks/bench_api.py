@@ -0,0 +1,361 @@
+# benchmarks/bench_api.py
+"""
+Benchmark every route of the API document and fail on regressions against a stored baseline.
+
+Usage: python -m benchmarks.bench_api [--scale small|medium|full] [--database-url URL [--reuse]]
+                                      [--requests 100] [--rounds 3] [--only TEXT] [--cache]
+                                      [--save-baseline] [--tolerance 0.25] [--min-delta-ms 2]
+
+Seeds a database with ``benchmarks.seed_data`` (or, with --reuse, uses one
+seeded earlier at that scale), then drives each route through the Flask test
+client, one request at a time: a tenth of ``--requests`` untimed to warm
+caches and indexes, then ``--requests`` timed. Routes that hash passwords get
+a tenth as many. The whole list runs ``--rounds`` times and each route keeps
+its best round, so a burst of load elsewhere on the machine does not read as
+a regression. Reads pick random courses, instructors, comments and users;
+writes go through fresh users, so likes and follows never collide with
+seeded ones, and every DELETE undoes a request of the matching POST. The
+response cache is disabled unless --cache is given, so every request does its
+full work, and Hunter is replaced by a local fake.
+
+Reports requests per second and p50/p95/p99 latency per route. Results are
+compared with the entry of ``benchmarks/baseline.json`` recorded for the same
+scale, database and cache setting: a route regresses when its p50 or p95 is
+more than ``--tolerance`` (a fraction) and ``--min-delta-ms`` slower. p99 is
+shown but not compared, as a few hundred requests make it noisy. Exits non-zero
+on regressions or failed requests. --save-baseline records the run as the new
+baseline; record it on the machine the comparisons will run on.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import re
+import sys
+import time
+from datetime import datetime, timezone
+
+from flask_jwt_extended import create_access_token
+from werkzeug.exceptions import MethodNotAllowed, NotFound
+
+from app import create_app
+from app.auth.hunter import hunter_client
+from app.models import db, Comment, Course, CourseInstructor, Instructor, User
+from app.response_cache import response_cache
+from config import Config
+from tests.fake_hunter import start_fake_hunter
+from .common import WORDS, create_bench_app, summarize
+from .seed_data import BENCH_PASSWORD, DIMENSIONS, SCALES, seed_database
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+API_DOC = os.path.join(os.path.dirname(os.path.dirname(BENCH_DIR)), 'API_doc_20241225.yaml')
+BASELINE = os.path.join(BENCH_DIR, 'baseline.json')
+API_PREFIX = '/v1/api'
+# Users the write routes act as; they start with no likes, follows or ratings
+WRITERS = 50
+READERS = 50
+# Share of --requests given to routes that run bcrypt
+SLOW_SHARE = 0.1
+
+
+def documented_routes():
+    """``(method, path)`` of every operation under ``paths:`` in the API document."""
+    routes, path = [], None
+    with open(API_DOC) as doc:
+        for line in doc:
+            match = re.match(r'^  (/\S*):\s*$', line)
+            if match:
+                path = match.group(1)
+                continue
+            match = re.match(r'^    (get|post|put|patch|delete):\s*$', line)
+            if match and path:
+                routes.append((match.group(1).upper(), path))
+    return routes
+
+
+def is_served(app, method, path):
+    adapter = app.url_map.bind('localhost')
+    try:
+        adapter.match(API_PREFIX + re.sub(r'\{\w+\}', '1', path), method=method)
+    except (NotFound, MethodNotAllowed):
+        return False
+    return True
+
+
+class Workload:
+    """Ids and tokens the scenarios draw from, read from the seeded database."""
+
+    def __init__(self, app, seed):
+        self.rng = random.Random(seed)
+        run = datetime.now(timezone.utc).strftime('%Y%m%d%H%M%S')
+        self.domain = Config.PERMITTED_EMAIL_DOMAINS[0]
+        with app.app_context():
+            self.user_ids = [user_id for user_id, in db.session.query(User.id)]
+            self.course_ids = [course_id for course_id, in db.session.query(Course.id)]
+            self.instructor_ids = [instructor_id for instructor_id, in db.session.query(Instructor.id)]
+            self.course_instructors = db.session.query(
+                CourseInstructor.id, CourseInstructor.course_id, CourseInstructor.instructor_id
+            ).all()
+            self.course_instructor_ids = [row.id for row in self.course_instructors]
+            self.max_comment_id = db.session.query(db.func.max(Comment.id)).scalar() or 0
+            writers = [
+                User(email=f'bench-{run}-{index}@{self.domain}', password_hash='x', name=f'bench-{run}-{index}')
+                for index in range(WRITERS)
+            ]
+            db.session.add_all(writers)
+            db.session.commit()
+            self.writers = [self._token(user.id) for user in writers]
+            self.readers = [self._token(user_id) for user_id in self.rng.sample(self.user_ids, min(READERS, len(self.user_ids)))]
+            self.login_emails = [
+                email for email, in db.session.query(User.email).filter(User.password_hash != 'x').limit(READERS)
+            ]
+        self.run = run
+
+    @staticmethod
+    def _token(user_id):
+        return {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+
+    def course(self):
+        return self.rng.choice(self.course_ids)
+
+    def ids(self, values, count=20):
+        return ','.join(str(value) for value in self.rng.sample(values, min(count, len(values))))
+
+    def reader(self):
+        return self.rng.choice(self.readers)
+
+    def distinct_pairs(self, count, items):
+        """``count`` distinct (writer headers, item) pairs, in random order."""
+        chosen = self.rng.sample(range(len(self.writers) * len(items)), min(count, len(self.writers) * len(items)))
+        return [(self.writers[index % len(self.writers)], items[index // len(self.writers)]) for index in chosen]
+
+
+def scenarios(workload, requests, rounds=1):
+    """
+    The benchmarked requests, in the order they run.
+
+    Returns:
+        list: ``(name, method, documented path, requests, make_request)`` tuples, where
+        ``make_request(index)`` returns the URL and test client keyword arguments;
+        ``index`` counts on across rounds.
+    """
+    w = workload
+    slow = max(5, int(requests * SLOW_SHARE))
+    total = (requests + max(1, requests // 10)) * rounds
+    like_pairs = w.distinct_pairs(total, range(1, w.max_comment_id + 1))
+    follow_pairs = w.distinct_pairs(total, w.course_ids)
+
+    def course_instructor():
+        return w.rng.choice(w.course_instructors)
+
+    def rating_body(index):
+        return {'course_id': w.course(), 'ratings': [
+            {'rating_dimension_id': dimension, 'score': w.rng.randint(1, 5)} for dimension in range(1, len(DIMENSIONS) + 1)
+        ]}
+
+    return [
+        ('POST /auth/register', 'POST', '/auth/register', slow, lambda i: (
+            '/auth/register', {'json': {
+                'email': f'student-{w.run}-{i}@{w.domain}', 'password_hash': BENCH_PASSWORD, 'name': f'student-{w.run}-{i}'
+            }})),
+        ('POST /auth/login', 'POST', '/auth/login', slow, lambda i: (
+            '/auth/login', {'json': {'email': w.rng.choice(w.login_emails), 'password_hash': BENCH_PASSWORD}})),
+        ('GET /users/me', 'GET', '/users/me', requests, lambda i: ('/users/me', {'headers': w.reader()})),
+        ('GET /courses (whole catalog)', 'GET', '/courses', max(5, requests // 10), lambda i: ('/courses', {})),
+        ('GET /courses?limit=50', 'GET', '/courses', requests, lambda i: ('/courses?limit=50', {})),
+        ('GET /courses?sort=dimension', 'GET', '/courses', requests, lambda i: (
+            f'/courses?sort=dimension:{w.rng.choice(DIMENSIONS)}&limit=50', {})),
+        ('GET /courses/{course_id}', 'GET', '/courses/{course_id}', requests, lambda i: (
+            f'/courses/{w.course()}', {})),
+        ('GET /courses/{course_id}/page', 'GET', '/courses/{course_id}/page', requests, lambda i: (
+            f'/courses/{w.course()}/page', {'headers': w.reader()})),
+        ('GET /courses/search', 'GET', '/courses/search', requests, lambda i: (
+            f'/courses/search?q={w.rng.choice(WORDS)}&limit=20', {})),
+        ('GET /courses/suggest', 'GET', '/courses/suggest', requests, lambda i: (
+            f'/courses/suggest?prefix={w.rng.choice(WORDS)[:w.rng.randint(1, 4)]}', {})),
+        ('GET /instructors?limit=50', 'GET', '/instructors', requests, lambda i: ('/instructors?limit=50', {})),
+        ('GET /instructors/{instructor_id}', 'GET', '/instructors/{instructor_id}', requests, lambda i: (
+            f'/instructors/{w.rng.choice(w.instructor_ids)}', {})),
+        ('POST /ratings', 'POST', '/ratings', requests, lambda i: (
+            '/ratings', {'headers': w.reader(), 'json': rating_body(i)})),
+        ('GET /ratings/courses', 'GET', '/ratings/courses', requests, lambda i: (
+            f'/ratings/courses?ids={w.ids(w.course_ids)}', {})),
+        ('GET /ratings/course-instructors', 'GET', '/ratings/course-instructors', requests, lambda i: (
+            f'/ratings/course-instructors?ids={w.ids(w.course_instructor_ids)}', {})),
+        ('GET /ratings/courses/{course_id}', 'GET', '/ratings/courses/{course_id}', requests, lambda i: (
+            f'/ratings/courses/{w.course()}', {})),
+        ('GET /ratings/courses/{course_id}/instructors/{instructor_id}', 'GET',
+         '/ratings/courses/{course_id}/instructors/{instructor_id}', requests, lambda i: (
+            '/ratings/courses/{1}/instructors/{2}'.format(*course_instructor()), {})),
+        ('GET /ratings/instructors/{instructor_id}', 'GET', '/ratings/instructors/{instructor_id}', requests, lambda i: (
+            f'/ratings/instructors/{w.rng.choice(w.instructor_ids)}', {})),
+        ('GET /ratings/my-ratings', 'GET', None, requests, lambda i: (
+            f'/ratings/my-ratings?course_id={w.course()}', {'headers': w.reader()})),
+        ('POST /comments', 'POST', '/comments', requests, lambda i: (
+            '/comments', {'headers': w.reader(), 'json': {
+                'course_id': w.course(), 'content': ' '.join(w.rng.choices(WORDS, k=w.rng.randint(5, 40)))
+            }})),
+        ('GET /comments/courses/{course_id}', 'GET', '/comments/courses/{course_id}', requests, lambda i: (
+            f'/comments/courses/{w.course()}', {})),
+        ('GET /comments/courses/{course_id}/instructors/{instructor_id}', 'GET',
+         '/comments/courses/{course_id}/instructors/{instructor_id}', requests, lambda i: (
+            '/comments/courses/{1}/instructors/{2}'.format(*course_instructor()), {})),
+        ('POST /likes/comments/{comment_id}', 'POST', '/likes/comments/{comment_id}', requests, lambda i: (
+            f'/likes/comments/{like_pairs[i][1]}', {'headers': like_pairs[i][0]})),
+        ('DELETE /likes/comments/{comment_id}', 'DELETE', '/likes/comments/{comment_id}', requests, lambda i: (
+            f'/likes/comments/{like_pairs[i][1]}', {'headers': like_pairs[i][0]})),
+        ('POST /follows/courses/{course_id}', 'POST', '/follows/courses/{course_id}', requests, lambda i: (
+            f'/follows/courses/{follow_pairs[i][1]}', {'headers': follow_pairs[i][0]})),
+        ('DELETE /follows/courses/{course_id}', 'DELETE', '/follows/courses/{course_id}', requests, lambda i: (
+            f'/follows/courses/{follow_pairs[i][1]}', {'headers': follow_pairs[i][0]})),
+        ('GET /users/me/followed-courses', 'GET', '/users/me/followed-courses', requests, lambda i: (
+            '/users/me/followed-courses?limit=50', {'headers': w.reader()})),
+        ('GET /ops/cache-stats', 'GET', '/ops/cache-stats', requests, lambda i: ('/ops/cache-stats', {})),
+    ]
+
+
+def run_scenario(client, method, requests, make_request, first_index=0):
+    """
+    Send ``requests`` timed requests after a tenth as many untimed ones.
+
+    Returns:
+        tuple: Latencies of the timed requests in milliseconds, their total
+        seconds, and ``(url, status)`` of every request that did not succeed.
+    """
+    warmup = max(1, requests // 10)
+    latencies, failures = [], []
+    started = None
+    for index in range(warmup + requests):
+        if index == warmup:
+            started = time.perf_counter()
+        url, kwargs = make_request(first_index + index)
+        start = time.perf_counter()
+        # Buffered, so streamed bodies are produced in full and close callbacks run, as for a real client
+        response = client.open(API_PREFIX + url, method=method, buffered=True, **kwargs)
+        elapsed = (time.perf_counter() - start) * 1000
+        if index >= warmup:
+            latencies.append(elapsed)
+        if response.status_code >= 400:
+            failures.append((url, response.status_code))
+    return latencies, time.perf_counter() - started, failures
+
+
+def compare(results, baseline, tolerance, min_delta_ms):
+    """Names of the routes whose p50 or p95 regressed against ``baseline``."""
+    regressed = []
+    for name, stats in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        for key in ('p50_ms', 'p95_ms'):
+            if stats[key] > previous[key] * (1 + tolerance) and stats[key] - previous[key] > min_delta_ms:
+                regressed.append(name)
+                break
+    return regressed
+
+
+def run(arguments):
+    Config.SUGGEST_WARM_ON_STARTUP = False
+    Config.OPS_ENDPOINTS_ENABLED = True
+    if arguments.reuse:
+        Config.SQLALCHEMY_DATABASE_URI = arguments.database_url
+        app = create_app()
+    else:
+        app = create_bench_app(arguments.database_url)
+        start = time.perf_counter()
+        with app.app_context():
+            written = seed_database(SCALES[arguments.scale], log=lambda line: None)
+        print(f'Seeded {sum(written.values()):,} rows ({arguments.scale}) in {time.perf_counter() - start:.1f} s')
+    if not arguments.cache:
+        response_cache.configure(None, 0)
+    hunter_client.api_url = start_fake_hunter().url
+    client = app.test_client()
+    workload = Workload(app, seed=1)
+
+    documented = documented_routes()
+    benchmarked = {(method, path) for _, method, path, _, _ in scenarios(workload, 1)}
+    for method, path in documented:
+        if not is_served(app, method, path):
+            print(f'Skipped {method} {path}: documented but not served by the app')
+    missing = [f'{method} {path}' for method, path in documented
+               if (method, path) not in benchmarked and is_served(app, method, path)]
+    if missing:
+        print(f'No scenario for documented route(s): {", ".join(missing)}', file=sys.stderr)
+
+    with app.app_context():
+        dialect = db.engine.dialect.name
+    key = f'{arguments.scale}/{dialect}' + ('/cache' if arguments.cache else '')
+    baselines = {}
+    if os.path.exists(arguments.baseline):
+        with open(arguments.baseline) as baseline_file:
+            baselines = json.load(baseline_file)
+    baseline = baselines.get(key, {}).get('routes', {})
+
+    print(f'{arguments.requests} requests per route, one at a time, best of {arguments.rounds} round(s), {dialect}, '
+          f'response cache {"on" if arguments.cache else "off"}; baseline {key}{"" if baseline else " (none recorded)"}')
+    chosen = [
+        scenario for scenario in scenarios(workload, arguments.requests, arguments.rounds)
+        if not arguments.only or arguments.only in scenario[0]
+    ]
+    results, failed = {}, {}
+    for round_index in range(arguments.rounds):
+        for name, method, _, requests, make_request in chosen:
+            first_index = round_index * (requests + max(1, requests // 10))
+            latencies, seconds, failures = run_scenario(client, method, requests, make_request, first_index)
+            stats = dict(summarize(latencies), req_per_s=len(latencies) / seconds)
+            best = results.setdefault(name, stats)
+            for field in ('p50_ms', 'p95_ms', 'p99_ms'):
+                best[field] = min(best[field], stats[field])
+            best['req_per_s'] = max(best['req_per_s'], stats['req_per_s'])
+            if failures:
+                failed.setdefault(name, failures)
+
+    print(f'{"route":<64}{"req/s":>8}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"base p95":>10}{"change":>8}')
+    for name, stats in results.items():
+        results[name] = {field: round(stats[field], 3) for field in ('req_per_s', 'p50_ms', 'p95_ms', 'p99_ms')}
+        previous = baseline.get(name)
+        change = f'{(stats["p95_ms"] / previous["p95_ms"] - 1) * 100:+.0f}%' if previous else ''
+        print(f'{name:<64}{stats["req_per_s"]:>8.0f}{stats["p50_ms"]:>9.2f}{stats["p95_ms"]:>9.2f}'
+              f'{stats["p99_ms"]:>9.2f}{previous["p95_ms"] if previous else "":>10}{change:>8}')
+    for name, failures in failed.items():
+        print(f'FAILED {name}: {len(failures)} request(s), e.g. {failures[0][0]} -> {failures[0][1]}', file=sys.stderr)
+
+    regressed = compare(results, baseline, arguments.tolerance, arguments.min_delta_ms)
+    for name in regressed:
+        print(f'REGRESSION {name}: {results[name]} vs baseline {baseline[name]}', file=sys.stderr)
+
+    if arguments.save_baseline:
+        entry = baselines.setdefault(key, {'routes': {}})
+        entry.update({
+            'recorded_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+            'requests': arguments.requests,
+            'rounds': arguments.rounds,
+            'cpus': os.cpu_count(),
+            'python': platform.python_version(),
+        })
+        entry['routes'].update(results)
+        with open(arguments.baseline, 'w') as baseline_file:
+            json.dump(baselines, baseline_file, indent=2, sort_keys=True)
+            baseline_file.write('\n')
+        print(f'Saved baseline {key} to {arguments.baseline}')
+    return bool(failed or (regressed and not arguments.save_baseline))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--database-url')
+    parser.add_argument('--reuse', action='store_true', help='Benchmark --database-url as already seeded at --scale')
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--rounds', type=int, default=3)
+    parser.add_argument('--only', help='Only run routes whose name contains this text')
+    parser.add_argument('--cache', action='store_true')
+    parser.add_argument('--baseline', default=BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    parser.add_argument('--min-delta-ms', type=float, default=2.0)
+    arguments = parser.parse_args()
+    if arguments.reuse and not arguments.database_url:
+        parser.error('--reuse needs --database-url')
+    sys.exit(1 if run(arguments) else 0)
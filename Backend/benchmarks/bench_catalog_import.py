@@ -0,0 +1,154 @@
+# benchmarks/bench_catalog_import.py
+"""
+Measure `flask catalog import` on a 100k-record catalog, and check it is idempotent and resumable.
+
+Usage: python -m benchmarks.bench_catalog_import [--records 100000] [--batch-size 1000] [--format csv|json|jsonl]
+
+Writes a synthetic semester export (courses with several instructor offerings
+each) and imports it into a fresh database (BENCH_DATABASE_URL, or SQLite):
+  - fresh:    every row is new
+  - re-run:   the same file again; nothing may be written
+  - changed:  5% of the courses renamed and a new semester for 5% of the offerings
+  - resumed:  the CLI killed with SIGKILL part way through a fresh import, then
+              run again; it must resume from its checkpoint and end with the same rows
+Reports records per second and SQL statements per batch for each.
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from app.catalog.importer import import_catalog, read_records
+from app.models import db, Course, CourseInstructor, Instructor
+from config import Config
+from tests.helpers import count_statements
+from .common import create_bench_app, synthetic_courses
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+OFFERINGS_PER_COURSE = 5
+SEMESTERS = ('2023F', '2024S', '2024F', '2025S')
+
+
+def catalog_records(count, seed=0, renamed=0.0, new_semester=0.0):
+    """``count`` records: courses of ``OFFERINGS_PER_COURSE`` offerings each, over a fixed pool of instructors."""
+    rng = random.Random(seed)
+    changes = random.Random(seed + 1)
+    instructors = max(1, count // 20)
+    courses = synthetic_courses(count // OFFERINGS_PER_COURSE + 1, seed)
+    records = 0
+    for course in courses:
+        name = course['name'] + (' (revised)' if changes.random() < renamed else '')
+        for _ in range(OFFERINGS_PER_COURSE):
+            if records == count:
+                return
+            instructor = rng.randrange(instructors)
+            semester = rng.choice(SEMESTERS)
+            if changes.random() < new_semester:
+                semester = '2025F'
+            yield {
+                'course_code': course['course_code'], 'course_name': name, 'unit': course['unit'],
+                'description': course['description'], 'instructor_name': f'Instructor {instructor}',
+                'profile_url': f'https://faculty.example.edu/{instructor}', 'semester': semester,
+            }
+            records += 1
+
+
+def write_input(records, input_format):
+    fd, path = tempfile.mkstemp(suffix=f'.{input_format}', prefix='academisync-catalog-')
+    with os.fdopen(fd, 'w', newline='') as output:
+        if input_format == 'csv':
+            writer = None
+            for record in records:
+                if writer is None:
+                    writer = csv.DictWriter(output, fieldnames=list(record))
+                    writer.writeheader()
+                writer.writerow(record)
+        elif input_format == 'jsonl':
+            for record in records:
+                output.write(json.dumps(record) + '\n')
+        else:
+            output.write('[\n')
+            for index, record in enumerate(records):
+                output.write((',\n' if index else '') + json.dumps(record))
+            output.write('\n]\n')
+    return path
+
+
+def catalog_counts():
+    return tuple(db.session.query(db.func.count(model.id)).scalar() for model in (Course, Instructor, CourseInstructor))
+
+
+def timed_import(app, path, input_format, batch_size):
+    with app.app_context(), open(path, newline='') as stream, count_statements(db.engine) as statements:
+        stats = import_catalog(read_records(stream, input_format), batch_size)
+        counts = catalog_counts()
+    batches = -(-stats.records // batch_size)
+    return stats, statements[0] / batches, counts
+
+
+def run_cli(path, database_url, batch_size, kill_after=None):
+    env = dict(os.environ, DATABASE_URL=database_url, SUGGEST_WARM_ON_STARTUP='false')
+    command = [sys.executable, '-m', 'flask', '--app', 'run', 'catalog', 'import', path, '--batch-size', str(batch_size)]
+    process = subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True)
+    if kill_after is None:
+        return process.communicate()[0]
+    # Kill as soon as enough batches are committed, without letting it finish cleanly
+    done = 0
+    for line in process.stdout:
+        if 'records,' in line:
+            done += 1
+            if done == kill_after:
+                process.send_signal(signal.SIGKILL)
+                break
+    process.wait()
+    return process.stdout.read()
+
+
+def run(records, batch_size, input_format):
+    Config.SUGGEST_WARM_ON_STARTUP = False
+    path = write_input(catalog_records(records), input_format)
+    changed_path = write_input(catalog_records(records, renamed=0.05, new_semester=0.05), input_format)
+    print(f'{records} records ({os.path.getsize(path) / 1e6:.1f} MB {input_format}), batches of {batch_size}')
+    print(f'{"run":<10}{"rows/s":>10}{"seconds":>9}{"SQL/batch":>11}   courses / instructors / offerings written')
+
+    app = create_bench_app()
+    database_url = app.config['SQLALCHEMY_DATABASE_URI']
+    for label, source in (('fresh', path), ('re-run', path), ('changed', changed_path)):
+        stats, per_batch, counts = timed_import(app, source, input_format, batch_size)
+        written = ' / '.join(
+            f'{stats.counts[entity]["inserted"] + stats.counts[entity]["updated"]}'
+            for entity in ('courses', 'instructors', 'offerings')
+        )
+        print(f'{label:<10}{stats.rows_per_second:>10.0f}{stats.elapsed:>9.1f}{per_batch:>11.1f}   {written}')
+        if label == 're-run':
+            assert written == '0 / 0 / 0', 'Re-running the same input wrote rows'
+    expected = counts
+
+    app = create_bench_app(database_url)
+    start = time.perf_counter()
+    run_cli(path, database_url, batch_size, kill_after=max(1, records // batch_size // 3))
+    output = run_cli(path, database_url, batch_size)
+    resumed = next((line for line in output.splitlines() if line.startswith('Resuming')), 'did not resume')
+    run_cli(changed_path, database_url, batch_size)
+    with app.app_context():
+        counts = catalog_counts()
+    print(f'{"resumed":<10}{"":>10}{time.perf_counter() - start:>9.1f}{"":>11}   {resumed}')
+    assert counts == expected, f'Rows after resuming {counts} differ from an uninterrupted import {expected}'
+    print(f'Rows after the resumed import match: {counts[0]} courses, {counts[1]} instructors, {counts[2]} offerings')
+    for source in (path, changed_path):
+        os.remove(source)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--records', type=int, default=100_000)
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--format', choices=('csv', 'json', 'jsonl'), default='csv')
+    arguments = parser.parse_args()
+    run(arguments.records, arguments.batch_size, arguments.format)
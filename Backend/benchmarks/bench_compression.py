@@ -0,0 +1,97 @@
+# benchmarks/bench_compression.py
+"""
+Measure bytes on the wire and CPU time per request with and without response compression.
+
+Usage: python -m benchmarks.bench_compression [--courses 10000] [--threads 200] [--iterations 30]
+
+For the full catalog, a 500-course page and a 200-thread comment page, and for
+each Accept-Encoding (none, gzip, br when the brotli package is installed):
+  - live bytes / uncached ms:  body size and CPU ms per request with the response
+      cache disabled, so every request renders and compresses as it goes out
+  - cached bytes / hit ms:  the same for a response cache hit, which replays the
+      variant stored with the entry (compressed once, at the CACHED levels)
+  - recompress ms:  what compressing the cached body again on every hit would cost
+CPU time is the process time of the benchmark, which runs the app in-process.
+"""
+import argparse
+import time
+
+from app.compression import compression
+from app.models import db, Comment, User
+from app.response_cache import MemoryBackend, response_cache
+from .common import create_bench_app, insert_courses, summarize
+
+
+def seed_comments(threads, replies=5):
+    user = User(email='student@example.edu', password_hash='x', name='student')
+    db.session.add(user)
+    db.session.flush()
+    for thread in range(threads):
+        root = Comment(user_id=user.id, course_id=1, content=f'Thread {thread}: ' + 'a fairly typical comment about the course. ' * 3)
+        db.session.add(root)
+        db.session.flush()
+        db.session.add_all(
+            Comment(user_id=user.id, course_id=1, parent_comment_id=root.id, content='Agreed, the workload was fair.')
+            for _ in range(replies)
+        )
+    db.session.commit()
+
+
+def cpu_ms(fn, iterations):
+    latencies = []
+    for _ in range(iterations):
+        start = time.process_time()
+        fn()
+        latencies.append((time.process_time() - start) * 1000)
+    return summarize(latencies)['p50_ms']
+
+
+def run(courses, threads, iterations):
+    app = create_bench_app()
+    with app.app_context():
+        insert_courses(courses)
+        seed_comments(threads)
+    client = app.test_client()
+    urls = {
+        'catalog': '/v1/api/courses',
+        'page': '/v1/api/courses?limit=500',
+        'comments': f'/v1/api/comments/courses/1?limit={threads}',
+    }
+    codings = [None] + list(reversed(compression.codings))
+
+    print(f'{courses} courses, {threads} comment threads x 5 replies; CPU ms are p50 over {iterations} requests')
+    print(f'{"response":<10}{"encoding":<10}{"live bytes":>12}{"uncached ms":>13}{"cached bytes":>14}{"ratio":>7}{"hit ms":>9}{"recompress ms":>15}')
+    for label, url in urls.items():
+        identity_size = None
+        for coding in codings:
+            headers = {'Accept-Encoding': coding} if coding else {}
+
+            def get():
+                response = client.get(url, headers=headers, buffered=True)
+                assert response.status_code == 200 and response.headers.get('Content-Encoding') == coding
+                return response.get_data()
+
+            response_cache.configure(None, 0)
+            live_size = len(get())
+            uncached = cpu_ms(get, iterations)
+            response_cache.configure(MemoryBackend(100), 300)
+            get()
+            size = len(get())
+            hit = cpu_ms(get, iterations)
+            identity_size = identity_size or size
+            recompress = '-'
+            if coding:
+                plain = client.get(url, buffered=True).get_data()
+                level = compression.levels[coding]
+                recompress = f'{cpu_ms(lambda: compression.compress(plain, coding, level), iterations):.2f}'
+            print(f'{label:<10}{coding or "identity":<10}{live_size:>12}{uncached:>13.2f}'
+                  f'{size:>14}{identity_size / size:>7.1f}{hit:>9.2f}{recompress:>15}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--courses', type=int, default=10000)
+    parser.add_argument('--threads', type=int, default=200)
+    parser.add_argument('--iterations', type=int, default=30)
+    arguments = parser.parse_args()
+    run(arguments.courses, arguments.threads, arguments.iterations)
@@ -0,0 +1,85 @@
+# benchmarks/bench_course_page.py
+"""
+Compare loading a course page through the separate endpoints with the composite /courses/<id>/page.
+
+Usage: python -m benchmarks.bench_course_page [--pages 200] [--rtt 40] [--connections 6]
+
+Simulates a logged-in browser. The fan-out needs two waves of requests: the
+course, its ratings, comments, follow state and the user's course ratings,
+then, once the instructors are known, one ratings request and one my-ratings
+request per instructor. Requests within a wave run in parallel, at most
+``--connections`` at a time as in an HTTP/1.1 browser, and each waits ``--rtt``
+milliseconds of simulated network round trip. Runs with the response cache
+disabled (cold) and enabled (warm).
+"""
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.response_cache import MemoryBackend, response_cache
+from app.models import db, Course
+from tests.helpers import seed_catalog
+from .common import auth_headers, create_bench_app, measure, summarize
+
+
+def run(pages, rtt, connections):
+    app = create_bench_app()
+    with app.app_context():
+        user_id = seed_catalog()
+        course_ids = [course_id for (course_id,) in db.session.query(Course.id)]
+    headers = auth_headers(app, user_id)
+    pool = ThreadPoolExecutor(connections)
+
+    def get(url):
+        client = app.test_client()
+        time.sleep(rtt / 1000)
+        response = client.get(url, headers=headers)
+        assert response.status_code == 200, (url, response.status_code)
+        return response.get_json()
+
+    def fan_out(course_id):
+        first = [
+            f'/v1/api/courses/{course_id}',
+            f'/v1/api/ratings/courses/{course_id}',
+            f'/v1/api/comments/courses/{course_id}',
+            '/v1/api/users/me/followed-courses',
+            f'/v1/api/ratings/my-ratings?course_id={course_id}',
+        ]
+        course = list(pool.map(get, first))[0]
+        second = []
+        for instructor in course['instructors']:
+            second.append(f'/v1/api/ratings/courses/{course_id}/instructors/{instructor["id"]}')
+            second.append(f'/v1/api/ratings/my-ratings?course_instructor_id={instructor["course_instructor_id"]}')
+        list(pool.map(get, second))
+        return len(first) + len(second)
+
+    def composite(course_id):
+        get(f'/v1/api/courses/{course_id}/page')
+
+    rng = random.Random(3)
+    print(f'{pages} page loads, {rtt} ms simulated round trip, {connections} parallel connections')
+    print(f'{"cache":<7}{"variant":<12}{"requests":>9}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}')
+    for cache in ('cold', 'warm'):
+        if cache == 'cold':
+            response_cache.configure(None, 0)
+        else:
+            response_cache.configure(MemoryBackend(10000), 300)
+            for course_id in course_ids:
+                fan_out(course_id)
+                composite(course_id)
+        requests = fan_out(course_ids[0])
+        stats = summarize(measure(lambda: fan_out(rng.choice(course_ids)), pages))
+        print(f'{cache:<7}{"fan-out":<12}{requests:>9}{stats["p50_ms"]:>9.1f}{stats["p95_ms"]:>9.1f}{stats["p99_ms"]:>9.1f}')
+        stats = summarize(measure(lambda: composite(rng.choice(course_ids)), pages))
+        print(f'{cache:<7}{"composite":<12}{1:>9}{stats["p50_ms"]:>9.1f}{stats["p95_ms"]:>9.1f}{stats["p99_ms"]:>9.1f}')
+    pool.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--rtt', type=float, default=40)
+    parser.add_argument('--connections', type=int, default=6)
+    arguments = parser.parse_args()
+    run(arguments.pages, arguments.rtt, arguments.connections)
@@ -0,0 +1,135 @@
+# benchmarks/bench_course_rankings.py
+"""
+Measure the precomputed course rankings: their refresh, and the dimension-sorted course list.
+
+Usage: python -m benchmarks.bench_course_rankings [--scale small|medium|full] [--new-reviews 1000] [--requests 200]
+
+Seeds a database (BENCH_DATABASE_URL, or SQLite) with ``benchmarks.seed_data``,
+which builds the rankings with a full refresh, then:
+  - submits --new-reviews reviews through POST /ratings and times the
+    incremental refresh that folds them in, and checks that it leaves the same
+    totals as a full rebuild, with averages within the prior tolerance;
+  - times the first and a deep page of GET /courses?sort=dimension:<name>, and
+    the same first page ranked from rating_aggregates on every request, as it
+    would be without the ranking tables.
+Runs with the response cache disabled.
+"""
+import argparse
+import random
+import time
+
+from sqlalchemy import Float, cast, func, select
+
+from app.models import db, Course, CourseRanking, CourseRankingState, RatingAggregate
+from app.ratings.rankings import bayesian_average, refresh_rankings
+from app.response_cache import response_cache
+from config import Config
+from .common import auth_headers, create_bench_app, measure, summarize
+from .seed_data import DIMENSIONS, SCALES, seed_database
+
+PAGE_SIZE = 50
+DEEP_PAGES = 20
+
+
+def stored_rankings():
+    totals = {
+        (course_id, dimension_id): (score_sum, vote_count, average)
+        for course_id, dimension_id, score_sum, vote_count, average in db.session.execute(select(
+            CourseRanking.course_id, CourseRanking.rating_dimension_id,
+            CourseRanking.score_sum, CourseRanking.vote_count, CourseRanking.bayesian_average
+        ))
+    }
+    states = {state.rating_dimension_id: (state.score_sum, state.vote_count) for state in CourseRankingState.query}
+    return totals, states
+
+
+def submit_reviews(app, client, count, users, courses, seed=1):
+    rng = random.Random(seed)
+    tokens = {}
+    for _ in range(count):
+        user_id = rng.randint(1, users)
+        if user_id not in tokens:
+            tokens[user_id] = auth_headers(app, user_id)
+        response = client.post('/v1/api/ratings', headers=tokens[user_id], json={
+            'course_id': rng.randint(1, courses),
+            'ratings': [{'rating_dimension_id': dimension, 'score': rng.randint(1, 5)}
+                        for dimension in range(1, len(DIMENSIONS) + 1)]
+        })
+        assert response.status_code == 201, response.get_json()
+
+
+def ranked_at_request_time(dimension_id):
+    """The first page ranked the way it would be without course_rankings: scored and sorted per request."""
+    course_totals = (RatingAggregate.rating_dimension_id == dimension_id, RatingAggregate.course_id.isnot(None))
+    prior = select(cast(func.sum(RatingAggregate.score_sum), Float) / func.sum(RatingAggregate.score_count)) \
+        .where(*course_totals).scalar_subquery()
+    average = bayesian_average(RatingAggregate.score_sum, RatingAggregate.score_count, prior).label('bayesian_average')
+    return db.session.execute(
+        select(Course.id, Course.course_code, Course.name, average, RatingAggregate.score_count)
+        .join(RatingAggregate, RatingAggregate.course_id == Course.id)
+        .where(*course_totals)
+        .order_by(average.desc(), Course.id.desc())
+        .limit(PAGE_SIZE)
+    ).all()
+
+
+def report(label, latencies):
+    stats = summarize(latencies)
+    print(f'{label:<44}{stats["p50_ms"]:>9.2f}{stats["p95_ms"]:>9.2f}')
+
+
+def run(scale, new_reviews, requests):
+    Config.SUGGEST_WARM_ON_STARTUP = False
+    counts = SCALES[scale]
+    app = create_bench_app()
+    print(f'Seeding {scale} ({counts["courses"]:,} courses, {counts["ratings"]:,} ratings) into '
+          f'{app.config["SQLALCHEMY_DATABASE_URI"]}')
+    with app.app_context():
+        seed_database(counts, log=lambda line: print(f'  {line}') if 'course_rankings' in line else None)
+    response_cache.configure(None, 0)
+    client = app.test_client()
+
+    submit_reviews(app, client, new_reviews, counts['users'], counts['courses'])
+    with app.app_context():
+        start = time.perf_counter()
+        results = refresh_rankings()
+        elapsed = time.perf_counter() - start
+        changed = sum(course_count for _, course_count, _, _ in results)
+        rescored = [name for name, _, was_rescored, _ in results if was_rescored]
+        print(f'Incremental refresh after {new_reviews} reviews: {elapsed * 1000:.0f} ms, {changed} rankings changed, '
+              f'rescored: {", ".join(rescored) or "none"}')
+        start = time.perf_counter()
+        refresh_rankings()
+        print(f'Refresh with nothing new: {(time.perf_counter() - start) * 1000:.0f} ms')
+
+        incremental, incremental_states = stored_rankings()
+        start = time.perf_counter()
+        refresh_rankings(full=True)
+        print(f'Full rebuild: {(time.perf_counter() - start) * 1000:.0f} ms')
+        rebuilt, rebuilt_states = stored_rankings()
+    assert {key: value[:2] for key, value in incremental.items()} == {key: value[:2] for key, value in rebuilt.items()}, \
+        'The incremental refresh left different totals than a full rebuild'
+    assert incremental_states == rebuilt_states, 'The incremental refresh left different dimension totals'
+    drift = max((abs(incremental[key][2] - rebuilt[key][2]) for key in rebuilt), default=0.0)
+    print(f'Incremental totals match a full rebuild; largest average difference {drift:.4f} '
+          f'(prior tolerance {Config.RANKING_PRIOR_TOLERANCE})')
+
+    url = f'/v1/api/courses?sort=dimension:{DIMENSIONS[0]}&limit={PAGE_SIZE}'
+    cursor = None
+    for _ in range(DEEP_PAGES):
+        response = client.get(url + (f'&cursor={cursor}' if cursor else ''))
+        cursor = response.headers.get('X-Next-Cursor') or cursor
+    print(f'\n{"request":<44}{"p50 ms":>9}{"p95 ms":>9}')
+    report('first page from course_rankings', measure(lambda: client.get(url), requests))
+    report(f'page {DEEP_PAGES + 1} from course_rankings', measure(lambda: client.get(f'{url}&cursor={cursor}'), requests))
+    with app.app_context():
+        report('first page ranked at request time', measure(lambda: ranked_at_request_time(1), requests))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--new-reviews', type=int, default=1000)
+    parser.add_argument('--requests', type=int, default=200)
+    arguments = parser.parse_args()
+    run(arguments.scale, arguments.new_reviews, arguments.requests)
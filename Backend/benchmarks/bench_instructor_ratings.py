@@ -0,0 +1,122 @@
+# benchmarks/bench_instructor_ratings.py
+"""
+Check and time GET /ratings/instructors/{id} against building the same profile from per-offering requests.
+
+Usage: python -m benchmarks.bench_instructor_ratings [--scale small|medium|full] [--instructors 20] [--requests 200]
+
+Seeds a database (BENCH_DATABASE_URL, or SQLite) with ``benchmarks.seed_data``,
+then, for the instructors with the most offerings:
+  - compares every overall, per-semester and per-course average and count of the
+    rollup with the same figures grouped from the raw ``ratings`` table;
+  - times the rollup, and the profile built without it: GET /instructors/{id},
+    then GET /ratings/courses/{course_id}/instructors/{id} per course taught.
+Runs with the response cache disabled and reports SQL statements per profile.
+"""
+import argparse
+from collections import defaultdict
+
+from sqlalchemy import func, select
+
+from app.models import db, CourseInstructor, Rating
+from app.response_cache import response_cache
+from config import Config
+from tests.helpers import count_statements
+from .common import create_bench_app, measure, summarize
+from .seed_data import SCALES, seed_database
+
+
+def busiest_instructors(count):
+    return [instructor_id for instructor_id, in db.session.execute(
+        select(CourseInstructor.instructor_id)
+        .group_by(CourseInstructor.instructor_id)
+        .order_by(func.count(CourseInstructor.id).desc(), CourseInstructor.instructor_id)
+        .limit(count)
+    )]
+
+
+def expected_rollup(instructor_id):
+    """``{breakdown key: {dimension_id: (average, count)}}`` grouped straight from ``ratings``."""
+    rows = db.session.execute(
+        select(CourseInstructor.course_id, CourseInstructor.semester, Rating.rating_dimension_id, Rating.score)
+        .join(Rating, Rating.course_instructor_id == CourseInstructor.id)
+        .where(CourseInstructor.instructor_id == instructor_id)
+    ).all()
+    scores = defaultdict(list)
+    for course_id, semester, dimension_id, score in rows:
+        for key in ('overall', ('semester', semester), ('course', course_id)):
+            scores[key, dimension_id].append(score)
+    expected = defaultdict(dict)
+    for (key, dimension_id), values in scores.items():
+        expected[key][dimension_id] = (round(sum(values) / len(values), 2), len(values))
+    return expected
+
+
+def reported_rollup(body):
+    def figures(ratings):
+        return {rating['dimension_id']: (rating['average_score'], rating['rating_count'])
+                for rating in ratings if rating['rating_count']}
+
+    reported = {'overall': figures(body['ratings'])}
+    for semester in body['by_semester']:
+        reported['semester', semester['semester']] = figures(semester['ratings'])
+    for course in body['by_course']:
+        reported['course', course['course_id']] = figures(course['ratings'])
+    return {key: value for key, value in reported.items() if value}
+
+
+def profile_without_rollup(client, instructor_id):
+    instructor = client.get(f'/v1/api/instructors/{instructor_id}').get_json()
+    for course_id in dict.fromkeys(course['id'] for course in instructor['courses']):
+        client.get(f'/v1/api/ratings/courses/{course_id}/instructors/{instructor_id}')
+
+
+def run(scale, instructors, requests):
+    Config.SUGGEST_WARM_ON_STARTUP = False
+    app = create_bench_app()
+    print(f'Seeding {scale} into {app.config["SQLALCHEMY_DATABASE_URI"]}')
+    with app.app_context():
+        seed_database(SCALES[scale], log=lambda line: None)
+        instructor_ids = busiest_instructors(instructors)
+        offerings = dict(db.session.execute(
+            select(CourseInstructor.instructor_id, func.count(CourseInstructor.id))
+            .where(CourseInstructor.instructor_id.in_(instructor_ids))
+            .group_by(CourseInstructor.instructor_id)
+        ).all())
+    response_cache.configure(None, 0)
+    client = app.test_client()
+
+    for instructor_id in instructor_ids:
+        body = client.get(f'/v1/api/ratings/instructors/{instructor_id}').get_json()
+        with app.app_context():
+            expected = expected_rollup(instructor_id)
+        assert reported_rollup(body) == dict(expected), f'Rollup of instructor {instructor_id} differs from the ratings table'
+    print(f'Rollups of {len(instructor_ids)} instructors ({min(offerings.values())}-{max(offerings.values())} offerings each) '
+          'match the ratings table')
+
+    def statements(fn):
+        with app.app_context(), count_statements(db.engine) as counter:
+            for instructor_id in instructor_ids:
+                fn(instructor_id)
+        return counter[0] / len(instructor_ids)
+
+    def rollup(instructor_id):
+        client.get(f'/v1/api/ratings/instructors/{instructor_id}')
+
+    print(f'\n{"profile ratings":<36}{"SQL":>6}{"p50 ms":>9}{"p95 ms":>9}')
+    for label, fn in (('rollup endpoint', rollup),
+                      ('instructor + one request per course', lambda instructor_id: profile_without_rollup(client, instructor_id))):
+        used = statements(fn)
+        latencies = []
+        for instructor_id in instructor_ids:
+            latencies += measure(lambda: fn(instructor_id), max(1, requests // len(instructor_ids)))
+        stats = summarize(latencies)
+        print(f'{label:<36}{used:>6.1f}{stats["p50_ms"]:>9.2f}{stats["p95_ms"]:>9.2f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--instructors', type=int, default=20)
+    parser.add_argument('--requests', type=int, default=200)
+    arguments = parser.parse_args()
+    run(arguments.scale, arguments.instructors, arguments.requests)
@@ -0,0 +1,109 @@
+# benchmarks/bench_login.py
+"""
+Measure login throughput with server-side bcrypt, and how a login burst affects other endpoints.
+
+Usage: python -m benchmarks.bench_login [--rounds 10 12] [--clients 16] [--seconds 10] [--executor thread]
+"""
+import argparse
+import os
+import threading
+import time
+
+from app.auth.passwords import password_hasher
+from app.models import db, User
+from app.utils import hash_password
+from config import Config
+from .common import auth_headers, create_bench_app, summarize
+
+USERS = 50
+
+
+def run(rounds_list, clients, seconds, executor):
+    app = create_bench_app()
+    cores = os.cpu_count() or 1
+    print(f'{cores} cores, {clients} concurrent clients, {seconds} s per run, '
+          f'{executor} pool of {Config.PASSWORD_HASH_WORKERS} workers, queue limit {Config.PASSWORD_HASH_MAX_QUEUE}')
+    print(f'{"cost":<6}{"logins/s":>10}{"per core":>10}{"503s":>7}{"login p50":>11}{"login p95":>11}'
+          f'{"other p95 idle":>16}{"other p95 burst":>17}')
+
+    for rounds in rounds_list:
+        Config.BCRYPT_ROUNDS = rounds
+        # Process workers are spawned fresh and read the cost from the environment
+        os.environ['BCRYPT_ROUNDS'] = str(rounds)
+        password_hasher.configure(
+            executor, Config.PASSWORD_HASH_WORKERS, Config.PASSWORD_HASH_MAX_QUEUE, Config.PASSWORD_HASH_TIMEOUT
+        )
+        with app.app_context():
+            User.query.delete()
+            db.session.add_all(
+                User(email=f'user{index}@example.edu', password_hash=hash_password('secret'), name=f'user{index}')
+                for index in range(USERS)
+            )
+            db.session.commit()
+            user_id = User.query.first().id
+        headers = auth_headers(app, user_id)
+
+        def probe(stop, latencies):
+            # A cheap authenticated endpoint that should stay fast during the burst
+            client = app.test_client()
+            while not stop.is_set():
+                start = time.perf_counter()
+                client.get('/v1/api/users/me', headers=headers)
+                latencies.append((time.perf_counter() - start) * 1000)
+                time.sleep(0.01)
+
+        idle = []
+        stop = threading.Event()
+        prober = threading.Thread(target=probe, args=(stop, idle))
+        prober.start()
+        time.sleep(1)
+        stop.set()
+        prober.join()
+
+        login_latencies, rejected, burst = [], [0], []
+        deadline = time.monotonic() + seconds
+
+        def login(worker):
+            client = app.test_client()
+            index = worker
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                response = client.post('/v1/api/auth/login', json={
+                    'email': f'user{index % USERS}@example.edu', 'password_hash': 'secret'
+                })
+                if response.status_code == 503:
+                    rejected[0] += 1
+                    time.sleep(0.05)
+                else:
+                    assert response.status_code == 200, response.status_code
+                    login_latencies.append((time.perf_counter() - start) * 1000)
+                index += clients
+
+        stop = threading.Event()
+        prober = threading.Thread(target=probe, args=(stop, burst))
+        threads = [threading.Thread(target=login, args=(worker,)) for worker in range(clients)]
+        start = time.perf_counter()
+        prober.start()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        prober.join()
+
+        throughput = len(login_latencies) / elapsed
+        login_stats = summarize(login_latencies)
+        print(f'{rounds:<6}{throughput:>10.1f}{throughput / min(cores, Config.PASSWORD_HASH_WORKERS):>10.1f}{rejected[0]:>7}'
+              f'{login_stats["p50_ms"]:>11.0f}{login_stats["p95_ms"]:>11.0f}'
+              f'{summarize(idle)["p95_ms"]:>16.1f}{summarize(burst)["p95_ms"]:>17.1f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rounds', type=int, nargs='+', default=[10, 12])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    parser.add_argument('--executor', choices=('thread', 'process'), default=Config.PASSWORD_HASH_EXECUTOR)
+    arguments = parser.parse_args()
+    run(arguments.rounds, arguments.clients, arguments.seconds, arguments.executor)
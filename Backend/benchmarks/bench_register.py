@@ -0,0 +1,67 @@
+# benchmarks/bench_register.py
+"""
+Measure /register latency against a healthy, slow and failing fake Hunter API.
+
+Usage: python -m benchmarks.bench_register [--requests 100] [--read-timeout 1.0]
+"""
+import argparse
+import itertools
+
+from app.auth.hunter import hunter_client
+from config import Config
+from tests.fake_hunter import start_fake_hunter
+from .common import create_bench_app, measure, summarize
+
+SCENARIOS = (
+    ('healthy (20 ms)', {'delay': 0.02, 'status_code': 200}),
+    ('slow (10 s)', {'delay': 10.0, 'status_code': 200}),
+    ('failing (HTTP 503)', {'delay': 0.0, 'status_code': 503}),
+)
+
+
+def run(requests, read_timeout):
+    app = create_bench_app()
+    client = app.test_client()
+    fake = start_fake_hunter()
+    hunter_client.api_url = fake.url
+    hunter_client.timeout = (hunter_client.timeout[0], read_timeout)
+    domain = Config.PERMITTED_EMAIL_DOMAINS[0]
+    counter = itertools.count()
+
+    def register(email=None):
+        index = next(counter)
+        response = client.post('/v1/api/auth/register', json={
+            'email': email or f'student{index}@{domain}',
+            'password_hash': 'x',
+            'name': f'student{index}'
+        })
+        assert response.status_code in (200, 400), response.status_code
+
+    print(f'{requests} registrations per scenario, read timeout {read_timeout:.1f} s, '
+          f'breaker opens after {hunter_client.breaker.threshold} failures')
+    print(f'{"upstream":<22}{"p50 ms":>10}{"p95 ms":>10}{"max ms":>10}{"calls":>8}{"fallbacks":>11}  breaker')
+    for label, behaviour in SCENARIOS:
+        fake.behaviour.update(behaviour)
+        hunter_client.breaker.record_success()
+        before = hunter_client.stats()
+        latencies = measure(register, requests)
+        after = hunter_client.stats()
+        stats = summarize(latencies)
+        print(f'{label:<22}{stats["p50_ms"]:>10.1f}{stats["p95_ms"]:>10.1f}{max(latencies):>10.1f}'
+              f'{after["calls"] - before["calls"]:>8}{after["fallbacks"] - before["fallbacks"]:>11}  {after["breaker"]}')
+
+    # The same address again is answered from the result cache
+    fake.behaviour.update(SCENARIOS[0][1])
+    hunter_client.breaker.record_success()
+    before = fake.requests
+    stats = summarize(measure(lambda: register(f'repeat@{domain}'), requests))
+    print(f'{"repeated address":<22}{stats["p50_ms"]:>10.1f}{stats["p95_ms"]:>10.1f}{"":>10}{fake.requests - before:>8}')
+    fake.shutdown()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=100)
+    parser.add_argument('--read-timeout', type=float, default=Config.HUNTER_READ_TIMEOUT)
+    arguments = parser.parse_args()
+    run(arguments.requests, arguments.read_timeout)
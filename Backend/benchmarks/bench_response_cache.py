@@ -0,0 +1,57 @@
+# benchmarks/bench_response_cache.py
+"""
+Compare public GET latency with the response cache off, in memory and in a Redis-protocol server.
+
+Usage: python -m benchmarks.bench_response_cache [--courses 2000] [--iterations 2000] [--redis-url URL]
+Without --redis-url only the 'none' and 'memory' backends run; start
+``python -m benchmarks.resp_standin`` for a local Redis stand-in.
+"""
+import argparse
+import random
+
+from app.models import db, CourseInstructor, Instructor
+from app.response_cache import MemoryBackend, RedisBackend, response_cache
+from config import Config
+from .common import create_bench_app, insert_courses, measure, summarize
+
+
+def run(courses, iterations, redis_url):
+    app = create_bench_app()
+    with app.app_context():
+        insert_courses(courses)
+        db.session.add_all(Instructor(name=f'Instructor {index}', profile_url=f'https://example.edu/{index}') for index in range(50))
+        db.session.commit()
+        db.session.execute(CourseInstructor.__table__.insert(), [
+            {'course_id': course_id, 'instructor_id': 1 + course_id % 50, 'semester': '2024F'}
+            for course_id in range(1, courses + 1)
+        ])
+        db.session.commit()
+
+    client = app.test_client()
+    rng = random.Random(3)
+    # A small hot set, as for popular course pages
+    paths = [f'/v1/api/courses/{rng.randint(1, courses)}' for _ in range(50)]
+    paths += [path.replace('/courses/', '/ratings/courses/') for path in paths[:25]]
+
+    backends = [('none', None), ('memory', MemoryBackend(Config.RESPONSE_CACHE_MAX_ENTRIES))]
+    if redis_url:
+        backends.append(('redis', RedisBackend(redis_url)))
+
+    print(f'{courses} courses, {iterations} requests over {len(paths)} hot paths')
+    print(f'{"backend":<10}{"mean ms":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}')
+    for label, backend in backends:
+        response_cache.configure(backend, Config.RESPONSE_CACHE_TTL)
+        # Fill the cache outside the measurement
+        for path in paths:
+            client.get(path)
+        stats = summarize(measure(lambda: client.get(rng.choice(paths)), iterations))
+        print(f'{label:<10}{stats["mean_ms"]:>10.2f}{stats["p50_ms"]:>10.2f}{stats["p95_ms"]:>10.2f}{stats["p99_ms"]:>10.2f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--courses', type=int, default=2000)
+    parser.add_argument('--iterations', type=int, default=2000)
+    parser.add_argument('--redis-url')
+    arguments = parser.parse_args()
+    run(arguments.courses, arguments.iterations, arguments.redis_url)
@@ -0,0 +1,57 @@
+# benchmarks/bench_search.py
+"""
+Compare the old leading-wildcard ILIKE search with the ranked course search
+over a synthetic catalog.
+
+Usage: python -m benchmarks.bench_search [--courses 50000] [--iterations 200]
+Set BENCH_DATABASE_URL to a PostgreSQL database to exercise the GIN index.
+"""
+import argparse
+import random
+
+from app.courses.search import search_courses
+from app.models import db, Course
+from .common import create_bench_app, vocabulary, insert_courses, measure, summarize
+
+QUERIES = ('algorithms', 'machine learning', 'quantum', 'UCUG12', 'comp1', 'data anal', 'ethics society')
+
+
+def ilike_search(query):
+    pattern = f'%{query.lower()}%'
+    return Course.query.filter(
+        Course.name.ilike(pattern) | Course.course_code.ilike(pattern) | Course.description.ilike(pattern)
+    ).all()
+
+
+def run(courses, iterations):
+    app = create_bench_app()
+    with app.app_context():
+        insert_courses(courses)
+        dialect = db.engine.dialect.name
+        if dialect == 'postgresql':
+            db.session.execute(db.text('ANALYZE courses'))
+            db.session.commit()
+
+        # Warm the in-process index (non-PostgreSQL backends) outside the measurement
+        search_courses('warmup', 20)
+
+        rng = random.Random(1)
+        # Fixed queries plus prefixes of common and rare words
+        words = vocabulary()
+        queries = list(QUERIES) + [rng.choice(words[:100])[:4] for _ in range(5)] + [rng.choice(words)[:5] for _ in range(5)]
+        print(f'{courses} courses on {dialect}, {iterations} searches per path')
+        print(f'{"path":<22}{"mean ms":>10}{"p50 ms":>10}{"p95 ms":>10}{"p99 ms":>10}')
+        for label, fn in (
+            ('ilike (all rows)', lambda: ilike_search(rng.choice(queries))),
+            ('ranked (limit 20)', lambda: search_courses(rng.choice(queries), 20)),
+        ):
+            stats = summarize(measure(fn, iterations))
+            print(f'{label:<22}{stats["mean_ms"]:>10.2f}{stats["p50_ms"]:>10.2f}{stats["p95_ms"]:>10.2f}{stats["p99_ms"]:>10.2f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--courses', type=int, default=50000)
+    parser.add_argument('--iterations', type=int, default=200)
+    arguments = parser.parse_args()
+    run(arguments.courses, arguments.iterations)
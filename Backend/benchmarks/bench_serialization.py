@@ -0,0 +1,124 @@
+# benchmarks/bench_serialization.py
+"""
+Compare the serializer module with hand-built dicts and Flask's default jsonify.
+
+Usage: python -m benchmarks.bench_serialization [--courses 10000] [--threads 200] [--iterations 50]
+
+Times building the response of the full course catalog and of a large comment
+page, from rows to the finished ``Response`` object, without a database:
+  - before:  dict literals with ``.isoformat()``, encoded by Flask's default provider
+  - stdlib:  schema dumps, encoded by ``serializers.dumps_stdlib``
+  - orjson:  schema dumps, encoded by ``serializers.dumps`` (the app's provider)
+"""
+import argparse
+from collections import namedtuple
+from datetime import datetime, timedelta
+
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+
+from app import serializers
+from app.serializers import COMMENT_SCHEMA, COURSE_SUMMARY_SCHEMA, JSONProvider
+from .common import measure, summarize, synthetic_courses
+
+CourseRow = namedtuple('CourseRow', 'id course_code name unit description created_at')
+CommentRow = namedtuple('CommentRow', 'id user_id course_id course_instructor_id parent_comment_id content like_count created_at')
+
+
+class StdlibJSONProvider(JSONProvider):
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(
+            serializers.dumps_stdlib(obj, sort_keys=self.sort_keys) + b'\n', mimetype=self.mimetype
+        )
+
+
+def course_rows(count):
+    created_at = datetime(2024, 9, 1, 8, 30, 15, 123456)
+    return [
+        CourseRow(index, row['course_code'], row['name'], row['unit'], row['description'], created_at)
+        for index, row in enumerate(synthetic_courses(count), start=1)
+    ]
+
+
+def comment_threads(threads, replies=5):
+    created_at = datetime(2024, 9, 1, 8, 30, 15, 123456)
+    comment_id = 0
+    forest = []
+    for _ in range(threads):
+        comment_id += 1
+        root = CommentRow(comment_id, 7, 1, None, None, 'A fairly typical comment about the course. ' * 3, 4, created_at)
+        children = []
+        for _ in range(replies):
+            comment_id += 1
+            children.append(CommentRow(comment_id, 8, 1, None, root.id, 'Agreed.', 0, created_at + timedelta(minutes=comment_id)))
+        forest.append((root, children))
+    return forest
+
+
+def course_before(course):
+    return {
+        'id': course.id,
+        'course_code': course.course_code,
+        'name': course.name,
+        'description': course.description,
+        'created_at': course.created_at.isoformat()
+    }
+
+
+def comment_before(comment):
+    return {
+        'id': comment.id,
+        'user_id': comment.user_id,
+        'course_id': comment.course_id,
+        'course_instructor_id': comment.course_instructor_id,
+        'parent_comment_id': comment.parent_comment_id,
+        'content': comment.content,
+        'like_count': comment.like_count,
+        'created_at': comment.created_at.isoformat()
+    }
+
+
+def build_threads(forest, to_dict):
+    threads = []
+    for root, children in forest:
+        data = to_dict(root)
+        data['sub_comments'] = [dict(to_dict(child), sub_comments=[]) for child in children]
+        threads.append(data)
+    return threads
+
+
+def run(courses, threads, iterations):
+    catalog = course_rows(courses)
+    forest = comment_threads(threads)
+    variants = (
+        ('before', DefaultJSONProvider, course_before, comment_before),
+        ('stdlib', StdlibJSONProvider, COURSE_SUMMARY_SCHEMA.dump, COMMENT_SCHEMA.dump),
+        ('orjson', JSONProvider, COURSE_SUMMARY_SCHEMA.dump, COMMENT_SCHEMA.dump),
+    )
+    print(f'{iterations} iterations; catalog of {courses} courses, comment page of {threads} threads x 5 replies')
+    print(f'{"variant":<10}{"catalog p50 ms":>16}{"catalog p95 ms":>16}{"comments p50 ms":>17}{"comments p95 ms":>17}{"bytes":>10}')
+    for label, provider_class, course_to_dict, comment_to_dict in variants:
+        app = Flask(__name__)
+        app.json = provider_class(app)
+        with app.app_context():
+            def catalog_response():
+                return app.json.response([course_to_dict(course) for course in catalog])
+
+            def comments_response():
+                return app.json.response(build_threads(forest, comment_to_dict))
+
+            size = len(catalog_response().get_data())
+            catalog_stats = summarize(measure(catalog_response, iterations))
+            comment_stats = summarize(measure(comments_response, iterations))
+        print(f'{label:<10}{catalog_stats["p50_ms"]:>16.2f}{catalog_stats["p95_ms"]:>16.2f}'
+              f'{comment_stats["p50_ms"]:>17.2f}{comment_stats["p95_ms"]:>17.2f}{size:>10}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--courses', type=int, default=10000)
+    parser.add_argument('--threads', type=int, default=200)
+    parser.add_argument('--iterations', type=int, default=50)
+    arguments = parser.parse_args()
+    run(arguments.courses, arguments.threads, arguments.iterations)
@@ -0,0 +1,43 @@
+# benchmarks/bench_stream_courses.py
+"""
+Measure peak memory and time to first byte of GET /v1/api/courses for large catalogs.
+
+Usage: python -m benchmarks.bench_stream_courses [--courses 10000 100000]
+
+Each variant runs in a fresh child process (``tests.stream_memory``) against the
+same seeded database, so its peak RSS only reflects that one request:
+  - list:    load every row, build the whole list and encode it at once
+  - stream:  the route as it is, streaming a JSON array through a server-side cursor
+  - ndjson:  the route with ?format=ndjson
+The response cache is disabled so every run reads the database.
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+from .common import create_bench_app, insert_courses
+
+
+def run(counts):
+    print(f'{"courses":>8}  {"variant":<8}{"peak RSS MiB":>14}{"growth MiB":>12}{"first byte ms":>15}{"total ms":>10}{"MiB sent":>10}')
+    for count in counts:
+        app = create_bench_app()
+        with app.app_context():
+            insert_courses(count)
+        database_url = app.config['SQLALCHEMY_DATABASE_URI']
+        for variant in ('list', 'stream', 'ndjson'):
+            output = subprocess.run(
+                [sys.executable, '-m', 'tests.stream_memory', variant, database_url],
+                check=True, capture_output=True, text=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f'{count:>8}  {variant:<8}{result["peak"]:>14.1f}{result["peak"] - result["baseline"]:>12.1f}'
+                  f'{result["first_byte"] * 1000:>15.1f}{result["total"] * 1000:>10.0f}{result["size"] / 2 ** 20:>10.1f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--courses', type=int, nargs='+', default=[10000, 100000])
+    arguments = parser.parse_args()
+    run(arguments.courses)
@@ -0,0 +1,88 @@
+# benchmarks/bench_submit_rating.py
+"""
+Compare round trips and latency of POST /v1/api/ratings against the
+previous per-item implementation (one dimension lookup and one existing-rating
+lookup per input, no aggregates).
+
+Usage: python -m benchmarks.bench_submit_rating [--iterations 300]
+"""
+import argparse
+import random
+
+from flask import Blueprint, jsonify, request
+from flask_jwt_extended import jwt_required, get_jwt_identity
+
+from app.models import db, Course, Rating, RatingDimension, User
+from tests.helpers import count_statements
+from .common import auth_headers, create_bench_app, measure, summarize
+
+legacy_bp = Blueprint('legacy_ratings', __name__)
+
+@legacy_bp.route('', methods=['POST'])
+@jwt_required()
+def legacy_submit_rating():
+    data = request.get_json()
+    user_id = get_jwt_identity()
+    course_id = data.get('course_id')
+    if not Course.query.get(course_id):
+        return jsonify({'message': 'Course not found.'}), 404
+
+    for rating_input in data.get('ratings'):
+        dimension_id = rating_input.get('rating_dimension_id')
+        score = rating_input.get('score')
+        if not RatingDimension.query.get(dimension_id):
+            return jsonify({'message': f'Rating dimension {dimension_id} not found.'}), 404
+        existing_rating = Rating.query.filter_by(
+            user_id=user_id, rating_dimension_id=dimension_id,
+            course_id=course_id, course_instructor_id=None
+        ).first()
+        if existing_rating:
+            existing_rating.score = score
+        else:
+            db.session.add(Rating(user_id=user_id, rating_dimension_id=dimension_id, score=score, course_id=course_id))
+    db.session.commit()
+    return jsonify({'message': 'Ratings submitted successfully.'}), 201
+
+
+def _seed(app, users, courses):
+    with app.app_context():
+        for index, name in enumerate(['difficulty', 'workload', 'grading', 'lecture_quality'], start=1):
+            db.session.add(RatingDimension(id=index, name=name))
+        db.session.add_all(User(email=f'bench{i}@example.edu', password_hash='x', name=f'bench{i}') for i in range(users))
+        db.session.add_all(Course(course_code=f'BENCH{i}', name=f'Course {i}', unit=3) for i in range(courses))
+        db.session.commit()
+
+
+def run(iterations):
+    results = {}
+    for label, path in (('before', '/bench/legacy-ratings'), ('after', '/v1/api/ratings')):
+        app = create_bench_app()
+        app.register_blueprint(legacy_bp, url_prefix='/bench/legacy-ratings')
+        _seed(app, users=20, courses=20)
+        client = app.test_client()
+        headers = [auth_headers(app, user_id) for user_id in range(1, 21)]
+        rng = random.Random(42)
+
+        def submit():
+            payload = {
+                'course_id': rng.randint(1, 20),
+                'ratings': [{'rating_dimension_id': d, 'score': rng.randint(1, 5)} for d in range(1, 5)]
+            }
+            response = client.post(path, json=payload, headers=rng.choice(headers))
+            assert response.status_code == 201, response.json
+
+        with app.app_context():
+            engine = db.engine
+        with count_statements(engine) as statements:
+            latencies = measure(submit, iterations)
+        results[label] = {'round_trips': statements[0] / iterations, **summarize(latencies)}
+
+    print(f'{"path":<8}{"round trips":>13}{"mean ms":>10}{"p50 ms":>10}{"p95 ms":>10}')
+    for label, stats in results.items():
+        print(f'{label:<8}{stats["round_trips"]:>13.1f}{stats["mean_ms"]:>10.2f}{stats["p50_ms"]:>10.2f}{stats["p95_ms"]:>10.2f}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--iterations', type=int, default=300)
+    run(parser.parse_args().iterations)
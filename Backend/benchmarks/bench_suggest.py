@@ -0,0 +1,46 @@
+# benchmarks/bench_suggest.py
+"""
+Measure build time, memory and lookup latency of the course typeahead index.
+
+Usage: python -m benchmarks.bench_suggest [--courses 50000] [--iterations 20000]
+"""
+import argparse
+import random
+import time
+import tracemalloc
+
+from app.courses.suggest import PrefixIndex
+from .common import DEPARTMENTS, measure, summarize, synthetic_courses, vocabulary
+
+
+def run(courses, iterations):
+    rows = [{'id': index, **row} for index, row in enumerate(synthetic_courses(courses), start=1)]
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    index = PrefixIndex()
+    index.build(rows)
+    build_seconds = time.perf_counter() - start
+    memory_bytes, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    rng = random.Random(7)
+    words = vocabulary()
+    prefixes = (
+        [department[:rng.randint(1, 4)] + str(rng.randint(0, 99)) for department in DEPARTMENTS]
+        + [word[:rng.randint(1, 6)] for word in rng.sample(words, 200)]
+        + [' '.join(row['name'].split()[:2])[:-2] for row in rng.sample(rows, 50)]
+    )
+
+    stats = summarize(measure(lambda: index.suggest(rng.choice(prefixes), 10), iterations))
+    print(f'{courses} courses: built in {build_seconds * 1000:.0f} ms, index holds {memory_bytes / 2 ** 20:.1f} MiB')
+    print(f'top-10 lookup over {iterations} random prefixes: mean {stats["mean_ms"] * 1000:.1f} us, '
+          f'p50 {stats["p50_ms"] * 1000:.1f} us, p95 {stats["p95_ms"] * 1000:.1f} us, p99 {stats["p99_ms"] * 1000:.1f} us')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--courses', type=int, default=50000)
+    parser.add_argument('--iterations', type=int, default=20000)
+    arguments = parser.parse_args()
+    run(arguments.courses, arguments.iterations)
@@ -0,0 +1,55 @@
+# benchmarks/check_query_budgets.py
+"""
+Check every read route against a maximum number of SQL statements.
+
+Usage: python -m benchmarks.check_query_budgets [--show]
+
+Seeds a small catalog in which every course has several instructors, comments
+with replies, ratings and followers, so a lazy load per row shows up as extra
+statements. Runs with the response cache disabled. Exits non-zero if a route
+is over budget; --show prints the statements of every route.
+"""
+import argparse
+import sys
+
+from app.instrumentation import assert_max_queries, count_queries
+from app.response_cache import response_cache
+from tests.helpers import seed_catalog
+from tests.test_query_budgets import BUDGETS
+from .common import auth_headers, create_bench_app
+
+
+def run(show):
+    app = create_bench_app()
+    with app.app_context():
+        user_id = seed_catalog()
+    headers = auth_headers(app, user_id)
+    response_cache.configure(None, 0)
+    client = app.test_client()
+
+    # Warm per-process caches (reference data, search index) so only the request's own statements count
+    for url in BUDGETS:
+        client.get(url, headers=headers)
+
+    failures = 0
+    for url, budget in BUDGETS.items():
+        with count_queries() as shapes:
+            client.get(url, headers=headers)
+        used = sum(shapes.values())
+        print(f'{used:>4} / {budget:<4} {url}')
+        if show:
+            for shape, count in shapes.most_common():
+                print(f'{"":>12}{count} x {shape[:160]}')
+        try:
+            assert_max_queries(client, url, budget, headers=headers)
+        except AssertionError as error:
+            failures += 1
+            print(error, file=sys.stderr)
+    return failures
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--show', action='store_true')
+    arguments = parser.parse_args()
+    sys.exit(1 if run(arguments.show) else 0)
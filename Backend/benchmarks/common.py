@@ -0,0 +1,132 @@
+# benchmarks/common.py
+"""Shared helpers for the benchmark scripts. Run them from Backend/, e.g. ``python -m benchmarks.bench_submit_rating``."""
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from app.models import db, Course
+from config import Config
+
+
+def create_bench_app(database_url=None):
+    """
+    Create the app against an empty schema.
+
+    Args:
+        database_url (str | None): Database to benchmark against. Defaults to the
+            BENCH_DATABASE_URL environment variable, then to a throwaway SQLite file.
+
+    Returns:
+        Flask: The application, with all tables freshly created.
+    """
+    database_url = database_url or os.environ.get('BENCH_DATABASE_URL')
+    if not database_url:
+        fd, path = tempfile.mkstemp(suffix='.db', prefix='academisync-bench-')
+        os.close(fd)
+        database_url = f'sqlite:///{path}'
+
+    Config.SQLALCHEMY_DATABASE_URI = database_url
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        db.drop_all()
+        db.create_all()
+    return app
+
+
+DEPARTMENTS = ('COMP', 'MATH', 'PHYS', 'UCUG', 'AIAA', 'DSAA', 'ROAS', 'SEEN', 'MICS', 'INTR', 'CMAA', 'BSBE')
+WORDS = (
+    'introduction', 'advanced', 'applied', 'theory', 'systems', 'data', 'learning', 'machine', 'design',
+    'analysis', 'algorithms', 'networks', 'quantum', 'society', 'ethics', 'signals', 'robotics', 'finance',
+    'statistics', 'probability', 'optimization', 'materials', 'energy', 'biology', 'chemistry', 'physics',
+    'programming', 'security', 'vision', 'language', 'computation', 'modeling', 'urban', 'innovation',
+    'methods', 'foundations', 'seminar', 'project', 'laboratory', 'topics', 'principles', 'engineering'
+)
+
+
+SYLLABLES = ('ka', 'lo', 'mi', 'ne', 'ru', 'ta', 'vi', 'zo', 'bel', 'cor', 'dan', 'fin', 'gra', 'hel', 'jus', 'mor')
+
+
+def vocabulary(size=5000, seed=0):
+    """Return ``WORDS`` followed by ``size`` pronounceable pseudo-words, most common first."""
+    rng = random.Random(seed)
+    words = list(WORDS)
+    seen = set(words)
+    while len(words) < len(WORDS) + size:
+        word = ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+def synthetic_courses(count, seed=0):
+    """
+    Generate ``count`` course rows with realistic-looking codes, names and descriptions.
+
+    Words follow a Zipf-like distribution over ``vocabulary()``, so a few terms are
+    very common and most are rare, as in a real catalog.
+    """
+    rng = random.Random(seed)
+    words = vocabulary(seed=seed)
+    weights = [1 / rank for rank in range(1, len(words) + 1)]
+
+    def phrase(low, high):
+        return ' '.join(rng.choices(words, weights, k=rng.randint(low, high)))
+
+    for index in range(count):
+        department = DEPARTMENTS[index % len(DEPARTMENTS)]
+        yield {
+            'course_code': f'{department}{1000 + index // len(DEPARTMENTS)}',
+            'name': phrase(2, 5).capitalize(),
+            'unit': rng.choice((1, 2, 3, 4)),
+            'description': phrase(15, 40).capitalize() + '.',
+        }
+
+
+def insert_courses(count, seed=0, batch_size=5000):
+    """Bulk insert ``count`` synthetic courses; must be called inside an app context."""
+    batch = []
+    for row in synthetic_courses(count, seed):
+        batch.append(row)
+        if len(batch) == batch_size:
+            db.session.execute(Course.__table__.insert(), batch)
+            batch = []
+    if batch:
+        db.session.execute(Course.__table__.insert(), batch)
+    db.session.commit()
+
+
+def auth_headers(app, user_id):
+    with app.app_context():
+        return {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+
+
+def measure(fn, iterations):
+    """Call ``fn`` ``iterations`` times and return the latency of each call in milliseconds."""
+    latencies = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def summarize(latencies):
+    return {
+        'mean_ms': statistics.fmean(latencies),
+        'p50_ms': percentile(latencies, 50),
+        'p95_ms': percentile(latencies, 95),
+        'p99_ms': percentile(latencies, 99),
+    }
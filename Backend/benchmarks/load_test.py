@@ -0,0 +1,224 @@
+# benchmarks/load_test.py
+"""
+Load-test the development server against the production gunicorn setup over real HTTP.
+
+Usage: python -m benchmarks.load_test [--seconds 20] [--clients 32] [--courses 2000]
+                                      [--workers 3] [--threads 4] [--cache]
+
+Seeds a database (BENCH_DATABASE_URL, or a SQLite file), then for each server:
+  - dev:       ``app.run(debug=True)`` as run.py starts it, without the reloader
+  - gunicorn:  ``gunicorn run:app`` with gunicorn.conf.py, ``--workers`` x ``--threads``
+drives it with ``--clients`` keep-alive connections, spread over client processes,
+for ``--seconds``, on a mix of course, search, comment and rating requests.
+Reports requests per second, latency percentiles and the server's CPU time
+per request (all of its processes). The response cache is disabled unless
+``--cache`` is given, so every request does its full work. ``--cache`` uses the
+memory backend with ``--workers 1``; with more, gunicorn refuses per-process
+caches, so both servers use the Redis backend on a ``benchmarks.resp_standin``
+process, started afresh for each. With fewer CPUs than client processes plus
+workers, the client competes with the server for CPU and req/s understates
+what the server alone could do.
+"""
+import argparse
+import http.client
+import multiprocessing
+import os
+import random
+import signal
+import socket
+import subprocess
+import sys
+import time
+
+from tests.helpers import seed_catalog
+from .common import create_bench_app, insert_courses, summarize
+
+PORT = 8731
+CACHE_PORT = 8732
+# Polled until the server answers it with a 2xx
+READY_PATH = '/v1/api/courses?limit=1'
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def request_mix(course_count, rng):
+    course_id = rng.randint(1, course_count)
+    return rng.choice((
+        f'/v1/api/courses/{course_id}',
+        f'/v1/api/courses/{course_id}',
+        '/v1/api/courses?limit=50',
+        '/v1/api/courses/search?q=data&limit=20',
+        '/v1/api/courses/suggest?prefix=comp',
+        f'/v1/api/ratings/courses/{course_id}',
+        f'/v1/api/comments/courses/{rng.randint(1, 20)}',
+        f'/v1/api/instructors/{rng.randint(1, 4)}',
+    ))
+
+
+def client(connections, seconds, course_count, seed_value, results):
+    """Keep ``connections`` keep-alive connections busy, one request at a time each, round robin."""
+    import threading
+
+    rng = random.Random(seed_value)
+    deadline = time.monotonic() + seconds
+    latencies, errors = [], 0
+    lock = threading.Lock()
+
+    def run():
+        nonlocal errors
+        connection = http.client.HTTPConnection('127.0.0.1', PORT, timeout=30)
+        while time.monotonic() < deadline:
+            url = request_mix(course_count, rng)
+            start = time.perf_counter()
+            try:
+                connection.request('GET', url)
+                response = connection.getresponse()
+                response.read()
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                connection.close()
+                connection = http.client.HTTPConnection('127.0.0.1', PORT, timeout=30)
+                ok = False
+            elapsed = (time.perf_counter() - start) * 1000
+            with lock:
+                if ok:
+                    latencies.append(elapsed)
+                else:
+                    errors += 1
+        connection.close()
+
+    threads = [threading.Thread(target=run) for _ in range(connections)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    results.put((latencies, errors))
+
+
+def server_cpu_seconds(pid):
+    """User plus system CPU time of ``pid`` and its live child processes."""
+    ticks = os.sysconf('SC_CLK_TCK')
+    total = 0
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as stat:
+                fields = stat.read().rsplit(')', 1)[1].split()
+        except OSError:
+            continue
+        if int(entry) == pid or int(fields[1]) == pid:
+            total += (int(fields[11]) + int(fields[12])) / ticks
+    return total
+
+
+def wait_until_up(process):
+    for _ in range(300):
+        if process.poll() is not None:
+            raise RuntimeError('Server exited during startup')
+        try:
+            connection = http.client.HTTPConnection('127.0.0.1', PORT, timeout=1)
+            connection.request('GET', READY_PATH)
+            response = connection.getresponse()
+            response.read()
+        except OSError:
+            time.sleep(0.1)
+            continue
+        if 200 <= response.status < 300:
+            return
+        raise RuntimeError(f'Server answered GET {READY_PATH} with {response.status}')
+    raise RuntimeError('Server did not start')
+
+
+def start_cache_standin():
+    """Start ``benchmarks.resp_standin`` on ``CACHE_PORT`` and wait until it accepts connections."""
+    process = subprocess.Popen([sys.executable, '-m', 'benchmarks.resp_standin', '--port', str(CACHE_PORT)],
+                               cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(100):
+        if process.poll() is not None:
+            raise RuntimeError('Redis stand-in exited during startup')
+        try:
+            socket.create_connection(('127.0.0.1', CACHE_PORT), timeout=1).close()
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError('Redis stand-in did not start')
+
+
+def start_server(variant, env, workers, threads):
+    if variant == 'dev':
+        command = [sys.executable, '-c', f'from run import app; app.run(debug=True, port={PORT}, use_reloader=False)']
+    else:
+        command = [sys.executable, '-m', 'gunicorn', 'run:app']
+        env = dict(env, WEB_BIND=f'127.0.0.1:{PORT}', WEB_WORKERS=str(workers), WEB_THREADS=str(threads))
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def run(seconds, clients, courses, workers, threads, cache):
+    app = create_bench_app()
+    with app.app_context():
+        seed_catalog()
+        insert_courses(courses, seed=1)
+    env = dict(
+        os.environ,
+        DATABASE_URL=app.config['SQLALCHEMY_DATABASE_URI'],
+        RESPONSE_CACHE_BACKEND='none',
+        PASSWORD_HASH_WORKERS='1',
+    )
+    shared_cache = cache and workers > 1
+    if shared_cache:
+        env.update(RESPONSE_CACHE_BACKEND='redis', RESPONSE_CACHE_URL=f'redis://127.0.0.1:{CACHE_PORT}/0')
+    elif cache:
+        env.update(RESPONSE_CACHE_BACKEND='memory')
+    processes = max(1, min(clients, os.cpu_count() or 1, 4))
+
+    print(f'{clients} connections from {processes} client process(es) for {seconds} s on {os.cpu_count()} CPU(s); '
+          f'response cache {env["RESPONSE_CACHE_BACKEND"]}')
+    print(f'{"server":<22}{"req/s":>8}{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}{"CPU ms/req":>12}{"errors":>8}')
+    for variant in ('dev', 'gunicorn'):
+        # A fresh stand-in, so gunicorn does not start on the entries the dev server cached
+        standin = start_cache_standin() if shared_cache else None
+        server = start_server(variant, env, workers, threads)
+        try:
+            wait_until_up(server)
+            results = multiprocessing.Queue()
+            shares = [clients // processes + (index < clients % processes) for index in range(processes)]
+            procs = [
+                multiprocessing.Process(target=client, args=(share, seconds, courses, index, results))
+                for index, share in enumerate(shares)
+            ]
+            cpu_before = server_cpu_seconds(server.pid)
+            for proc in procs:
+                proc.start()
+            latencies, errors = [], 0
+            for _ in procs:
+                proc_latencies, proc_errors = results.get()
+                latencies.extend(proc_latencies)
+                errors += proc_errors
+            cpu = server_cpu_seconds(server.pid) - cpu_before
+            for proc in procs:
+                proc.join()
+        finally:
+            server.send_signal(signal.SIGTERM)
+            server.wait(timeout=60)
+            if standin:
+                standin.terminate()
+                standin.wait(timeout=10)
+        label = 'dev (debug)' if variant == 'dev' else f'gunicorn {workers}w x {threads}t'
+        stats = summarize(latencies)
+        print(f'{label:<22}{len(latencies) / seconds:>8.0f}{stats["p50_ms"]:>9.1f}{stats["p95_ms"]:>9.1f}'
+              f'{stats["p99_ms"]:>9.1f}{cpu * 1000 / len(latencies):>12.2f}{errors:>8}')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--seconds', type=int, default=20)
+    parser.add_argument('--clients', type=int, default=32)
+    parser.add_argument('--courses', type=int, default=2000)
+    parser.add_argument('--workers', type=int, default=3)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--cache', action='store_true',
+                        help='turn the response cache on: the memory backend with --workers 1, otherwise the '
+                             'Redis backend on a benchmarks.resp_standin process shared by the workers')
+    arguments = parser.parse_args()
+    run(arguments.seconds, arguments.clients, arguments.courses, arguments.workers, arguments.threads, arguments.cache)
@@ -0,0 +1,112 @@
+# benchmarks/resp_standin.py
+"""
+Minimal in-memory server speaking the Redis protocol, for running the Redis response
+cache backend without a Redis install.
+
+    python -m benchmarks.resp_standin --port 6390
+    RESPONSE_CACHE_BACKEND=redis RESPONSE_CACHE_URL=redis://localhost:6390/0 flask run
+
+Supports the commands the app uses (GET, SET with EX, MGET, INCR) plus PING, DEL,
+SELECT and FLUSHDB. Not a Redis replacement: one database, no persistence.
+"""
+import argparse
+import asyncio
+import time
+
+
+class Store:
+    def __init__(self):
+        self.values = {}  # key -> (value, expires_at or None)
+
+    def get(self, key):
+        entry = self.values.get(key)
+        if entry is None:
+            return None
+        if entry[1] is not None and entry[1] <= time.monotonic():
+            del self.values[key]
+            return None
+        return entry[0]
+
+    def execute(self, command, args):
+        if command == b'PING':
+            return b'+PONG'
+        if command in (b'SELECT', b'AUTH'):
+            return b'+OK'
+        if command == b'GET':
+            return self.get(args[0])
+        if command == b'MGET':
+            return [self.get(key) for key in args]
+        if command == b'SET':
+            expires_at = None
+            if len(args) >= 4 and args[2].upper() == b'EX':
+                expires_at = time.monotonic() + int(args[3])
+            self.values[args[0]] = (args[1], expires_at)
+            return b'+OK'
+        if command == b'INCR':
+            value = int(self.get(args[0]) or 0) + 1
+            self.values[args[0]] = (str(value).encode(), None)
+            return value
+        if command == b'DEL':
+            return sum(self.values.pop(key, None) is not None for key in args)
+        if command == b'FLUSHDB':
+            self.values.clear()
+            return b'+OK'
+        return b'-ERR unknown command ' + command
+
+
+def encode(reply):
+    if reply is None:
+        return b'$-1\r\n'
+    if isinstance(reply, int):
+        return b':%d\r\n' % reply
+    if isinstance(reply, list):
+        return b'*%d\r\n' % len(reply) + b''.join(encode(item) for item in reply)
+    if reply[:1] in (b'+', b'-'):
+        return reply + b'\r\n'
+    return b'$%d\r\n%s\r\n' % (len(reply), reply)
+
+
+async def read_command(reader):
+    header = await reader.readline()
+    if not header:
+        return None
+    count = int(header[1:-2])
+    args = []
+    for _ in range(count):
+        length = int((await reader.readline())[1:-2])
+        args.append((await reader.readexactly(length + 2))[:-2])
+    return args
+
+
+async def serve(host, port):
+    store = Store()
+
+    async def handle(reader, writer):
+        try:
+            while True:
+                args = await read_command(reader)
+                if args is None:
+                    break
+                writer.write(encode(store.execute(args[0].upper(), args[1:])))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    print(f'Listening on {host}:{port}')
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6390)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,350 @@
+# benchmarks/seed_data.py
+"""
+Fill a database with a realistic synthetic dataset at a chosen scale.
+
+Usage: python -m benchmarks.seed_data [--scale small|medium|full] [--database-url URL] [--seed 0]
+                                      [--courses N] [--instructors N] [--users N] [--ratings N]
+                                      [--comments N] [--likes N] [--follows N]
+
+Drops and recreates every table of the database (BENCH_DATABASE_URL, or a new
+SQLite file whose URL is printed), then writes the rows in batches with COPY
+on PostgreSQL and multi-row INSERTs elsewhere. Rows carry explicit ids, so the
+generator never reads back what it wrote; sequences are moved past them at the
+end. Popularity is skewed the way a real site's is: a few courses, comments
+and instructors draw most of the ratings, threads, likes and follows.
+
+Every user's password is ``BENCH_PASSWORD``. Rating aggregates and comment like
+counts are written alongside the rows they summarise, so they start consistent;
+course rankings are then built from the aggregates by ``refresh_rankings``.
+"""
+import argparse
+import csv
+import io
+import random
+import time
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+from sqlalchemy import text
+
+from app.models import (
+    db, Comment, Course, CourseInstructor, Follow, Instructor, Like, Rating, RatingAggregate, RatingDimension, User
+)
+from app.ratings.aggregates import SCORES
+from app.ratings.rankings import refresh_rankings
+from app.utils import hash_password
+from config import Config
+from .common import SYLLABLES, create_bench_app, synthetic_courses, vocabulary
+
+BENCH_PASSWORD = 'benchmark-password'
+DIMENSIONS = ('difficulty', 'workload', 'grading', 'lecture_quality')
+SEMESTERS = ('2022F', '2023S', '2023F', '2024S', '2024F', '2025S')
+# Seeded rows are spread over this period, oldest first
+START = datetime(2022, 9, 1)
+PERIOD_SECONDS = 3 * 365 * 24 * 3600
+# Part of the reviews and comments about a course as a whole; the rest are about one of its instructors
+COURSE_SHARE = 0.7
+
+# Row counts per table; ratings are per dimension, so ratings / len(DIMENSIONS) reviews
+SCALES = {
+    'small': {
+        'courses': 500, 'instructors': 150, 'users': 2_000, 'ratings': 40_000,
+        'comments': 10_000, 'likes': 20_000, 'follows': 10_000,
+    },
+    'medium': {
+        'courses': 5_000, 'instructors': 1_250, 'users': 50_000, 'ratings': 1_000_000,
+        'comments': 250_000, 'likes': 500_000, 'follows': 250_000,
+    },
+    'full': {
+        'courses': 20_000, 'instructors': 5_000, 'users': 200_000, 'ratings': 5_000_000,
+        'comments': 1_000_000, 'likes': 2_000_000, 'follows': 1_000_000,
+    },
+}
+
+
+def allot(total, buckets, rng, cap, exponent=0.8):
+    """
+    Split ``total`` items over ``buckets`` along a shuffled Zipf curve, at most ``cap`` per bucket.
+
+    Returns:
+        list[int]: Items per bucket; sums to ``total`` unless every bucket is full.
+    """
+    weights = [1 / rank ** exponent for rank in range(1, buckets + 1)]
+    scale = total / sum(weights)
+    counts = [min(cap, int(weight * scale)) for weight in weights]
+    # Hand what rounding and the cap left over to the buckets that still have room, most popular first
+    missing = total - sum(counts)
+    while missing > 0:
+        open_buckets = [index for index, count in enumerate(counts) if count < cap]
+        if not open_buckets:
+            break
+        share = max(1, missing // len(open_buckets))
+        for index in open_buckets:
+            extra = min(share, cap - counts[index], missing)
+            counts[index] += extra
+            missing -= extra
+            if not missing:
+                break
+    rng.shuffle(counts)
+    return counts
+
+
+def spread(total, courses, course_instructors, rng, cap):
+    """Allot ``total`` items over courses and course-instructor pairs, ``COURSE_SHARE`` of them to courses."""
+    on_courses = int(total * COURSE_SHARE)
+    return [
+        *zip((('course_id', index) for index in courses), allot(on_courses, len(courses), rng, cap)),
+        *zip((('course_instructor_id', index) for index in course_instructors),
+             allot(total - on_courses, len(course_instructors), rng, cap)),
+    ]
+
+
+def timestamp(rng):
+    return START + timedelta(seconds=rng.randrange(PERIOD_SECONDS))
+
+
+class BulkWriter:
+    """
+    Write row dicts to a table in batches, inside the session's transaction.
+
+    PostgreSQL gets ``COPY ... FROM STDIN``, which is several times faster than
+    INSERT at millions of rows; other databases get one executemany INSERT per batch.
+    """
+
+    def __init__(self, batch_size):
+        self.batch_size = batch_size
+        self.written = {}
+
+    def write(self, table, rows):
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) == self.batch_size:
+                self._write_batch(table, batch)
+                batch = []
+        if batch:
+            self._write_batch(table, batch)
+
+    def _write_batch(self, table, batch):
+        connection = db.session.connection()
+        if connection.dialect.name == 'postgresql':
+            columns = list(batch[0])
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            for row in batch:
+                writer.writerow(row[column] for column in columns)
+            buffer.seek(0)
+            with connection.connection.driver_connection.cursor() as cursor:
+                cursor.copy_expert(f'COPY {table.name} ({", ".join(columns)}) FROM STDIN WITH (FORMAT csv)', buffer)
+        else:
+            connection.execute(table.insert(), batch)
+        self.written[table.name] = self.written.get(table.name, 0) + len(batch)
+
+
+def instructor_names(count, rng):
+    def word():
+        return ''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 3))).capitalize()
+
+    for index in range(1, count + 1):
+        yield {
+            'id': index,
+            'name': f'{word()} {word()}',
+            'profile_url': f'https://faculty.example.edu/{index}',
+            'created_at': START,
+        }
+
+
+def course_instructor_rows(courses, instructors, rng):
+    """Every course is taught by one to three instructors, each in one to three semesters."""
+    next_id = 1
+    for course_id in range(1, courses + 1):
+        for instructor_id in rng.sample(range(1, instructors + 1), min(instructors, rng.choice((1, 1, 2, 2, 3)))):
+            for semester in sorted(rng.sample(SEMESTERS, rng.randint(1, 3))):
+                yield {
+                    'id': next_id,
+                    'course_id': course_id,
+                    'instructor_id': instructor_id,
+                    'semester': semester,
+                    'created_at': START,
+                }
+                next_id += 1
+
+
+def rating_rows(targets, users, rng, aggregates):
+    """
+    Reviews of ``(target, count)`` pairs: each rates the target on every dimension, one review per user and target.
+
+    Scores centre on a per-target quality, so averages differ between targets.
+    Fills ``aggregates`` with the running totals of the rows it yields.
+    """
+    next_id = 1
+    for (column, target_id), count in targets:
+        quality = min(4.8, max(1.5, rng.gauss(3.6, 0.7)))
+        for user_id in rng.sample(range(1, users + 1), count):
+            created_at = timestamp(rng)
+            for dimension_id in range(1, len(DIMENSIONS) + 1):
+                score = min(5, max(1, round(rng.gauss(quality, 1.0))))
+                key = (target_id if column == 'course_id' else None,
+                       target_id if column == 'course_instructor_id' else None,
+                       dimension_id)
+                totals = aggregates.setdefault(key, [0] * (2 + len(SCORES)))
+                totals[0] += score
+                totals[1] += 1
+                totals[1 + score] += 1
+                yield {
+                    'id': next_id,
+                    'user_id': user_id,
+                    'course_id': key[0],
+                    'course_instructor_id': key[1],
+                    'rating_dimension_id': dimension_id,
+                    'score': score,
+                    'created_at': created_at,
+                }
+                next_id += 1
+
+
+def aggregate_rows(aggregates):
+    for index, ((course_id, course_instructor_id, dimension_id), totals) in enumerate(aggregates.items(), start=1):
+        yield {
+            'id': index,
+            'course_id': course_id,
+            'course_instructor_id': course_instructor_id,
+            'rating_dimension_id': dimension_id,
+            'score_sum': totals[0],
+            'score_count': totals[1],
+            **{f'count_{score}': totals[1 + score] for score in SCORES},
+            'updated_at': START,
+        }
+
+
+def comment_rows(targets, users, like_counts, rng):
+    """
+    ``count`` comments per ``(target, count)`` pair; about a third start a thread, the rest reply.
+
+    Replies go to one of the target's recent comments, so threads nest several
+    levels deep. Comments are numbered in the order they were written.
+    """
+    words = vocabulary(seed=rng.randrange(1000))
+    cumulative = list(accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    next_id = 1
+    for (column, target_id), count in targets:
+        created_at = timestamp(rng)
+        recent = []
+        for position in range(count):
+            parent_id = rng.choice(recent[-20:]) if position and rng.random() > 0.35 else None
+            created_at += timedelta(seconds=rng.randrange(60, 86400))
+            yield {
+                'id': next_id,
+                'user_id': rng.randint(1, users),
+                'course_id': target_id if column == 'course_id' else None,
+                'course_instructor_id': target_id if column == 'course_instructor_id' else None,
+                'parent_comment_id': parent_id,
+                'content': ' '.join(rng.choices(words, cum_weights=cumulative, k=rng.randint(5, 60))).capitalize() + '.',
+                'like_count': like_counts[next_id - 1],
+                'created_at': created_at,
+            }
+            recent.append(next_id)
+            next_id += 1
+
+
+def pair_rows(counts, users, column, rng):
+    """``count`` distinct users per item of ``counts`` (numbered from 1), as rows of ``user_id`` and ``column``."""
+    next_id = 1
+    for item_id, count in enumerate(counts, start=1):
+        for user_id in rng.sample(range(1, users + 1), count):
+            yield {'id': next_id, 'user_id': user_id, column: item_id, 'created_at': timestamp(rng)}
+            next_id += 1
+
+
+def seed_database(counts, seed=0, batch_size=10_000, log=print):
+    """
+    Write the synthetic dataset described by ``counts`` (see ``SCALES``); must be called inside an app context.
+
+    Args:
+        counts (dict): Rows per table, keyed like ``SCALES['small']``.
+        seed (int): Random seed; the same seed and counts always give the same data.
+        batch_size (int): Rows per COPY or INSERT.
+        log (callable): Receives a progress line per table.
+
+    Returns:
+        dict: Rows written per table.
+    """
+    rng = random.Random(seed)
+    writer = BulkWriter(batch_size)
+    users, courses, instructors = counts['users'], counts['courses'], counts['instructors']
+
+    def step(table, rows):
+        start = time.perf_counter()
+        writer.write(table, rows)
+        elapsed = time.perf_counter() - start
+        written = writer.written.get(table.name, 0)
+        log(f'{table.name:<20}{written:>12,} rows {elapsed:>8.1f} s {written / max(elapsed, 1e-9):>12,.0f} rows/s')
+
+    step(RatingDimension.__table__, (
+        {'id': index, 'name': name, 'description': f'{name.replace("_", " ").capitalize()} of the course', 'created_at': START}
+        for index, name in enumerate(DIMENSIONS, start=1)
+    ))
+    # One bcrypt hash shared by every user: hashing each would take hours at this cost
+    password_hash = hash_password(BENCH_PASSWORD)
+    domain = Config.PERMITTED_EMAIL_DOMAINS[0]
+    step(User.__table__, (
+        {'id': index, 'email': f'user{index}@{domain}', 'password_hash': password_hash,
+         'name': f'user{index}', 'created_at': timestamp(rng)}
+        for index in range(1, users + 1)
+    ))
+    step(Course.__table__, (
+        dict(row, id=index, created_at=START + timedelta(minutes=index))
+        for index, row in enumerate(synthetic_courses(courses, seed), start=1)
+    ))
+    step(Instructor.__table__, instructor_names(instructors, rng))
+    course_instructors = list(course_instructor_rows(courses, instructors, rng))
+    step(CourseInstructor.__table__, course_instructors)
+
+    course_ids = range(1, courses + 1)
+    course_instructor_ids = [row['id'] for row in course_instructors]
+    aggregates = {}
+    reviews = spread(counts['ratings'] // len(DIMENSIONS), course_ids, course_instructor_ids, rng, cap=users)
+    step(Rating.__table__, rating_rows(reviews, users, rng, aggregates))
+    step(RatingAggregate.__table__, aggregate_rows(aggregates))
+    del aggregates
+
+    like_counts = allot(counts['likes'], counts['comments'], rng, cap=users, exponent=1.0)
+    threads = spread(counts['comments'], course_ids, course_instructor_ids, rng, cap=counts['comments'])
+    step(Comment.__table__, comment_rows(threads, users, like_counts, rng))
+    step(Like.__table__, pair_rows(like_counts, users, 'comment_id', rng))
+    step(Follow.__table__, pair_rows(allot(counts['follows'], courses, rng, cap=users), users, 'course_id', rng))
+
+    if db.engine.dialect.name == 'postgresql':
+        for table in db.metadata.sorted_tables:
+            if 'id' in table.c and table.name in writer.written:
+                db.session.execute(text(
+                    f"SELECT setval(pg_get_serial_sequence('{table.name}', 'id'), (SELECT max(id) FROM {table.name}))"
+                ))
+    db.session.commit()
+
+    start = time.perf_counter()
+    writer.written['course_rankings'] = sum(changed for _, changed, _, _ in refresh_rankings(full=True))
+    elapsed = time.perf_counter() - start
+    log(f'{"course_rankings":<20}{writer.written["course_rankings"]:>12,} rows {elapsed:>8.1f} s')
+    with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+        connection.execute(text('ANALYZE'))
+    return writer.written
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scale', choices=SCALES, default='small')
+    parser.add_argument('--database-url')
+    parser.add_argument('--seed', type=int, default=0)
+    for name in SCALES['small']:
+        parser.add_argument(f'--{name}', type=int, help=f'Override the scale\'s number of {name}')
+    arguments = parser.parse_args()
+    counts = {name: getattr(arguments, name) or default for name, default in SCALES[arguments.scale].items()}
+
+    Config.SUGGEST_WARM_ON_STARTUP = False
+    app = create_bench_app(arguments.database_url)
+    print(f'Seeding {app.config["SQLALCHEMY_DATABASE_URI"]}')
+    start = time.perf_counter()
+    with app.app_context():
+        written = seed_database(counts, arguments.seed)
+    print(f'{sum(written.values()):,} rows in {time.perf_counter() - start:.1f} s')
@@ -1,4 +1,5 @@
 # config.py
+import json
 import os
 from dotenv import load_dotenv
 
@@ -14,10 +15,64 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Connection pool of each worker process: connections kept open, extra ones opened under bursts,
+    # seconds to wait for a free one, a liveness check on checkout so connections dropped by a database
+    # restart or an idle timeout are replaced, and seconds after which a connection is reopened
+    DATABASE_POOL_SIZE = int(os.environ.get('DATABASE_POOL_SIZE', '5'))
+    DATABASE_MAX_OVERFLOW = int(os.environ.get('DATABASE_MAX_OVERFLOW', '5'))
+    DATABASE_POOL_TIMEOUT = float(os.environ.get('DATABASE_POOL_TIMEOUT', '10'))
+    DATABASE_POOL_PRE_PING = os.environ.get('DATABASE_POOL_PRE_PING', 'true').lower() == 'true'
+    DATABASE_POOL_RECYCLE = int(os.environ.get('DATABASE_POOL_RECYCLE', '1800'))
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': DATABASE_POOL_SIZE,
+        'max_overflow': DATABASE_MAX_OVERFLOW,
+        'pool_timeout': DATABASE_POOL_TIMEOUT,
+        'pool_pre_ping': DATABASE_POOL_PRE_PING,
+        'pool_recycle': DATABASE_POOL_RECYCLE,
+    }
+    # PostgreSQL connections to leave for migrations, psql, cron jobs and the like when checking that
+    # every worker's pool fits under the server's max_connections
+    DATABASE_RESERVED_CONNECTIONS = int(os.environ.get('DATABASE_RESERVED_CONNECTIONS', '10'))
+
+    # Read replicas, as comma-separated URLs. GET requests to the course, instructor, rating and comment
+    # endpoints read from them in turn; writes stay on the primary, and so do reads by a user, or of
+    # cached responses, within DATABASE_REPLICA_PIN_SECONDS of a write to them (longer than replica lag)
+    DATABASE_REPLICA_URLS = [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    DATABASE_REPLICA_PIN_SECONDS = int(os.environ.get('DATABASE_REPLICA_PIN_SECONDS', '5'))
+
+    # Production server (gunicorn.conf.py): address, worker processes, threads per worker, seconds
+    # a request may run before its worker is restarted, seconds workers get to finish in-flight
+    # requests on shutdown, and seconds an idle keep-alive connection stays open
+    WEB_BIND = os.environ.get('WEB_BIND', '0.0.0.0:3000')
+    WEB_WORKERS = int(os.environ.get('WEB_WORKERS', str(2 * (os.cpu_count() or 1) + 1)))
+    WEB_THREADS = int(os.environ.get('WEB_THREADS', '4'))
+    WEB_TIMEOUT = int(os.environ.get('WEB_TIMEOUT', '30'))
+    WEB_GRACEFUL_TIMEOUT = int(os.environ.get('WEB_GRACEFUL_TIMEOUT', '30'))
+    WEB_KEEPALIVE = int(os.environ.get('WEB_KEEPALIVE', '5'))
+
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY', 'dev_jwt_secret_key')
 
     HUNTER_API_KEY = os.environ.get('HUNTER_API_KEY', 'default_hunter_api_key')
     HUNTER_API_URL = os.environ.get('HUNTER_API_URL', 'https://api.hunter.io/v2/email-verifier')
+    # Hunter client: timeouts in seconds, pooled connections, result cache, and the circuit breaker
+    # (consecutive failures before falling back to the domain check, and seconds before retrying)
+    HUNTER_CONNECT_TIMEOUT = float(os.environ.get('HUNTER_CONNECT_TIMEOUT', '1.0'))
+    HUNTER_READ_TIMEOUT = float(os.environ.get('HUNTER_READ_TIMEOUT', '3.0'))
+    HUNTER_POOL_SIZE = int(os.environ.get('HUNTER_POOL_SIZE', '10'))
+    HUNTER_CACHE_TTL = int(os.environ.get('HUNTER_CACHE_TTL', '86400'))
+    HUNTER_CACHE_MAX_ENTRIES = int(os.environ.get('HUNTER_CACHE_MAX_ENTRIES', '10000'))
+    HUNTER_BREAKER_THRESHOLD = int(os.environ.get('HUNTER_BREAKER_THRESHOLD', '5'))
+    HUNTER_BREAKER_COOLDOWN = int(os.environ.get('HUNTER_BREAKER_COOLDOWN', '30'))
+
+    # bcrypt cost factor for stored passwords; hashes made with another cost are upgraded at login
+    BCRYPT_ROUNDS = int(os.environ.get('BCRYPT_ROUNDS', '12'))
+    # Password hashing pool: 'process' or 'thread' workers, concurrent hashes for the whole server
+    # (gunicorn splits them between its workers), requests allowed to wait for a worker before logins
+    # are refused with 503, and seconds to wait for a result
+    PASSWORD_HASH_EXECUTOR = os.environ.get('PASSWORD_HASH_EXECUTOR', 'process')
+    PASSWORD_HASH_WORKERS = int(os.environ.get('PASSWORD_HASH_WORKERS', str(os.cpu_count() or 1)))
+    PASSWORD_HASH_MAX_QUEUE = int(os.environ.get('PASSWORD_HASH_MAX_QUEUE', '32'))
+    PASSWORD_HASH_TIMEOUT = float(os.environ.get('PASSWORD_HASH_TIMEOUT', '5'))
 
     PERMITTED_EMAIL_DOMAINS = os.environ.get(
         'PERMITTED_EMAIL_DOMAINS',
@@ -27,4 +82,91 @@ class Config:
     TEST_ACCOUNTS = os.environ.get(
         'TEST_ACCOUNTS',
         'teststudent@university.edu'
-    ).split(',')
\ No newline at end of file
+    ).split(',')
+
+    # Largest number of ids accepted by the batch ratings endpoints
+    RATINGS_BATCH_MAX_IDS = int(os.environ.get('RATINGS_BATCH_MAX_IDS', '500'))
+
+    # Course rankings behind GET /courses?sort=dimension:<name>: how many votes' worth of the dimension
+    # mean each course's average is smoothed with, how far that mean may drift before every course is
+    # rescored, and seconds of rating_aggregates updates re-read before the last refresh, so transactions
+    # that committed after it with an earlier timestamp are still picked up
+    RANKING_PRIOR_VOTES = int(os.environ.get('RANKING_PRIOR_VOTES', '10'))
+    RANKING_PRIOR_TOLERANCE = float(os.environ.get('RANKING_PRIOR_TOLERANCE', '0.01'))
+    RANKING_REFRESH_OVERLAP = int(os.environ.get('RANKING_REFRESH_OVERLAP', '300'))
+
+    # Course search: page sizes, and how long the in-process indexes (typeahead, and search on
+    # non-PostgreSQL backends) may go without a full rebuild
+    SEARCH_DEFAULT_LIMIT = int(os.environ.get('SEARCH_DEFAULT_LIMIT', '20'))
+    SEARCH_MAX_LIMIT = int(os.environ.get('SEARCH_MAX_LIMIT', '100'))
+    SEARCH_INDEX_TTL = int(os.environ.get('SEARCH_INDEX_TTL', '300'))
+
+    # Course typeahead: suggestion counts, and whether to build its index when the app starts
+    SUGGEST_DEFAULT_LIMIT = int(os.environ.get('SUGGEST_DEFAULT_LIMIT', '10'))
+    SUGGEST_MAX_LIMIT = int(os.environ.get('SUGGEST_MAX_LIMIT', '20'))
+    SUGGEST_WARM_ON_STARTUP = os.environ.get('SUGGEST_WARM_ON_STARTUP', 'true').lower() == 'true'
+
+    # Comment threads: threads per page, reply depth and replies returned under each comment
+    COMMENTS_DEFAULT_LIMIT = int(os.environ.get('COMMENTS_DEFAULT_LIMIT', '50'))
+    COMMENTS_MAX_LIMIT = int(os.environ.get('COMMENTS_MAX_LIMIT', '200'))
+    COMMENTS_DEFAULT_DEPTH = int(os.environ.get('COMMENTS_DEFAULT_DEPTH', '3'))
+    COMMENTS_MAX_DEPTH = int(os.environ.get('COMMENTS_MAX_DEPTH', '10'))
+    COMMENTS_DEFAULT_REPLIES = int(os.environ.get('COMMENTS_DEFAULT_REPLIES', '50'))
+    COMMENTS_MAX_REPLIES = int(os.environ.get('COMMENTS_MAX_REPLIES', '500'))
+
+    # Reference data (rating dimensions, instructors): seconds a worker serves its cached copy
+    # before checking the shared version counter for changes made by other workers
+    REFERENCE_CACHE_TTL = int(os.environ.get('REFERENCE_CACHE_TTL', '60'))
+
+    # Response cache for public GET routes: 'memory' (per process, LRU), 'redis' (shared, so a write
+    # invalidates every worker's entries) or 'none'. gunicorn refuses 'memory' with WEB_WORKERS > 1, so
+    # by default it is 'redis' when RESPONSE_CACHE_URL is set, 'memory' with one worker and 'none' otherwise
+    RESPONSE_CACHE_BACKEND = os.environ.get(
+        'RESPONSE_CACHE_BACKEND',
+        'redis' if 'RESPONSE_CACHE_URL' in os.environ else 'memory' if WEB_WORKERS == 1 else 'none'
+    )
+    RESPONSE_CACHE_URL = os.environ.get('RESPONSE_CACHE_URL', 'redis://localhost:6379/0')
+    RESPONSE_CACHE_TTL = int(os.environ.get('RESPONSE_CACHE_TTL', '300'))
+    RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get('RESPONSE_CACHE_MAX_ENTRIES', '10000'))
+    # Streamed responses larger than this many bytes are passed through without being cached
+    RESPONSE_CACHE_MAX_STREAMED_BYTES = int(os.environ.get('RESPONSE_CACHE_MAX_STREAMED_BYTES', str(8 * 1024 * 1024)))
+
+    # Response compression: gzip, and brotli when the optional brotli package is installed. Bodies under
+    # COMPRESSION_MIN_SIZE bytes go out as they are. The CACHED levels are paid once per response cache
+    # entry, whose compressed variants are stored next to its body and replayed on every hit
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', '1024'))
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', '4'))
+    COMPRESSION_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_BROTLI_QUALITY', '4'))
+    COMPRESSION_CACHED_GZIP_LEVEL = int(os.environ.get('COMPRESSION_CACHED_GZIP_LEVEL', '9'))
+    COMPRESSION_CACHED_BROTLI_QUALITY = int(os.environ.get('COMPRESSION_CACHED_BROTLI_QUALITY', '9'))
+
+    # Cache-Control per endpoint of the cached GET routes, as JSON in CACHE_CONTROL; other routes get
+    # CACHE_CONTROL_DEFAULT. 'no-cache' lets clients keep a response but revalidate it with its ETag
+    CACHE_CONTROL_DEFAULT = os.environ.get('CACHE_CONTROL_DEFAULT', 'no-cache')
+    CACHE_CONTROL = json.loads(os.environ.get('CACHE_CONTROL', json.dumps({
+        'courses.get_courses': 'public, max-age=300',
+        'courses.get_course': 'public, max-age=60',
+        'instructors.get_instructor': 'public, max-age=300',
+    })))
+
+    # SQL instrumentation: send X-Query-Count and Server-Timing headers outside debug mode too, and
+    # log requests over these statement, database time (ms) and repeated-statement (N+1) thresholds
+    SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING_ENABLED', 'false').lower() == 'true'
+
+    # Operations endpoints (/v1/api/ops: cache counters per worker). They are unauthenticated,
+    # so only enable them where the API is not reachable by the public
+    OPS_ENDPOINTS_ENABLED = os.environ.get('OPS_ENDPOINTS_ENABLED', 'false').lower() == 'true'
+    SQL_WARN_QUERY_COUNT = int(os.environ.get('SQL_WARN_QUERY_COUNT', '20'))
+    SQL_WARN_DB_TIME_MS = float(os.environ.get('SQL_WARN_DB_TIME_MS', '200'))
+    SQL_WARN_REPEATED_STATEMENTS = int(os.environ.get('SQL_WARN_REPEATED_STATEMENTS', '5'))
+
+    # Page size of the keyset-paginated lists (courses, instructors, followed courses)
+    LIST_DEFAULT_LIMIT = int(os.environ.get('LIST_DEFAULT_LIMIT', '50'))
+    LIST_MAX_LIMIT = int(os.environ.get('LIST_MAX_LIMIT', '500'))
+
+    # Rows fetched per round trip (server-side cursor on PostgreSQL) when streaming bulk listings
+    STREAM_BATCH_SIZE = int(os.environ.get('STREAM_BATCH_SIZE', '1000'))
+
+    # Records upserted per transaction by `flask catalog import`
+    CATALOG_IMPORT_BATCH_SIZE = int(os.environ.get('CATALOG_IMPORT_BATCH_SIZE', '1000'))
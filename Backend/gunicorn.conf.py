@@ -0,0 +1,53 @@
+# gunicorn.conf.py
+"""
+Production server: run ``gunicorn run:app`` from this directory, which loads this file.
+
+The app is created once in the master before forking (``preload_app``), so
+workers start at once and share the memory of what it built, such as the
+course suggestion index. Each worker serves ``WEB_THREADS`` requests at a time
+with its own connection pool, and hashes passwords on its share of
+``PASSWORD_HASH_WORKERS``; the master refuses to start if all the pools
+together could exceed the PostgreSQL connection budget, or if several workers
+would each keep their own memory response cache (use the Redis backend).
+
+SIGTERM or SIGINT shuts down gracefully: the listening socket closes, in-flight
+requests get ``WEB_GRACEFUL_TIMEOUT`` seconds to finish, then each worker
+closes its database connections and password hashing pool. SIGHUP replaces
+the workers with new ones the same way, without dropping requests.
+"""
+from config import Config
+
+bind = Config.WEB_BIND
+workers = Config.WEB_WORKERS
+threads = Config.WEB_THREADS
+worker_class = 'gthread'
+preload_app = True
+timeout = Config.WEB_TIMEOUT
+graceful_timeout = Config.WEB_GRACEFUL_TIMEOUT
+keepalive = Config.WEB_KEEPALIVE
+errorlog = '-'
+
+
+def on_starting(server):
+    from app.database import check_connection_budget
+    from app.response_cache import check_shared_cache
+
+    check_connection_budget(server.app.wsgi(), server.cfg.workers, server.cfg.threads)
+    check_shared_cache(server.cfg.workers)
+
+
+def post_fork(server, worker):
+    from app.auth.passwords import share_password_hasher
+    from app.database import dispose_engines
+
+    # Connections the master opened while loading the app stay with the master
+    dispose_engines(server.app.wsgi(), close=False)
+    share_password_hasher(server.cfg.workers)
+
+
+def worker_exit(server, worker):
+    from app.auth.passwords import password_hasher
+    from app.database import dispose_engines
+
+    dispose_engines(server.app.wsgi())
+    password_hasher.shutdown()
@@ -3,6 +3,7 @@ from app import create_app
 
 app = create_app()
 
+# Development server only; in production run `gunicorn run:app` from this directory (see gunicorn.conf.py)
 if __name__ == '__main__':
     app.run(debug=True, port=3000)
 
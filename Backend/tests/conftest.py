@@ -0,0 +1,70 @@
+# tests/conftest.py
+"""
+Shared fixtures. Run from Backend/: ``python -m pytest``.
+
+Every test gets the app on a fresh SQLite file, or on TEST_DATABASE_URL with
+its tables recreated, and with the response cache off; tests that need the
+cache configure it themselves.
+"""
+import os
+
+import pytest
+from flask_jwt_extended import create_access_token
+
+from app import create_app
+from app.models import db, User
+from app.reference_cache import reference_cache
+from app.response_cache import response_cache
+from config import Config
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    return os.environ.get('TEST_DATABASE_URL') or f'sqlite:///{tmp_path / "academisync.db"}'
+
+
+@pytest.fixture
+def app(database_url, monkeypatch):
+    monkeypatch.setattr(Config, 'SQLALCHEMY_DATABASE_URI', database_url)
+    monkeypatch.setattr(Config, 'SUGGEST_WARM_ON_STARTUP', False)
+    monkeypatch.setattr(response_cache, 'write_window', 0)
+    app = create_app()
+    app.config['TESTING'] = True
+    with app.app_context():
+        # The primary only: replica binds registered by earlier tests stay in db.metadatas
+        db.drop_all(bind_key=None)
+        db.create_all(bind_key=None)
+    # Process-wide caches would otherwise serve the previous test's database
+    reference_cache.drop_local(list(reference_cache.stats()))
+    response_cache.configure(None, 0)
+    yield app
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def auth_headers(app):
+    """Returns a function giving the Authorization header of a user id."""
+    def headers(user_id):
+        with app.app_context():
+            return {'Authorization': f'Bearer {create_access_token(identity=str(user_id))}'}
+    return headers
+
+
+@pytest.fixture
+def make_users(app):
+    """Returns a function creating ``count`` users and returning their ids."""
+    def make(count, prefix='student'):
+        with app.app_context():
+            users = [User(email=f'{prefix}{index}@example.edu', password_hash='x', name=f'{prefix}{index}')
+                     for index in range(count)]
+            db.session.add_all(users)
+            db.session.commit()
+            return [user.id for user in users]
+    return make
@@ -0,0 +1,71 @@
+# tests/fake_hunter.py
+"""
+Local stand-in for the Hunter.io email-verifier API.
+
+    python -m tests.fake_hunter --port 8765 [--delay 0.05] [--status-code 200]
+    HUNTER_API_URL=http://localhost:8765/v2/email-verifier flask run
+
+The verdict depends on the local part of the address: ``invalid...`` is invalid,
+``disposable...`` is disposable, anything else is valid. ``--delay`` and
+``--status-code`` simulate a slow or failing upstream; both can be changed at
+runtime through the returned server's ``behaviour`` dict, whose ``body``, when
+set, replaces the JSON reply to simulate a malformed one.
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+
+class FakeHunterHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        behaviour = self.server.behaviour
+        self.server.requests += 1
+        time.sleep(behaviour['delay'])
+
+        email = parse_qs(urlparse(self.path).query).get('email', [''])[0]
+        local_part = email.partition('@')[0]
+        status = 'valid'
+        for prefix in ('invalid', 'disposable'):
+            if local_part.startswith(prefix):
+                status = prefix
+
+        body = behaviour['body']
+        if body is None:
+            body = json.dumps({'data': {'email': email, 'status': status}}).encode()
+        try:
+            self.send_response(behaviour['status_code'])
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up (timeout) before the delayed reply
+            pass
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_fake_hunter(port=0, delay=0.0, status_code=200):
+    """Serve the fake API on a background thread; returns the server (``server.url`` is the endpoint)."""
+    server = ThreadingHTTPServer(('127.0.0.1', port), FakeHunterHandler)
+    server.daemon_threads = True
+    server.behaviour = {'delay': delay, 'status_code': status_code, 'body': None}
+    server.requests = 0
+    server.url = f'http://127.0.0.1:{server.server_address[1]}/v2/email-verifier'
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--delay', type=float, default=0.0)
+    parser.add_argument('--status-code', type=int, default=200)
+    arguments = parser.parse_args()
+    server = start_fake_hunter(arguments.port, arguments.delay, arguments.status_code)
+    print(f'Fake Hunter API at {server.url}')
+    threading.Event().wait()
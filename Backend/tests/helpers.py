@@ -0,0 +1,75 @@
+# tests/helpers.py
+"""Helpers shared by the tests; some benchmarks reuse them."""
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from app.models import db, Comment, Course, CourseInstructor, Follow, Instructor, Rating, RatingDimension, User
+from app.ratings.aggregates import rebuild_aggregates
+from app.ratings.rankings import refresh_rankings
+
+COURSES = 20
+INSTRUCTORS_PER_COURSE = 4
+
+
+def seed_catalog():
+    """
+    Seed a small catalog in which every course has several instructors, comments
+    with replies, ratings and followers, so a lazy load per row shows up as extra
+    statements. Must be called inside an app context.
+
+    Returns:
+        int: The id of the user who rated, commented on and follows every course.
+    """
+    db.session.add_all(RatingDimension(name=name) for name in ('difficulty', 'workload', 'grading', 'lecture_quality'))
+    user = User(email='student@example.edu', password_hash='x', name='student')
+    db.session.add(user)
+    instructors = [Instructor(name=f'Instructor {index}', profile_url=f'https://example.edu/{index}') for index in range(INSTRUCTORS_PER_COURSE)]
+    db.session.add_all(instructors)
+    for index in range(COURSES):
+        course = Course(course_code=f'TOPC{1000 + index}', name=f'Topic {index}', unit=3, description='Course topic')
+        db.session.add(course)
+        db.session.flush()
+        for instructor in instructors:
+            db.session.add(CourseInstructor(course=course, instructor=instructor, semester='2024F'))
+        db.session.add(Follow(user=user, course=course))
+        db.session.add(Rating(user=user, course=course, rating_dimension_id=1, score=4))
+        for thread in range(3):
+            root = Comment(user=user, course=course, content=f'Thread {thread}')
+            db.session.add(root)
+            db.session.flush()
+            db.session.add_all(Comment(user=user, course=course, parent_comment_id=root.id, content='Reply') for _ in range(2))
+    db.session.flush()
+    for course_instructor in CourseInstructor.query.filter_by(instructor_id=instructors[0].id):
+        db.session.add(Rating(user=user, course_instructor=course_instructor, rating_dimension_id=1, score=5))
+    for course_instructor in CourseInstructor.query.filter_by(course_id=1):
+        db.session.add(Comment(user=user, course_instructor=course_instructor, content='About this instructor'))
+    db.session.commit()
+    rebuild_aggregates()
+    refresh_rankings()
+    return user.id
+
+
+def insert_courses(count):
+    """Bulk insert ``count`` courses with descriptions of a typical length; must be called inside an app context."""
+    db.session.execute(Course.__table__.insert(), [
+        {'course_code': f'GEN{10000 + index}', 'name': f'General studies {index}', 'unit': 3,
+         'description': f'Course {index} surveys ' + 'methods, readings and projects in general studies; ' * 4}
+        for index in range(count)
+    ])
+    db.session.commit()
+
+
+@contextmanager
+def count_statements(engine):
+    """Count the statements sent to ``engine`` inside the block; yields a one-item list holding the count."""
+    counter = [0]
+
+    def _before_cursor_execute(*args):
+        counter[0] += 1
+
+    event.listen(engine, 'before_cursor_execute', _before_cursor_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', _before_cursor_execute)
@@ -0,0 +1,75 @@
+# tests/stream_memory.py
+"""
+Serve GET /v1/api/courses once in this process and report its peak memory.
+
+Usage: python -m tests.stream_memory list|stream|ndjson DATABASE_URL
+
+Run it as a fresh process per measurement: the peak RSS is read from ``VmHWM``,
+which, unlike ``ru_maxrss``, starts afresh at exec instead of carrying over the
+parent's peak. The variants:
+  - list:    load every row, build the whole list and encode it at once
+  - stream:  the route as it is, streaming a JSON array through a server-side cursor
+  - ndjson:  the route with ?format=ndjson
+The response cache is disabled. Prints one JSON line with the RSS before the
+request and at its peak (MiB), the seconds to the first byte and in total, and
+the body size in bytes.
+"""
+import json
+import os
+import sys
+import time
+
+from flask import jsonify
+
+from app import create_app
+from app.queries import course_summaries
+from app.response_cache import response_cache
+from config import Config
+
+
+def rss_mib():
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
+
+
+def peak_rss_mib():
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmHWM:'):
+                return int(line.split()[1]) / 1024
+
+
+def measure(variant, database_url):
+    """Serve GET /v1/api/courses once, the ``variant`` way, and print its memory and timings as JSON."""
+    Config.SQLALCHEMY_DATABASE_URI = database_url
+    Config.SUGGEST_WARM_ON_STARTUP = False
+    app = create_app()
+    response_cache.configure(None, 0)
+    client = app.test_client()
+    # Warm imports and the connection pool on a tiny request first
+    client.get('/v1/api/courses/1')
+
+    baseline = rss_mib()
+    start = time.perf_counter()
+    first_byte = None
+    size = 0
+    if variant == 'list':
+        with app.test_request_context('/v1/api/courses'):
+            body = jsonify(course_summaries()).get_data()
+        first_byte = time.perf_counter() - start
+        size = len(body)
+    else:
+        url = '/v1/api/courses?format=ndjson' if variant == 'ndjson' else '/v1/api/courses'
+        response = client.get(url, buffered=False)
+        for chunk in response.response:
+            if first_byte is None:
+                first_byte = time.perf_counter() - start
+            size += len(chunk)
+        response.close()
+    total = time.perf_counter() - start
+    peak = peak_rss_mib()
+    print(json.dumps({'baseline': baseline, 'peak': peak, 'first_byte': first_byte, 'total': total, 'size': size}))
+
+
+if __name__ == '__main__':
+    measure(*sys.argv[1:])
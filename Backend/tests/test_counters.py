@@ -0,0 +1,72 @@
+# tests/test_counters.py
+"""
+Counters and unique rows under concurrent requests.
+
+SQLite runs one writer at a time, which still leaves the races between a
+request's reads and its writes; set TEST_DATABASE_URL to a PostgreSQL database
+for real row-level concurrency.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from app.likes.counters import reconcile_like_counts
+from app.models import db, Comment, Course, Follow, Like
+
+USERS = 40
+THREADS = 8
+
+
+@pytest.fixture
+def comment_id(app, make_users):
+    author_id, = make_users(1, prefix='author')
+    with app.app_context():
+        course = Course(course_code='TEST100', name='Testing', unit=3)
+        db.session.add(course)
+        db.session.flush()
+        comment = Comment(user_id=author_id, course_id=course.id, content='Like me')
+        db.session.add(comment)
+        db.session.commit()
+        return comment.id
+
+
+def concurrently(app, requests):
+    """Send ``(method, url, headers)`` requests on ``THREADS`` threads, one test client each; returns the statuses."""
+    def send(request):
+        method, url, headers = request
+        with app.test_client() as client:
+            return client.open(url, method=method, headers=headers).status_code
+
+    with ThreadPoolExecutor(max_workers=THREADS) as pool:
+        return list(pool.map(send, requests))
+
+
+def test_concurrent_likes_and_unlikes_keep_like_count_in_step(app, make_users, auth_headers, comment_id):
+    headers = [auth_headers(user_id) for user_id in make_users(USERS)]
+    url = f'/v1/api/likes/comments/{comment_id}'
+
+    # Every user likes twice, so the second like of each races the first
+    like_statuses = concurrently(app, [('POST', url, user_headers) for user_headers in headers + headers])
+    unlike_statuses = concurrently(app, [('DELETE', url, user_headers) for user_headers in headers[::2]])
+
+    assert like_statuses.count(200) == USERS
+    assert like_statuses.count(400) == USERS
+    assert unlike_statuses.count(200) == len(headers[::2])
+    with app.app_context():
+        assert db.session.get(Comment, comment_id).like_count == USERS - len(headers[::2])
+        assert Like.query.filter_by(comment_id=comment_id).count() == USERS - len(headers[::2])
+        assert reconcile_like_counts(check_only=True) == []
+
+
+def test_concurrent_follows_of_one_course_store_one_follow(app, make_users, auth_headers, comment_id):
+    user_id, = make_users(1)
+    with app.app_context():
+        course_id = db.session.get(Comment, comment_id).course_id
+    url = f'/v1/api/follows/courses/{course_id}'
+
+    statuses = concurrently(app, [('POST', url, auth_headers(user_id))] * THREADS)
+
+    assert statuses.count(200) == 1
+    assert statuses.count(400) == THREADS - 1
+    with app.app_context():
+        assert Follow.query.filter_by(user_id=user_id, course_id=course_id).count() == 1
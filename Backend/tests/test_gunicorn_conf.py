@@ -0,0 +1,54 @@
+# tests/test_gunicorn_conf.py
+"""
+gunicorn.conf.py's startup checks with the shipped defaults.
+
+Config reads the environment once, at import, so each case loads it in a
+fresh interpreter with only the given variables set.
+"""
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+ON_STARTING = """
+import runpy
+from types import SimpleNamespace
+
+from app import create_app
+from app.response_cache import response_cache
+
+conf = runpy.run_path('gunicorn.conf.py')
+app = create_app()
+server = SimpleNamespace(app=SimpleNamespace(wsgi=lambda: app),
+                         cfg=SimpleNamespace(workers=conf['workers'], threads=conf['threads']))
+conf['on_starting'](server)
+print(conf['workers'], type(response_cache.backend).__name__)
+"""
+
+
+def on_starting(tmp_path, **variables):
+    """Run ``on_starting`` as ``gunicorn run:app`` would; returns the worker count and response cache backend."""
+    env = {name: value for name, value in os.environ.items()
+           if not name.startswith(('RESPONSE_CACHE_', 'WEB_', 'DATABASE_'))}
+    env.update(DATABASE_URL=f'sqlite:///{tmp_path / "academisync.db"}', SUGGEST_WARM_ON_STARTUP='false', **variables)
+    output = subprocess.run([sys.executable, '-c', ON_STARTING], cwd=BACKEND, env=env,
+                            check=True, capture_output=True, text=True).stdout
+    workers, backend = output.split()
+    return int(workers), backend
+
+
+def test_default_config_starts_several_workers_without_a_per_process_cache(tmp_path):
+    workers, backend = on_starting(tmp_path)
+    assert workers > 1
+    assert backend == 'NoneType'
+
+
+def test_single_worker_keeps_the_memory_cache(tmp_path):
+    assert on_starting(tmp_path, WEB_WORKERS='1') == (1, 'MemoryBackend')
+
+
+def test_cache_url_selects_the_shared_backend(tmp_path):
+    workers, backend = on_starting(tmp_path, RESPONSE_CACHE_URL='redis://localhost:6379/0')
+    assert backend == 'RedisBackend'
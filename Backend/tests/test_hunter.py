@@ -0,0 +1,92 @@
+# tests/test_hunter.py
+import time
+
+import pytest
+
+from app.auth.hunter import HunterClient
+from tests.fake_hunter import start_fake_hunter
+
+COOLDOWN = 0.2
+
+
+@pytest.fixture
+def fake_hunter():
+    server = start_fake_hunter()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def hunter(fake_hunter):
+    return HunterClient(
+        api_url=fake_hunter.url, api_key='test', connect_timeout=1, read_timeout=0.2, pool_size=2,
+        cache_ttl=60, cache_max_entries=100, breaker_threshold=2, breaker_cooldown=COOLDOWN
+    )
+
+
+def domain_check(email):
+    return 'domain check'
+
+
+def test_verdicts_are_cached_per_email(hunter, fake_hunter):
+    assert hunter.verify('alice@example.edu', domain_check) is True
+    assert hunter.verify('invalid.bob@example.edu', domain_check) is False
+    assert hunter.verify(' Alice@Example.edu ', domain_check) is True
+    assert fake_hunter.requests == 2
+
+
+def test_disposable_domain_is_rejected_without_asking_again(hunter, fake_hunter):
+    assert hunter.verify('disposable@throwaway.test', domain_check) is False
+    assert hunter.verify('someone.else@throwaway.test', domain_check) is False
+    assert fake_hunter.requests == 1
+
+
+@pytest.mark.parametrize('behaviour', [{'status_code': 500}, {'status_code': 429}, {'delay': 0.5}])
+def test_failing_upstream_falls_back_to_the_domain_check(hunter, fake_hunter, behaviour):
+    fake_hunter.behaviour.update(behaviour)
+    assert hunter.verify('alice@example.edu', domain_check) == 'domain check'
+    assert hunter.stats()['fallbacks'] == 1
+
+
+@pytest.mark.parametrize('body', [b'not json', b'[1, 2]', b'"valid"', b'null', b'{"data": [1]}', b'{"data": null}'])
+def test_malformed_reply_falls_back_to_the_domain_check(hunter, fake_hunter, body):
+    fake_hunter.behaviour['body'] = body
+    assert hunter.verify('alice@example.edu', domain_check) == 'domain check'
+    assert hunter.stats()['failures'] == 1
+
+
+def test_breaker_opens_after_failures_and_closes_after_a_good_trial(hunter, fake_hunter):
+    fake_hunter.behaviour['status_code'] = 503
+    for index in range(2):
+        hunter.verify(f'user{index}@example.edu', domain_check)
+    assert hunter.breaker.state == 'open'
+
+    requests = fake_hunter.requests
+    assert hunter.verify('user2@example.edu', domain_check) == 'domain check'
+    assert fake_hunter.requests == requests
+
+    time.sleep(COOLDOWN)
+    fake_hunter.behaviour['status_code'] = 200
+    assert hunter.verify('user3@example.edu', domain_check) is True
+    assert hunter.breaker.state == 'closed'
+
+
+def test_breaker_trial_that_raises_does_not_block_later_trials(hunter, fake_hunter, monkeypatch):
+    fake_hunter.behaviour['status_code'] = 503
+    for index in range(2):
+        hunter.verify(f'user{index}@example.edu', domain_check)
+    time.sleep(COOLDOWN)
+
+    def broken_fetch(email):
+        raise RuntimeError('unexpected')
+
+    monkeypatch.setattr(hunter, '_fetch', broken_fetch)
+    with pytest.raises(RuntimeError):
+        hunter.verify('user2@example.edu', domain_check)
+    monkeypatch.undo()
+
+    time.sleep(COOLDOWN)
+    fake_hunter.behaviour['status_code'] = 200
+    assert hunter.verify('user3@example.edu', domain_check) is True
+    assert hunter.breaker.state == 'closed'
@@ -0,0 +1,14 @@
+# tests/test_ops.py
+from app import create_app
+from config import Config
+
+
+def test_ops_endpoints_are_not_served_by_default(client):
+    assert client.get('/v1/api/ops/cache-stats').status_code == 404
+
+
+def test_ops_endpoints_are_served_when_enabled(app, monkeypatch):
+    monkeypatch.setattr(Config, 'OPS_ENDPOINTS_ENABLED', True)
+    response = create_app().test_client().get('/v1/api/ops/cache-stats')
+    assert response.status_code == 200
+    assert set(response.get_json()) == {'reference_cache', 'response_cache', 'hunter', 'password_hasher'}
@@ -0,0 +1,53 @@
+# tests/test_query_budgets.py
+import pytest
+
+from app.instrumentation import assert_max_queries
+from tests.helpers import seed_catalog
+
+# Route -> most statements it may run. Keep these tight: raise one only with a reason.
+BUDGETS = {
+    '/v1/api/courses': 1,
+    # A page plus the count estimate on the first one
+    '/v1/api/courses?limit=5&fields=id,course_code': 2,
+    # Read from the precomputed rankings; same as any other page
+    '/v1/api/courses?sort=dimension:difficulty&limit=5': 2,
+    '/v1/api/courses?sort=dimension:difficulty': 1,
+    '/v1/api/courses/1': 2,
+    # Course, instructors, ratings, two for comments, my ratings, follow state
+    '/v1/api/courses/1/page': 7,
+    # Ranking runs in the database on PostgreSQL, in memory on SQLite
+    '/v1/api/courses/search?q=topic': 2,
+    '/v1/api/instructors?limit=2': 2,
+    '/v1/api/instructors/1': 1,
+    '/v1/api/ratings/courses/1': 2,
+    '/v1/api/ratings/courses?ids=1,2,3': 1,
+    '/v1/api/ratings/courses/1/instructors/1': 2,
+    # Instructor from the reference cache, then every offering's aggregates in one query
+    '/v1/api/ratings/instructors/1': 1,
+    '/v1/api/ratings/my-ratings?course_id=1': 2,
+    '/v1/api/comments/courses/1': 3,
+    '/v1/api/comments/courses/1/instructors/1': 3,
+    '/v1/api/users/me/followed-courses': 1,
+    '/v1/api/users/me/followed-courses?limit=5': 1,
+}
+
+
+@pytest.fixture
+def headers(app, auth_headers):
+    with app.app_context():
+        user_id = seed_catalog()
+    return auth_headers(user_id)
+
+
+@pytest.mark.parametrize('url, budget', BUDGETS.items())
+def test_read_route_stays_within_its_query_budget(client, headers, url, budget):
+    # Warm per-process caches (reference data, search index) so only the request's own statements count
+    client.get(url, headers=headers)
+    response = assert_max_queries(client, url, budget, headers=headers)
+    assert response.status_code == 200
+
+
+def test_assert_max_queries_lists_the_statements_over_budget(client, headers):
+    client.get('/v1/api/courses/1')
+    with pytest.raises(AssertionError, match=r'ran 2 SQL statements, more than the 1 allowed:\n  1 x SELECT'):
+        assert_max_queries(client, '/v1/api/courses/1', 1)
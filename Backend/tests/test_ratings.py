@@ -0,0 +1,35 @@
+# tests/test_ratings.py
+import pytest
+
+from app.models import db, Course, RatingDimension
+
+
+@pytest.fixture
+def course_id(app):
+    with app.app_context():
+        course = Course(course_code='TEST100', name='Testing', unit=3)
+        db.session.add_all([course, RatingDimension(name='Difficulty', description='How hard it is')])
+        db.session.commit()
+        return course.id
+
+
+@pytest.mark.parametrize('rating', [
+    {'rating_dimension_id': [1], 'score': 3},
+    {'rating_dimension_id': {'id': 1}, 'score': 3},
+    {'rating_dimension_id': '1', 'score': 3},
+    {'rating_dimension_id': True, 'score': 3},
+    {'rating_dimension_id': 1, 'score': 3.0},
+    [1, 3],
+])
+def test_malformed_rating_inputs_are_rejected(client, auth_headers, make_users, course_id, rating):
+    user_id, = make_users(1)
+    response = client.post('/v1/api/ratings', headers=auth_headers(user_id),
+                           json={'course_id': course_id, 'ratings': [rating]})
+    assert response.status_code == 400
+
+
+def test_well_formed_rating_is_stored(client, auth_headers, make_users, course_id):
+    user_id, = make_users(1)
+    response = client.post('/v1/api/ratings', headers=auth_headers(user_id),
+                           json={'course_id': course_id, 'ratings': [{'rating_dimension_id': 1, 'score': 3}]})
+    assert response.status_code == 201
@@ -0,0 +1,114 @@
+# tests/test_replica_routing.py
+"""
+Which database each kind of request reads from with read replicas configured.
+
+The replicas are copies of the seeded primary's SQLite file that never receive
+later writes, like replicas lagging far behind. Statements are counted per
+engine, so every test names the databases a request actually touched.
+"""
+import shutil
+import time
+from contextlib import ExitStack
+
+import pytest
+
+from app import create_app
+from app.models import db
+from app.response_cache import MemoryBackend, response_cache
+from config import Config
+from tests.helpers import count_statements, seed_catalog
+
+PIN_SECONDS = 1
+
+
+@pytest.fixture
+def routed(app, database_url, tmp_path, monkeypatch, auth_headers):
+    """The app with two replicas; returns ``(client, touched, headers of the seeded user)``."""
+    with app.app_context():
+        user_id = seed_catalog()
+        db.engine.dispose()
+    primary_path = database_url.split('///', 1)[1]
+    replica_urls = []
+    for name in 'ab':
+        path = tmp_path / f'replica_{name}.db'
+        shutil.copyfile(primary_path, path)
+        replica_urls.append(f'sqlite:///{path}')
+
+    monkeypatch.setattr(Config, 'DATABASE_REPLICA_URLS', replica_urls)
+    monkeypatch.setattr(Config, 'DATABASE_REPLICA_PIN_SECONDS', PIN_SECONDS)
+    routed_app = create_app()
+    response_cache.configure(None, 0)
+    with routed_app.app_context():
+        engines = {'primary': db.engines[None]}
+        engines.update({f'replica {index}': db.engines[f'replica_{index}'] for index in range(len(replica_urls))})
+    client = routed_app.test_client()
+
+    def touched(method, url, **kwargs):
+        """The names of the databases that ran statements for one request."""
+        with ExitStack() as stack:
+            counters = {name: stack.enter_context(count_statements(engine)) for name, engine in engines.items()}
+            response = client.open(url, method=method, **kwargs)
+        assert response.status_code in (200, 201), response.get_data()
+        return {name for name, counter in counters.items() if counter[0]}
+
+    yield touched, auth_headers(user_id)
+    for engine in engines.values():
+        engine.dispose()
+
+
+def is_one_replica(used):
+    return len(used) == 1 and next(iter(used)).startswith('replica')
+
+
+def test_reads_take_the_replicas_in_turn(routed):
+    touched, _ = routed
+    first = touched('GET', '/v1/api/courses/1')
+    second = touched('GET', '/v1/api/courses/1')
+    assert is_one_replica(first) and is_one_replica(second) and first != second
+    assert touched('GET', '/v1/api/courses/1') == first
+    assert is_one_replica(touched('GET', '/v1/api/comments/courses/1'))
+    assert is_one_replica(touched('GET', '/v1/api/instructors/1'))
+
+
+@pytest.mark.parametrize('url', ['/v1/api/users/me/followed-courses', '/v1/api/ratings/my-ratings?course_id=1'])
+def test_other_blueprints_and_use_primary_views_read_the_primary(routed, url):
+    touched, headers = routed
+    assert touched('GET', url, headers=headers) == {'primary'}
+
+
+def test_writer_and_invalidated_tags_read_the_primary_within_the_pin(routed):
+    touched, headers = routed
+    response_cache.configure(MemoryBackend(1000), 300)
+    touched('GET', '/v1/api/ratings/courses/1')
+
+    assert touched('POST', '/v1/api/ratings', headers=headers,
+                   json={'course_id': 1, 'ratings': [{'rating_dimension_id': 2, 'score': 5}]}) == {'primary'}
+    assert touched('GET', '/v1/api/courses/3', headers=headers) == {'primary'}
+    assert touched('GET', '/v1/api/ratings/courses/1') == {'primary'}
+    assert touched('GET', '/v1/api/ratings/courses/1') == set()
+    assert is_one_replica(touched('GET', '/v1/api/courses/4'))
+
+    time.sleep(PIN_SECONDS + 0.2)
+    response_cache.configure(None, 0)
+    assert is_one_replica(touched('GET', '/v1/api/courses/3', headers=headers))
+
+
+def test_late_tag_written_within_the_pin_moves_the_rest_to_the_primary(routed):
+    touched, headers = routed
+    response_cache.configure(MemoryBackend(1000), 300)
+    touched('POST', '/v1/api/comments', headers=headers, json={'course_instructor_id': 1, 'content': 'Fresh'})
+
+    # The pair is looked up before the view knows its tag; the threads come from the primary
+    used = touched('GET', '/v1/api/comments/courses/1/instructors/1')
+    assert 'primary' in used and len(used) == 2
+
+
+def test_commits_skip_the_write_marks_without_replicas(app, client, auth_headers, make_users, monkeypatch):
+    user_id, = make_users(1)
+    calls = []
+    monkeypatch.setattr('app.database._request_identity', lambda: calls.append(1))
+    with app.app_context():
+        seed_catalog()
+    response = client.post('/v1/api/follows/courses/1', headers=auth_headers(user_id))
+    assert response.status_code == 200
+    assert calls == []
@@ -0,0 +1,42 @@
+# tests/test_stream_courses.py
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from app.models import db, Course
+from tests.helpers import insert_courses
+
+BACKEND = Path(__file__).resolve().parents[1]
+
+
+def peak_memory(variant, database_url):
+    """Serve GET /courses one way in a fresh process: peak RSS growth and body size in MiB, see ``tests.stream_memory``."""
+    output = subprocess.run(
+        [sys.executable, '-m', 'tests.stream_memory', variant, database_url],
+        cwd=BACKEND, check=True, capture_output=True, text=True
+    ).stdout
+    result = json.loads(output.strip().splitlines()[-1])
+    return result['peak'] - result['baseline'], result['size'] / 2 ** 20
+
+
+def test_streamed_course_list_memory_stays_flat_as_the_catalog_grows(app, database_url):
+    variants = ('list', 'stream', 'ndjson')
+    measured = []
+    for count in (5000, 20000):
+        with app.app_context():
+            Course.query.delete()
+            insert_courses(count)
+            db.engine.dispose()
+        measured.append({variant: peak_memory(variant, database_url) for variant in variants})
+    small, large = measured
+    added = large['list'][1] - small['list'][1]
+
+    # Building the list holds every row and the whole body, so its peak grows with the catalog
+    assert large['list'][0] - small['list'][0] > added
+    for variant in ('stream', 'ndjson'):
+        assert large[variant][1] - small[variant][1] > added * 0.95
+        growth = large[variant][0] - small[variant][0]
+        assert growth < added / 4, (
+            f'{variant}: peak RSS grew {growth:.1f} MiB more for {added:.1f} MiB more body'
+        )
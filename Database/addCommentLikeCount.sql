@@ -0,0 +1,8 @@
+-- Denormalized like counter on comments, maintained by the likes routes.
+ALTER TABLE comments ADD COLUMN IF NOT EXISTS like_count INTEGER NOT NULL DEFAULT 0;
+
+-- Backfill from the likes table (same as `flask likes reconcile`).
+UPDATE comments
+SET like_count = counts.total
+FROM (SELECT comment_id, COUNT(*) AS total FROM likes GROUP BY comment_id) AS counts
+WHERE counts.comment_id = comments.id;
@@ -0,0 +1,9 @@
+-- Comment threads (GET /comments/courses/..., app/comments/threads.py).
+-- A page of threads is a range scan of the target's top-level comments (parent_comment_id IS NULL),
+-- and each level of replies a scan per parent, oldest first.
+CREATE INDEX IF NOT EXISTS ix_comments_course_parent_created_at_id
+    ON comments (course_id, parent_comment_id, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_comments_course_instructor_parent_created_at_id
+    ON comments (course_instructor_id, parent_comment_id, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_comments_parent_created_at_id
+    ON comments (parent_comment_id, created_at, id);
@@ -0,0 +1,26 @@
+-- Precomputed course rankings per rating dimension, behind GET /courses?sort=dimension:<name>.
+-- Filled and kept current by `flask ratings refresh-rankings` (run it once after creating the tables).
+CREATE TABLE IF NOT EXISTS course_rankings (
+    id SERIAL PRIMARY KEY,
+    course_id INTEGER NOT NULL REFERENCES courses (id) ON DELETE CASCADE,
+    rating_dimension_id INTEGER NOT NULL REFERENCES rating_dimensions (id) ON DELETE CASCADE,
+    score_sum INTEGER NOT NULL,
+    vote_count INTEGER NOT NULL,
+    bayesian_average DOUBLE PRECISION NOT NULL,
+    updated_at TIMESTAMP DEFAULT NOW(),
+    CONSTRAINT _ranking_course_dimension_uc UNIQUE (course_id, rating_dimension_id)
+);
+CREATE INDEX IF NOT EXISTS ix_course_rankings_dimension_average_course
+    ON course_rankings (rating_dimension_id, bayesian_average, course_id);
+
+CREATE TABLE IF NOT EXISTS course_ranking_state (
+    rating_dimension_id INTEGER PRIMARY KEY REFERENCES rating_dimensions (id) ON DELETE CASCADE,
+    score_sum BIGINT NOT NULL DEFAULT 0,
+    vote_count BIGINT NOT NULL DEFAULT 0,
+    prior_mean DOUBLE PRECISION,
+    refreshed_through TIMESTAMP,
+    refreshed_at TIMESTAMP DEFAULT NOW()
+);
+
+-- The incremental refresh reads the aggregates touched since its last run
+CREATE INDEX IF NOT EXISTS ix_rating_aggregates_updated_at ON rating_aggregates (updated_at);
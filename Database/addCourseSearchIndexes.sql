@@ -0,0 +1,16 @@
+-- Full-text search behind GET /courses/search on PostgreSQL.
+-- The expression must stay identical to COURSE_SEARCH_VECTOR_SQL in Backend/app/models.py.
+ALTER TABLE courses ADD COLUMN IF NOT EXISTS search_vector tsvector GENERATED ALWAYS AS (
+    setweight(to_tsvector('simple', coalesce(course_code, '')), 'A') ||
+    setweight(to_tsvector('simple', coalesce(name, '')), 'B') ||
+    setweight(to_tsvector('simple', coalesce(description, '')), 'C')
+) STORED;
+
+CREATE INDEX IF NOT EXISTS ix_courses_search_vector ON courses USING gin (search_vector);
+
+CREATE INDEX IF NOT EXISTS ix_courses_course_code_lower_pattern ON courses (lower(course_code) text_pattern_ops);
+
+-- Optional: infix matches on course-code fragments such as 'UCUG15'.
+-- Without pg_trgm the search falls back to prefix matches on the index above.
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX IF NOT EXISTS ix_courses_course_code_trgm ON courses USING gin (lower(course_code) gin_trgm_ops);
@@ -0,0 +1,3 @@
+-- An instructor's offerings (GET /instructors/{id}, GET /ratings/instructors/{id}).
+-- The unique constraint on course_instructors leads with course_id, so it cannot serve these lookups.
+CREATE INDEX IF NOT EXISTS ix_course_instructors_instructor_id ON course_instructors (instructor_id);
@@ -0,0 +1,5 @@
+-- Keyset pagination of the list endpoints (GET /courses, /instructors, /users/me/followed-courses).
+-- Each index matches the ORDER BY of its listing, so every page is an index range scan.
+CREATE INDEX IF NOT EXISTS ix_courses_created_at_id ON courses (created_at, id);
+CREATE INDEX IF NOT EXISTS ix_instructors_name_id ON instructors (name, id);
+CREATE INDEX IF NOT EXISTS ix_follows_user_created_at_id ON follows (user_id, created_at, id);
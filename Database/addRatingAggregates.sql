@@ -0,0 +1,36 @@
+-- Running totals of ratings per target and dimension (app/ratings/aggregates.py).
+-- submit_rating keeps them in step in the same transaction as the ratings themselves.
+CREATE TABLE IF NOT EXISTS rating_aggregates (
+    id SERIAL PRIMARY KEY,
+    course_id INTEGER REFERENCES courses (id) ON DELETE CASCADE,
+    course_instructor_id INTEGER REFERENCES course_instructors (id) ON DELETE CASCADE,
+    rating_dimension_id INTEGER NOT NULL REFERENCES rating_dimensions (id) ON DELETE CASCADE,
+    score_sum INTEGER NOT NULL DEFAULT 0,
+    score_count INTEGER NOT NULL DEFAULT 0,
+    count_1 INTEGER NOT NULL DEFAULT 0,
+    count_2 INTEGER NOT NULL DEFAULT 0,
+    count_3 INTEGER NOT NULL DEFAULT 0,
+    count_4 INTEGER NOT NULL DEFAULT 0,
+    count_5 INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT NOW(),
+    -- NULLs never collide in a unique index, so each constraint only covers its own kind of target
+    CONSTRAINT _aggregate_course_dimension_uc UNIQUE (course_id, rating_dimension_id),
+    CONSTRAINT _aggregate_course_instructor_dimension_uc UNIQUE (course_instructor_id, rating_dimension_id),
+    CONSTRAINT check_aggregate_course_or_instructor CHECK (
+        (course_id IS NOT NULL AND course_instructor_id IS NULL) OR (course_id IS NULL AND course_instructor_id IS NOT NULL)
+    )
+);
+
+-- Backfill from the existing ratings; skipped once the table holds any rows, so the script can be rerun.
+-- `flask ratings rebuild-aggregates --check` reports any drift afterwards.
+INSERT INTO rating_aggregates (
+    course_id, course_instructor_id, rating_dimension_id, score_sum, score_count,
+    count_1, count_2, count_3, count_4, count_5
+)
+SELECT
+    course_id, course_instructor_id, rating_dimension_id, SUM(score), COUNT(*),
+    COUNT(*) FILTER (WHERE score = 1), COUNT(*) FILTER (WHERE score = 2), COUNT(*) FILTER (WHERE score = 3),
+    COUNT(*) FILTER (WHERE score = 4), COUNT(*) FILTER (WHERE score = 5)
+FROM ratings
+WHERE NOT EXISTS (SELECT 1 FROM rating_aggregates)
+GROUP BY course_id, course_instructor_id, rating_dimension_id;
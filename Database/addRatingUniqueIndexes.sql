@@ -0,0 +1,15 @@
+-- Enforce one rating per user, dimension and target so submit_rating can upsert.
+-- Duplicates left behind by concurrent submits are removed first, keeping the newest row.
+DELETE FROM ratings older
+USING ratings newer
+WHERE older.user_id = newer.user_id
+    AND older.rating_dimension_id = newer.rating_dimension_id
+    AND older.course_id IS NOT DISTINCT FROM newer.course_id
+    AND older.course_instructor_id IS NOT DISTINCT FROM newer.course_instructor_id
+    AND older.id < newer.id;
+
+ALTER TABLE ratings
+    ADD CONSTRAINT _user_dimension_course_rating_uc UNIQUE (user_id, rating_dimension_id, course_id),
+    ADD CONSTRAINT _user_dimension_course_instructor_rating_uc UNIQUE (user_id, rating_dimension_id, course_instructor_id);
+
+-- Afterwards, run `flask ratings rebuild-aggregates` to resynchronise rating_aggregates.
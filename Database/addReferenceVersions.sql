@@ -0,0 +1,7 @@
+-- Version counters for the in-process reference data cache (app/reference_cache.py).
+-- Bumped in the same transaction as any write to a cached dataset, so every worker reloads it.
+CREATE TABLE IF NOT EXISTS reference_versions (
+    name VARCHAR(64) PRIMARY KEY,
+    version INTEGER NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP DEFAULT NOW()
+);